@@ -1,4 +1,6 @@
 import inspect
+import logging
+import textwrap
 from abc import ABC, abstractmethod
 import time
 from enum import Enum, auto
@@ -6,6 +8,8 @@ from typing import TypeVar, Callable, Tuple, Optional
 
 import streamlit as st
 
+logger = logging.getLogger(__name__)
+
 SHOWCASE2_GLOBAL_STYLES = """
     <style>
         a{
@@ -4437,6 +4441,46 @@ class BaseLoader(ABC):
 
 LoaderType = TypeVar('LoaderType', bound=BaseLoader)
 
+LOADER_WRAPPER_CLASS = "stp-loader"
+
+
+def loader_timing_styles(show_after_ms: int, fade_ms: int) -> tuple[str, str]:
+    """
+    CSS that animates the loader on the client, so the script thread never waits for it.
+    The enter style keeps the loader hidden for `show_after_ms` and then fades it in, the exit
+    style fades it out and leaves it hidden and without catching clicks.
+    """
+    enter_style = f"""
+    <style>
+        .{LOADER_WRAPPER_CLASS} {{
+            animation: {LOADER_WRAPPER_CLASS}-in {fade_ms}ms ease-in-out {show_after_ms}ms both;
+        }}
+        @keyframes {LOADER_WRAPPER_CLASS}-in {{
+            0% {{ opacity: 0; visibility: hidden; }}
+            100% {{ opacity: 1; visibility: visible; }}
+        }}
+    </style>
+    """
+    exit_style = f"""
+    <style>
+        .{LOADER_WRAPPER_CLASS} {{
+            animation: {LOADER_WRAPPER_CLASS}-out {fade_ms}ms ease-in-out forwards !important;
+            pointer-events: none;
+        }}
+        @keyframes {LOADER_WRAPPER_CLASS}-out {{
+            0% {{ opacity: 1; visibility: visible; }}
+            100% {{ opacity: 0; visibility: hidden; }}
+        }}
+    </style>
+    """
+    return enter_style, exit_style
+
+
+def _join_html(*parts: str) -> str:
+    # st.markdown quita la indentacion comun del texto: cada parte se desindenta por separado
+    # para que ninguna linea quede indentada como bloque de codigo
+    return "\n".join(textwrap.dedent(part).strip() for part in parts if part.strip())
+
 
 class DefaultLoader(BaseLoader):
     def __init__(self,
@@ -4444,10 +4488,18 @@ class DefaultLoader(BaseLoader):
         label='', height=256,
         primary_color=None, background_color=None,
         loader_lib: LoadersLib | Callable[..., Tuple[str, str ,str], ] = LoadersLib.book_loader, index=0, loader_lib_kwargs: dict = None,
-        sleep_animation_time: float = 0.1
+        show_after_ms: int = 150, fade_ms: int = 300,
+        sleep_animation_time: float | None = None
     ):
         super().__init__(loader_container=loader_container)
-        self.sleep_animation_time = sleep_animation_time
+        if sleep_animation_time is not None:
+            logger.warning("sleep_animation_time is deprecated, the animations run on the client, use fade_ms instead.")
+            fade_ms = int(sleep_animation_time * 1000)
+        # Solo se muestra si la pagina tarda mas de show_after_ms, sin esperas en el servidor
+        self.show_after_ms = show_after_ms
+        self.fade_ms = fade_ms
+        self.enter_style, self.exit_style = loader_timing_styles(show_after_ms, fade_ms)
+        self._started_at: float | None = None
         if primary_color is None:
             if st.get_option('theme.primaryColor') is None:
                 primary_color = '#F63366'
@@ -4502,6 +4554,12 @@ class DefaultLoader(BaseLoader):
         else:
             raise ValueError("Height must be an int, float, or str representing CSS height.")
 
+    @staticmethod
+    def _wrap_element(element_code: str) -> str:
+        # Una linea en blanco cerraria el bloque HTML del markdown antes del </div>
+        lines = [line for line in textwrap.dedent(element_code).splitlines() if line.strip()]
+        return f'<div class="{LOADER_WRAPPER_CLASS}">\n' + "\n".join(lines) + '\n</div>'
+
     def run_loader(self, label: Optional[str] = None, height: Optional[str | int] = None, primary_color: str = None, background_color: str = None):
         self.running = True
 
@@ -4518,21 +4576,24 @@ class DefaultLoader(BaseLoader):
             # print(background_color or self.default_background_color)
         # print(self.default_background_color)
 
+        self._started_at = time.perf_counter()
         with self.loader_container:
             self.display_element_out.empty()
-            if self.sleep_animation_time:
-                time.sleep(self.sleep_animation_time)  # Pequeña pausa para evitar parpadeos
-            self.display_element.markdown(element_style+element_code, unsafe_allow_html=True)
+            self.display_element.markdown(
+                _join_html(self.enter_style, element_style, self._wrap_element(element_code)),
+                unsafe_allow_html=True
+            )
 
     def stop_loader(self):
         if self.running:
+            elapsed_ms = (time.perf_counter() - self._started_at) * 1000
             with self.loader_container:
-                self.display_element_out.markdown(self.element_out_style, unsafe_allow_html=True)
-                # Para que se termine la animacion de salida y no se vea como parpadeos
-                if self.sleep_animation_time:
-                    time.sleep(self.sleep_animation_time)
-                self.display_element.empty()
-                self.display_element_out.empty()
+                if elapsed_ms < self.show_after_ms:
+                    # El cliente todavia no lo ha mostrado: se quita sin animacion de salida
+                    self.display_element.empty()
+                else:
+                    # La animacion de salida termina en el cliente, el elemento queda oculto
+                    self.display_element_out.markdown(_join_html(self.exit_style, self.element_out_style), unsafe_allow_html=True)
                 self.running = False
 
     def __enter__(self):
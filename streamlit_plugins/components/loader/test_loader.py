@@ -0,0 +1,108 @@
+"""
+Tests for the pure logic of the page loader (no Streamlit server needed).
+
+Run with:
+    pytest test_loader.py -v
+"""
+
+from types import SimpleNamespace
+
+import streamlit as st
+
+from streamlit_plugins.components import loader
+from streamlit_plugins.components.loader import LOADER_WRAPPER_CLASS, DefaultLoader, _join_html, loader_timing_styles
+
+
+# =============================================================================
+# Styles and HTML
+# =============================================================================
+
+def test_loader_timing_styles():
+    enter_style, exit_style = loader_timing_styles(show_after_ms=150, fade_ms=300)
+
+    assert f"animation: {LOADER_WRAPPER_CLASS}-in 300ms ease-in-out 150ms both;" in enter_style
+    assert f"@keyframes {LOADER_WRAPPER_CLASS}-in" in enter_style
+    assert f"animation: {LOADER_WRAPPER_CLASS}-out 300ms ease-in-out forwards !important;" in exit_style
+    assert "pointer-events: none;" in exit_style
+    assert f"{LOADER_WRAPPER_CLASS}-out" not in enter_style
+
+
+def test_join_html_dedents_each_part():
+    html = _join_html("\n    <style>\n        .a {}\n    </style>\n", "   ", "\n<div>\n  x\n</div>\n")
+
+    assert html == "<style>\n    .a {}\n</style>\n<div>\n  x\n</div>"
+    # Ninguna linea con 4 espacios al inicio de una parte: markdown la tomaria por un bloque de codigo
+    assert not html.startswith(" ")
+
+
+def test_wrap_element_drops_blank_lines():
+    wrapped = DefaultLoader._wrap_element("\n    <p>a</p>\n\n    <p>b</p>\n")
+
+    assert wrapped == f'<div class="{LOADER_WRAPPER_CLASS}">\n<p>a</p>\n<p>b</p>\n</div>'
+
+
+# =============================================================================
+# DefaultLoader
+# =============================================================================
+
+class _Slot:
+    """Stand-in for st.empty() that records what is shown in it"""
+
+    def __init__(self):
+        self.calls = []
+
+    def markdown(self, body, **kwargs):
+        self.calls.append(("markdown", body))
+
+    def empty(self):
+        self.calls.append(("empty", None))
+
+
+def _default_loader(**kwargs) -> DefaultLoader:
+    default_loader = DefaultLoader(
+        loader_container=st.container(), primary_color="#ff0000", background_color="#000000", **kwargs
+    )
+    default_loader.display_element, default_loader.display_element_out = _Slot(), _Slot()
+    return default_loader
+
+
+def test_deprecated_sleep_animation_time_sets_fade(monkeypatch):
+    warnings = []
+    monkeypatch.setattr(loader.logger, "warning", lambda msg, *args: warnings.append(msg))
+
+    default_loader = _default_loader(sleep_animation_time=0.5)
+    assert default_loader.fade_ms == 500
+    assert "500ms" in default_loader.enter_style
+    assert len(warnings) == 1 and "sleep_animation_time" in warnings[0]
+
+    default_loader = _default_loader(fade_ms=120)
+    assert default_loader.fade_ms == 120
+    assert len(warnings) == 1
+
+
+def test_stop_loader_skips_exit_animation_for_fast_pages(monkeypatch):
+    now = [10.0]
+    monkeypatch.setattr(loader, "time", SimpleNamespace(perf_counter=lambda: now[0]))
+    default_loader = _default_loader(show_after_ms=150)
+
+    default_loader.run_loader()
+    ((kind, body),) = default_loader.display_element.calls
+    assert kind == "markdown" and default_loader.enter_style.strip().splitlines()[0] in body
+
+    # La pagina termina antes de que el cliente muestre el loader: se quita sin animacion
+    now[0] += 0.1
+    default_loader.stop_loader()
+    assert default_loader.display_element.calls[-1] == ("empty", None)
+    assert default_loader.display_element_out.calls == [("empty", None)]
+    assert not default_loader.running
+
+    default_loader.run_loader()
+    now[0] += 0.2
+    default_loader.stop_loader()
+    kind, body = default_loader.display_element_out.calls[-1]
+    assert kind == "markdown" and f"{LOADER_WRAPPER_CLASS}-out" in body
+
+    # Parar un loader que no corre no hace nada
+    calls = list(default_loader.display_element_out.calls)
+    default_loader.stop_loader()
+    assert default_loader.display_element_out.calls == calls
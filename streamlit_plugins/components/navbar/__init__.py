@@ -1,3 +1,4 @@
+import copy
 import inspect
 import time
 from typing import Literal
@@ -773,6 +774,66 @@ def st_navbar(
 def st_which_page() -> str:
     return st.session_state["navigation_page_id"]
 
+def _organize_pages(
+    pages: list[StreamlitPage] | dict[str, list[StreamlitPage]],
+    section_info: dict[str, dict[str, str]],
+) -> tuple[StreamlitPage, list[StreamlitPage | dict]]:
+    default_page = None
+    organized_pages = []
+    if isinstance(pages, dict):
+        for section, sub_pages in pages.items():
+            no_default_pages = []
+            for sub_page in sub_pages:
+                if sub_page._default:
+                    if default_page is None:
+                        default_page = sub_page
+                    else:
+                        raise ValueError("You can only have one default page")
+                else:
+                    no_default_pages.append(sub_page)
+
+            if section == "":
+                organized_pages.extend(no_default_pages)
+            else:
+                organized_pages.append(
+                    {
+                        "name": section,
+                        "subpages": no_default_pages,
+                        "icon": section_info.get(section, {}).get("icon", None),
+                        "ttip": section_info.get(section, {}).get("ttip", section)
+                    }
+                )
+    else:
+        for page in pages:
+            if page._default:
+                if default_page is None:
+                    default_page = page
+                else:
+                    raise ValueError("You can only have one default page")
+            else:
+                organized_pages.append(page)
+
+    if default_page is None:
+        raise ValueError("You must provide a default page")
+
+    return default_page, organized_pages
+
+def _menu_cache_key(
+    pages: list[StreamlitPage] | dict[str, list[StreamlitPage]],
+    section_info: dict[str, dict[str, str]],
+    *account_pages: StreamlitPage | None,
+) -> tuple:
+    """Todo lo que define el menu: secciones, paginas (id, titulo, icono) y paginas de cuenta"""
+    def describe(page: StreamlitPage | None):
+        return None if page is None else (page._script_hash, page.title, page.icon)
+
+    sections = pages.items() if isinstance(pages, dict) else [("", pages)]
+    return (
+        tuple((section, tuple(describe(page) for page in section_pages)) for section, section_pages in sections),
+        tuple((section, tuple(sorted(info.items()))) for section, info in section_info.items()),
+        tuple(describe(page) for page in account_pages),
+    )
+
 def st_navigation(
     pages: list[StreamlitPage] | dict[str, list[StreamlitPage]],
     section_info: dict[str, dict[str, str]] | None = None,
@@ -787,6 +848,7 @@ def st_navigation(
     theme_changer: bool = True,
     prefix_url: str = "",
     key="NavigationComponent",
+    menu_cache: dict | None = None,
 ) -> StreamlitPage:
     if "navigation_prev_url_page_id" not in st.session_state:
         st.session_state.navigation_prev_url_page_id = None
@@ -814,7 +876,6 @@ def st_navigation(
         section_info = {}
     
 
-    default_page = None
     if isinstance(pages, dict):
         st_pages = {**pages}
         if account_page or settings_page or logout_page or login_page:
@@ -827,40 +888,7 @@ def st_navigation(
             st_pages["Account"].append(logout_page)
         if login_page:
             st_pages["Account"].append(login_page)
-        
-        organized_pages = []
-        for section, sub_pages in pages.items():
-            no_default_pages = []
-            for sub_page in sub_pages:
-                if sub_page._default:
-                    if default_page is None:
-                        default_page = sub_page
-                    else:
-                        raise ValueError("You can only have one default page")
-                else:
-                    no_default_pages.append(sub_page)
-
-            if section == "":
-                organized_pages.extend(no_default_pages)
-            else:
-                organized_pages.append(
-                    {
-                        "name": section,
-                        "subpages": no_default_pages,
-                        "icon": section_info.get(section, {}).get("icon", None),
-                        "ttip": section_info.get(section, {}).get("ttip", section)
-                    }
-                )
     else:
-        organized_pages = []
-        for page in pages:
-            if page._default:
-                if default_page is None:
-                    default_page = page
-                else:
-                    raise ValueError("You can only have one default page")
-            else:
-                organized_pages.append(page)
         st_pages = {
             "": [*pages]
         }
@@ -873,15 +901,36 @@ def st_navigation(
         if login_page:
             st_pages[""].append(login_page)
 
-    if default_page is None:
-        raise ValueError("You must provide a default page")
-
-    menu_pages, home_definition, menu_account_pages, pages_map = build_menu_from_st_pages(
-        *organized_pages,
-        home_page=default_page,  # Default page is the home page
-        login_page=login_page, account_page=account_page, settings_page=settings_page,
-        logout_page=logout_page,
-    )
+    # El menu solo depende de las paginas: con menu_cache se construye una vez por
+    # conjunto de paginas. La clave son las paginas recibidas, asi una sesion que
+    # filtra el menu (login, nivel de acceso) nunca recibe el menu de otra.
+    # La cache solo guarda datos (ids y definiciones del menu); los objetos pagina
+    # son los de esta llamada, cada sesion tiene los suyos
+    menu_key = None
+    cached_menu = None
+    if menu_cache is not None:
+        menu_key = _menu_cache_key(pages, section_info, login_page, account_page, settings_page, logout_page)
+        cached_menu = menu_cache.get(menu_key)
+    if cached_menu is None:
+        default_page, organized_pages = _organize_pages(pages, section_info)
+        menu_pages, home_definition, menu_account_pages, _ = build_menu_from_st_pages(
+            *organized_pages,
+            home_page=default_page,  # Default page is the home page
+            login_page=login_page, account_page=account_page, settings_page=settings_page,
+            logout_page=logout_page,
+        )
+        cached_menu = default_page._script_hash, menu_pages, home_definition, menu_account_pages
+        if menu_cache is not None:
+            menu_cache[menu_key] = cached_menu
+
+    # st_navbar completa las definiciones in-place: cada run trabaja sobre su copia
+    default_page_id, menu_pages, home_definition, menu_account_pages = copy.deepcopy(cached_menu)
+    pages_map = {
+        page._script_hash: page
+        for section_pages in st_pages.values()
+        for page in section_pages
+    }
+    default_page = pages_map[default_page_id]
 
     st.session_state["navigation_menu_pages"] = menu_pages
     st.session_state["navigation_menu_account_pages"] = menu_account_pages
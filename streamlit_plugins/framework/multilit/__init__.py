@@ -1,2 +1,3 @@
 from .multilit import Multilit, NavbarPositionType
 from .app_wrapper import STPageWrapper
+from .page_state import page_state
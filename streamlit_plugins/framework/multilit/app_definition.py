@@ -0,0 +1,122 @@
+import copy
+import os
+import threading
+from typing import Any, Hashable, Optional
+
+from .app_wrapper import STPageWrapper
+
+# Atributos de Multilit que forman la definicion de la app (paginas, secciones y menu).
+# Los contenedores y loaders no entran: son elementos del run actual.
+DEFINITION_ATTRS = (
+    "_pages",
+    "_complex_nav",
+    "_navbar_pointers",
+    "_nav_item_count",
+    "_login_page", "_login_id",
+    "_home_page", "_home_label", "_home_id",
+    "_settings_page", "_settings_label", "_settings_id",
+    "_account_page", "_account_label", "_account_id",
+)
+
+# Definiciones compiladas, compartidas por todas las sesiones del proceso
+_DEFINITIONS: dict[Hashable, "AppDefinition"] = {}
+_DEFINITIONS_LOCK = threading.Lock()
+
+
+def script_version(*paths: Optional[str]) -> tuple:
+    """
+    Version of the scripts that declare the app: (path, mtime_ns) of each one.
+    Editing any of them invalidates the compiled definition, as Streamlit does on save.
+    """
+    version = []
+    for path in dict.fromkeys(paths):
+        if path is None:
+            continue
+        try:
+            version.append((path, os.stat(path).st_mtime_ns))
+        except OSError:
+            version.append((path, None))
+    return tuple(version)
+
+
+class AppDefinition:
+    """
+    Snapshot of the pages registered on a Multilit instance.
+
+    It is built once per process and script version and restored on every rerun, so the
+    per-run path only has to resolve the selected page and render it. The definition itself
+    is shared by all the sessions and never handed out: `restore` gives each instance its own
+    copy of the containers, page wrappers and pages.
+    """
+
+    def __init__(self, key: Hashable, version: tuple, attrs: dict[str, Any]):
+        self.key = key
+        self.version = version
+        self.attrs = attrs
+        # Se rellenan en el primer run que los necesita, solo con datos (ids y menu)
+        self.native_page_ids: Optional[dict[str, list[str]]] = None
+        self.menu_cache: dict = {}  # {paginas del menu: menu}, ver st_navigation
+        self.hits = 0
+
+    @classmethod
+    def capture(cls, app, key: Hashable, version: tuple) -> "AppDefinition":
+        attrs = {name: getattr(app, name) for name in DEFINITION_ATTRS}
+        # El logout se registra en cada run, la definicion guarda su propia copia
+        attrs["_pages"] = dict(attrs["_pages"])
+        return cls(key, version, attrs)
+
+    def restore(self, app) -> None:
+        """
+        Sets the definition on app with its own copies, so per-run changes such as
+        `_can_be_called` on a page or the logout page never reach other sessions.
+        """
+        copies: dict[int, Any] = {}
+
+        def own(obj):
+            # Una copia por objeto: _pages y _complex_nav siguen apuntando a la misma pagina
+            if id(obj) not in copies:
+                obj_copy = copy.copy(obj)
+                if isinstance(obj, STPageWrapper):
+                    obj_copy.st_page = own(obj.st_page)
+                copies[id(obj)] = obj_copy
+            return copies[id(obj)]
+
+        for name, value in self.attrs.items():
+            if name == "_complex_nav":
+                value = {
+                    key: {**item, "subpages": [own(page) for page in item["subpages"]]}
+                    if isinstance(item, dict) else own(item)
+                    for key, item in value.items()
+                }
+            elif isinstance(value, dict):
+                value = {
+                    key: own(item) if isinstance(item, STPageWrapper) else copy.copy(item)
+                    for key, item in value.items()
+                }
+            elif isinstance(value, (list, STPageWrapper)):
+                value = own(value)
+            setattr(app, name, value)
+
+
+def get_app_definition(key: Hashable, version: tuple) -> Optional[AppDefinition]:
+    definition = _DEFINITIONS.get(key)
+    if definition is None or definition.version != version:
+        return None
+    definition.hits += 1
+    return definition
+
+
+def store_app_definition(definition: AppDefinition) -> AppDefinition:
+    """Stores definition unless another session compiled the same version first"""
+    with _DEFINITIONS_LOCK:
+        current = _DEFINITIONS.get(definition.key)
+        if current is not None and current.version == definition.version:
+            return current
+        _DEFINITIONS[definition.key] = definition
+        return definition
+
+
+def clear_app_definitions() -> None:
+    """Forgets every compiled definition, the next run of each app compiles it again"""
+    with _DEFINITIONS_LOCK:
+        _DEFINITIONS.clear()
@@ -1,9 +1,14 @@
+import logging
 from abc import ABC
+from typing import Any, Callable, Iterable
 
 from streamlit.navigation.page import StreamlitPage
 
+from streamlit_plugins.components.loader import BaseLoader
+from streamlit_plugins.framework.multilit.lazy_page import LazyPage
 from streamlit_plugins.framework.multilit.loading_engine import LoadingEngine
 
+logger = logging.getLogger(__name__)
 
 class STPageWrapper:
     """
@@ -13,15 +18,55 @@ class STPageWrapper:
 
     """
 
-    def __init__(self, st_page: StreamlitPage, with_loader=None, loading_engine: LoadingEngine | None = None):
+    def __init__(
+        self, st_page: StreamlitPage, with_loader=None, loading_engine: LoadingEngine | None = None,
+        page_loader: type[BaseLoader] | None = None, page_loader_kwargs: dict | None = None,
+        prefetch: Callable[[], Any] | None = None,
+        state_keys: Iterable[str] | None = None
+    ):
         self.id: str = "unset"
         self.access_level: int | None = None
         self.with_loader = with_loader
         self.loading_engine = loading_engine
+        # Clase del loader propio de la pagina, se instancia en cada run que la ejecuta
+        self.page_loader = page_loader
+        self.page_loader_kwargs = page_loader_kwargs
+        self.prefetch = prefetch
+        # Keys de session_state propias de la pagina, se eliminan al desalojar su estado
+        self.state_keys: tuple[str, ...] = tuple(state_keys or ())
         self.parent_app = None
         self.st_page = st_page
         self.title: str = st_page.title
 
+    def get_prefetch_hook(self, import_lazy_page: bool = True) -> Callable[[], None] | None:
+        """
+        Hook that warms this page before it is visited: imports the module of a lazy page
+        and runs the declared prefetch function. None if there is nothing to warm.
+
+        The hook runs in a worker thread, outside any script run. The import is best effort:
+        it can fail while other sessions start a script run, as Streamlit adds and removes the
+        script folder from sys.path, and then the session that visits the page imports it.
+        With `import_lazy_page=False` the module is always left for that session.
+        """
+        page_func = getattr(self.st_page, "_page", None)
+        lazy_page = None
+        if import_lazy_page and isinstance(page_func, LazyPage) and not page_func.is_resolved:
+            lazy_page = page_func
+        if lazy_page is None and self.prefetch is None:
+            return None
+
+        def warm():
+            if lazy_page is not None:
+                try:
+                    lazy_page.resolve()
+                except ImportError:
+                    # El prefetch declarado se ejecuta igualmente
+                    logger.debug("Background import of %r failed", lazy_page, exc_info=True)
+            if self.prefetch is not None:
+                self.prefetch()
+
+        return warm
+
     def has_loading(self):
         if self.with_loader is None:
             return True
@@ -0,0 +1,55 @@
+import importlib
+import sys
+from typing import Callable
+
+
+def is_import_string(value) -> bool:
+    """
+    True if value has the form "package.module:function".
+    Paths to scripts (.py or with separators) are left to st.Page.
+    """
+    if not isinstance(value, str) or value.count(":") != 1:
+        return False
+    module_name, attr = value.split(":")
+    return bool(module_name and attr) and "/" not in value and "\\" not in value and not module_name.endswith(".py")
+
+
+class LazyPage:
+    """
+    Page callable that imports its module the first time it runs.
+
+    The menu only needs metadata (title, icon, url), which st.Page infers from __name__
+    without importing anything; the import happens the first time the page is visited.
+    The function is looked up in sys.modules on every call, so when Streamlit drops an
+    edited module the next run imports the new code instead of a stale callable.
+
+    The module may be imported by the Multilit prefetcher from a worker thread, where there
+    is no session: module-level code runs once, without a script run context, so Streamlit
+    calls belong inside the page function. Modules that need a session at import time must
+    disable `prefetch_lazy_imports`.
+    """
+
+    def __init__(self, import_string: str):
+        if not is_import_string(import_string):
+            raise ValueError(f"Invalid page import string {import_string!r}, expected 'package.module:function'")
+        self.import_string = import_string
+        self.module_name, self.attr = import_string.split(":")
+        self.__name__ = self.attr
+
+    @property
+    def is_resolved(self) -> bool:
+        return self.module_name in sys.modules
+
+    def resolve(self) -> Callable[[], None]:
+        # import_module only pays for the import while the module is not in sys.modules
+        module = importlib.import_module(self.module_name)
+        func = getattr(module, self.attr, None)
+        if not callable(func):
+            raise ImportError(f"{self.import_string!r} does not point to a callable page")
+        return func
+
+    def __call__(self):
+        return self.resolve()()
+
+    def __repr__(self):
+        return f"LazyPage({self.import_string!r})"
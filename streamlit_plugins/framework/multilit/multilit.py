@@ -1,6 +1,8 @@
+import inspect
 import logging
+import sys
 import traceback
-from typing import Any, Callable, Dict, Literal, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Literal, Optional, Tuple
 
 import streamlit
 import streamlit as st
@@ -27,8 +29,12 @@ from streamlit_plugins.components.navbar import (
     set_default_page, set_force_next_page, set_navigation_transition,
     st_navigation, st_switch_page, has_changed_page,
 )
+from .app_definition import AppDefinition, get_app_definition, script_version, store_app_definition
 from .app_wrapper import STPageWrapper
+from .lazy_page import LazyPage, is_import_string
 from .loading_engine import LoadingEngine
+from .page_state import get_page_state_store
+from .prefetch import get_prefetcher, get_transition_model
 
 logger = logging.getLogger(__name__)
 
@@ -176,6 +182,13 @@ class Multilit:
         loader_lib: LoadersLib | Callable[..., Tuple[str, str ,str], ] | None = None,
         only_loading_between_pages: bool = True,
         loader: LoaderType = None, default_loader_params: Dict[str, Any] = None,
+        prefetch_next_pages: int = 2,
+        prefetch_min_probability: float = 0.2,
+        prefetch_workers: int = 2,
+        prefetch_lazy_imports: bool = True,
+        page_state_max_pages: int | None = None,
+        page_state_max_bytes: int | None = None,
+        page_state_sizer: Callable[[Any], int] | None = None,
         **kwargs
     ):
         """
@@ -214,7 +227,14 @@ class Multilit:
         banner_spacing : list, optional
             Spacing of the banner images (similar to Streamlit column specification).
         clear_cross_page_sessions : bool, optional (default True)
-            If True, clears session state when changing pages.
+            If True and `page_state_max_pages` is not given, keeps only the page-scoped state of
+            the page being shown, as `page_state_max_pages=1` does. Only the keys declared in
+            `state_keys` and the `page_state()` namespaces are evicted; navigation, login and
+            undeclared keys are always kept.
+
+            .. versionchanged::
+                It used to mean clearing the whole session state on page change. Pages that relied
+                on that must declare their keys in `state_keys` or use `page_state()`.
         session_params : dict, optional
             Dictionary of additional parameters for the global session state.
         verbose : bool, optional (default False)
@@ -235,6 +255,26 @@ class Multilit:
             If True, shows the loader when navigating between pages. If False, show loader on every page run.
         loader : LoaderType, optional
             Custom loader for the application.
+        prefetch_next_pages : int, optional (default 2)
+            Number of likely next pages to warm in the background when a page is shown. The
+            likelihood comes from the page transitions of all the sessions. 0 disables it.
+        prefetch_min_probability : float, optional (default 0.2)
+            Minimum transition probability for a page to be warmed.
+        prefetch_workers : int, optional (default 2)
+            Size of the process-wide thread pool that runs the prefetch hooks.
+        prefetch_lazy_imports : bool, optional (default True)
+            If True, warming a page registered from an import string also imports its module.
+            The import runs in a worker thread without a session, so module-level Streamlit
+            calls of the page would run there and never again. Set it to False when page
+            modules call Streamlit at import time; the `prefetch` hooks still run.
+        page_state_max_pages : int, optional
+            Keep the page-scoped state (declared `state_keys` and `page_state()`) of only this
+            many recently shown pages, the rest is evicted. None keeps every page.
+        page_state_max_bytes : int, optional
+            Per-session budget for the page-scoped state of the pages not being shown. The least
+            recently shown pages are evicted until it fits. None disables the budget.
+        page_state_sizer : Callable[[Any], int], optional
+            Function that estimates the size in bytes of a state value, `sys.getsizeof` by default.
         **kwargs : dict
             Other additional parameters.
 
@@ -279,6 +319,7 @@ class Multilit:
         self._do_logout = self.logout_callback(lambda: None)
 
         self._complex_nav: dict[str, dict | StreamlitPage] = dict()
+        self._definition: AppDefinition | None = None
         self._navbar_mode: NavbarPositionType = navbar_mode
         self._navbar_active_index = 0
         # self._allow_url_nav = allow_url_nav
@@ -350,6 +391,7 @@ class Multilit:
         self._page_container = page_view.container()
 
         self._user_loader = use_loader
+        self._loader_container = None
         self._only_loading_between_pages = only_loading_between_pages
         if self._user_loader:
             self._default_loader = loader
@@ -367,6 +409,17 @@ class Multilit:
                 )
             self._loading_engine = LoadingEngine(self._default_loader)
 
+        self._prefetch_next_pages = prefetch_next_pages
+        self._prefetch_min_probability = prefetch_min_probability
+        self._prefetch_workers = prefetch_workers
+        self._prefetch_lazy_imports = prefetch_lazy_imports
+
+        if page_state_max_pages is None and clear_cross_page_sessions:
+            page_state_max_pages = 1
+        self._page_state_max_pages = page_state_max_pages
+        self._page_state_max_bytes = page_state_max_bytes
+        self._page_state_sizer = page_state_sizer or sys.getsizeof
+
         self.cross_session_clear = clear_cross_page_sessions
 
         if clear_cross_page_sessions:
@@ -388,6 +441,62 @@ class Multilit:
             if not hasattr(st.session_state, key):
                 st.session_state[key] = item
 
+    def define(self, builder: Callable[["Multilit"], None], key: str | None = None) -> "Multilit":
+        """
+        Registers the pages of the app once per process and script version.
+
+        Streamlit executes the whole script on every rerun, so the pages added with `add_page`
+        are registered again each time. With `define` the registration runs once: `builder`
+        receives this instance and adds pages and sections as usual, and the result is cached
+        like `st.cache_resource`. The next reruns, from any session, restore the compiled
+        definition and reuse the navigation menu built from it. Saving the main script or the
+        module of `builder` compiles it again.
+
+        Parameters
+        ----------
+        builder : Callable[[Multilit], None]
+            Function that registers the pages with `add_page`, `page` and `new_section`.
+        key : str, optional
+            Cache key of the definition, by default the qualified name of `builder`.
+            Use a different key when the same builder registers different pages depending on the
+            instance configuration.
+
+        Returns
+        -------
+        Multilit
+            This same instance, so it can be chained as `Multilit(...).define(build).run()`.
+
+        Notes
+        -----
+        Only the page registry is cached. Callbacks such as `login_callback` or `logout_callback`
+        must be set outside `builder`. Page loaders are stored as their class and
+        `page_loader_kwargs`, each run builds its own loader in its own containers.
+        """
+        ctx = get_script_run_ctx()
+        main_script_path = None
+        if ctx is not None:
+            main_script_path = getattr(ctx, "main_script_path", None) or ctx.pages_manager.main_script_path
+        try:
+            builder_path = inspect.getsourcefile(builder)
+        except TypeError:
+            builder_path = None
+
+        cache_key = (main_script_path, key or f"{builder.__module__}.{builder.__qualname__}")
+        version = script_version(main_script_path, builder_path)
+        definition = get_app_definition(cache_key, version)
+        if definition is None:
+            builder(self)
+            definition = store_app_definition(AppDefinition.capture(self, cache_key, version))
+
+        definition.restore(self)
+        self._definition = definition
+
+        # add_page inicializa la navegacion de la sesion al registrar la home
+        if self._home_page is not None:
+            set_default_page(self._home_id)
+            init_navigation_transition(self._home_id, self._home_id)
+        return self
+
     def change_page(self, page: StreamlitPage, scope: Literal["app", "fragment"] = "app"):
         page_id = self.get_page_id(page)
         if page_id not in self._pages and page_id != self._home_id:
@@ -401,20 +510,25 @@ class Multilit:
 
     def add_page(
         self,
-        page: StreamlitPage, title=None, icon: str | None = None,
+        page: StreamlitPage | str, title=None, icon: str | None = None,
         page_type: Literal["normal", "home", "login", "settings", "account"] = "normal",
         access_level: int | None = None,
         with_loader: Optional[bool] = None,
-        page_loader: BaseLoader | None = None,
+        page_loader: type[BaseLoader] | None = None,
         page_loader_kwargs: dict = None,
+        url_path: str | None = None,
+        prefetch: Callable[[], Any] | None = None,
+        state_keys: Iterable[str] | None = None,
     ):
         """
         Adds a new page to this MultiApp.
 
         Parameters
         ----------
-        page : StreamlitPage
-            The page instance to add.
+        page : StreamlitPage or str
+            The page instance to add, or an import string such as "pkg.pages.reports:render".
+            Import strings are registered lazily: the module is only imported the first time
+            the page is run, the navigation menu is built from the metadata alone.
         title : str, optional
             The title to display in the navigation menu for this page.
         icon : str, optional
@@ -425,12 +539,31 @@ class Multilit:
             The access level required to view this page.
         with_loader : bool, optional
             Whether to use a loading animation when switching to this page.
-        page_loader : BaseLoader, optional
-            Custom loader to use for this page.
+        page_loader : type[BaseLoader], optional
+            Class of the custom loader to use for this page. A new loader is built on every run
+            in which the page is shown. Loader instances are deprecated: they are bound to the
+            containers of the run that created them, only their class is kept.
         page_loader_kwargs : dict, optional
             Additional keyword arguments for the page loader.
+        url_path : str, optional
+            URL path of the page when it is given as an import string (defaults to the function name).
+        prefetch : Callable[[], Any], optional
+            Hook that warms the page before it is visited, e.g. calling the `st.cache_data`
+            functions it uses. It runs in a background thread, without access to the session,
+            when this page is one of the likely next pages of the page being shown.
+        state_keys : Iterable[str], optional
+            Session state keys owned by this page. They are deleted when the page state is
+            evicted (see `page_state_max_pages` and `page_state_max_bytes`).
+
+        Returns
+        -------
+        StreamlitPage
+            The registered page, useful with `change_page` when it was given as an import string.
         """
 
+        if is_import_string(page):
+            page = st.Page(LazyPage(page), title=title, icon=icon, url_path=url_path)
+
         title = title or page.title
         # page_id = f"page_{page_id or len(self._pages) + 1}"
         page_id = page._script_hash
@@ -438,12 +571,17 @@ class Multilit:
         if with_loader is None:
             with_loader = self._user_loader
 
+        if isinstance(page_loader, BaseLoader):
+            logger.warning(
+                "Passing a loader instance as page_loader is deprecated, pass its class and page_loader_kwargs. "
+                "Only the class of %r is kept, each run builds its own loader.", page_loader
+            )
+            page_loader = type(page_loader)
+
         app_wrapper = STPageWrapper(
             page, with_loader=with_loader,
-            loading_engine=LoadingEngine(
-                page_loader or self._default_loader.recreate_loader_with(label=title),
-                loader_kwargs=page_loader_kwargs
-            )
+            page_loader=page_loader, page_loader_kwargs=page_loader_kwargs,
+            prefetch=prefetch, state_keys=state_keys
         )
         app_wrapper.access_level = access_level
         app_wrapper.id = page_id
@@ -486,8 +624,9 @@ class Multilit:
         # Posiblemente esto sobre de aqui
         self._nav_item_count = int(self._login_page is not None) + len(self._pages.keys())
         # app.assign_session(st.session_state, self)
+        return page
 
-    def page(self, title=None, icon=None, page_type: Literal["normal", "home", "login", "settings", "account"] = "normal", with_loader: Optional[bool] = None, page_loader: Optional[BaseLoader] = None):
+    def page(self, title=None, icon=None, page_type: Literal["normal", "home", "login", "settings", "account"] = "normal", with_loader: Optional[bool] = None, page_loader: Optional[type[BaseLoader]] = None, prefetch: Optional[Callable[[], Any]] = None, state_keys: Optional[Iterable[str]] = None):
         """
         This is a decorator to quickly add a function as a child app in a style like a Flask route.
         You can do everything you can normally do when adding a class based MultiApp to the parent, except you can not add a login or unsecure app using this method, as
@@ -502,8 +641,12 @@ class Multilit:
             The type of app, this will determine the behaviour of the app within the MultiApp.
         with_loader: bool, None
             A flag to indicate if to use the loading engine when loading this app.
-        page_loader: BaseLoader | None, None
-            A custom loader to use when loading this app.
+        page_loader: type[BaseLoader] | None, None
+            The class of a custom loader to use when loading this app, see `add_page`.
+        prefetch: Callable | None, None
+            A hook to warm the caches of this app before it is visited, see `add_page`.
+        state_keys: Iterable[str] | None, None
+            The session state keys owned by this app, see `add_page`.
         Returns
         -------
         decorator: callable
@@ -520,7 +663,7 @@ class Multilit:
                 is_default = True
 
             wrapped_app = st.Page(func, title=page_title, icon=app_icon, default=is_default)
-            self.add_page(title=page_title, page=wrapped_app, icon=app_icon, page_type=page_type, with_loader=with_loader, page_loader=page_loader)
+            self.add_page(title=page_title, page=wrapped_app, icon=app_icon, page_type=page_type, with_loader=with_loader, page_loader=page_loader, prefetch=prefetch, state_keys=state_keys)
 
             return func
 
@@ -553,9 +696,20 @@ class Multilit:
             self._logout_id = self.get_page_id(logout_page)
             self._pages[self._logout_id] = STPageWrapper(logout_page)
 
-        natives_page_data = self.build_native_pages_data_from(
-            home_page,
-        )
+        if self._definition is None:
+            natives_page_data = self.build_native_pages_data_from(home_page)
+        elif self._definition.native_page_ids is None:
+            natives_page_data = self.build_native_pages_data_from(home_page)
+            self._definition.native_page_ids = {
+                section: [self.get_page_id(page) for page in pages]
+                for section, pages in natives_page_data.items()
+            }
+        else:
+            # La definicion guarda ids; las paginas son las copias de esta instancia
+            natives_page_data = {
+                section: [self._pages[page_id].st_page for page_id in page_ids]
+                for section, page_ids in self._definition.native_page_ids.items()
+            }
 
         with self._nav_container:
             page = self._run_navbar(natives_page_data, login_page, account_page, settings_page, logout_page)
@@ -607,7 +761,8 @@ class Multilit:
             # url_navigation=self._allow_url_nav,
             input_styles=styles,
             themes_data=self._navbar_theme,
-            theme_changer=self._navigation_theme_changer
+            theme_changer=self._navigation_theme_changer,
+            menu_cache=self._definition.menu_cache if self._definition is not None else None,
         )
         if self.cross_session_clear and st.session_state["multilit_preserve_state"]:
             self._clear_session_values()
@@ -746,11 +901,8 @@ class Multilit:
             # with self._theme_change_container:
             #     self._run_change_theme()
 
-            if page.has_loading() and has_loading:
-                loading_engine = self._loading_engine
-                if page.loading_engine is not None:
-                    loading_engine = page.loading_engine
-                
+            loading_engine = self._get_page_loading_engine(page) if page.has_loading() and has_loading else None
+            if loading_engine is not None:
                 with loading_engine.loading(label=page_label):
                     with self._page_container:
                         page.run()
@@ -762,9 +914,61 @@ class Multilit:
         except Exception as e:
             self._raise_base_exception(e, page_label)
 
+    def _get_page_state_keys(self, page_id: str) -> tuple[str, ...]:
+        page = self._pages.get(page_id)
+        return page.state_keys if page is not None else ()
+
+    def _update_page_state(self, page_id: str):
+        store = get_page_state_store()
+        prev_page_id = store.touch(page_id)
+        if prev_page_id is None:
+            return
+
+        if self._page_state_max_bytes is not None:
+            store.measure(prev_page_id, st.session_state, self._get_page_state_keys(prev_page_id), self._page_state_sizer)
+        store.enforce(
+            st.session_state, self._get_page_state_keys,
+            max_pages=self._page_state_max_pages, max_bytes=self._page_state_max_bytes
+        )
+
+    def _warm_next_pages(self, page_id: str):
+        transitions = get_transition_model()
+        # La transicion se registra solo en el primer run de la pagina nueva
+        history = st.session_state.get("navigation_history", [])
+        if len(history) >= 2 and history[-1] == f"{page_id}::1":
+            prev_page_id = history[-2].split("::")[0]
+            transitions.record(prev_page_id, page_id)
+
+        if self._prefetch_next_pages <= 0:
+            return
+
+        prefetcher = None
+        for next_page_id, _ in transitions.likely_next(page_id, self._prefetch_next_pages, self._prefetch_min_probability):
+            next_page = self._pages.get(next_page_id)
+            hook = next_page.get_prefetch_hook(self._prefetch_lazy_imports) if next_page is not None else None
+            if hook is None:
+                continue
+            prefetcher = prefetcher or get_prefetcher(max_workers=self._prefetch_workers)
+            prefetcher.submit(next_page_id, hook)
+
+    def _get_page_loading_engine(self, page: STPageWrapper) -> LoadingEngine | None:
+        # Solo se construye el loader de la pagina que se ejecuta, el label se pasa al lanzarlo
+        if page.loading_engine is not None:
+            return page.loading_engine
+        if page.page_loader is not None:
+            # La definicion compartida solo guarda la clase, el loader es de este run
+            return LoadingEngine(page.page_loader(
+                loader_container=self._loader_container, **(page.page_loader_kwargs or {})
+            ))
+        if not self._user_loader:
+            return None
+        if page.page_loader_kwargs:
+            return LoadingEngine(self._default_loader, loader_kwargs=page.page_loader_kwargs)
+        return self._loading_engine
+
     def _clear_session_values(self):
-        for key in st.session_state:
-            del st.session_state[key]
+        # Solo el estado de las paginas, la navegacion y el login se conservan
+        get_page_state_store().enforce(st.session_state, self._get_page_state_keys, max_pages=1)
 
     def set_guest(self, guest_name):
         """
@@ -931,6 +1135,9 @@ class Multilit:
             if page_wrapper is None:
                 raise ValueError(f"App id {page_id} not found in the list of apps")
 
+            self._update_page_state(page_id)
+            self._warm_next_pages(page_id)
+
             # Llegado a este punto, se ejecuta la pagina seleccionada
             has_loading = (has_changed_page() and self._only_loading_between_pages) or not self._only_loading_between_pages
             self._run_selected(page_wrapper, has_loading=has_loading)
@@ -0,0 +1,111 @@
+import sys
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, MutableMapping, Optional
+
+import streamlit as st
+
+PAGE_STATE_SESSION_KEY = "multilit_page_states"
+
+Sizer = Callable[[Any], int]
+KeysOf = Callable[[str], Iterable[str]]
+
+
+class PageStateLRU:
+    """
+    Page-scoped state of one session, kept only for the most recently shown pages.
+
+    Each page owns a namespace dict plus the session_state keys it declared. Pages are kept in
+    visit order and, when a limit is exceeded, the state of the least recently shown ones is
+    evicted. The page being shown is never evicted, and keys not owned by a page (navigation,
+    login, widgets of the host app) are never touched.
+    """
+
+    def __init__(self):
+        self._namespaces: OrderedDict[str, dict] = OrderedDict()  # La mas antigua primero
+        self._sizes: dict[str, int] = {}
+        self.evictions = 0
+
+    @property
+    def current_page_id(self) -> Optional[str]:
+        return next(reversed(self._namespaces), None)
+
+    @property
+    def page_ids(self) -> list[str]:
+        return list(self._namespaces)
+
+    @property
+    def retained_bytes(self) -> int:
+        """Estimated size of the state of the pages not being shown"""
+        return sum(self._sizes.values())
+
+    def namespace(self, page_id: str) -> dict:
+        namespace = self._namespaces.get(page_id)
+        if namespace is None:
+            namespace = self._namespaces[page_id] = {}
+        return namespace
+
+    def touch(self, page_id: str) -> Optional[str]:
+        """
+        Marks page_id as the page being shown. Returns the previously shown page when the
+        page changed, None otherwise.
+        """
+        previous_page_id = self.current_page_id
+        if previous_page_id == page_id:
+            return None
+        self.namespace(page_id)
+        self._namespaces.move_to_end(page_id)
+        # Mientras se muestra su estado cambia, se mide al salir de ella
+        self._sizes.pop(page_id, None)
+        return previous_page_id
+
+    def measure(self, page_id: str, state: MutableMapping, keys: Iterable[str], sizer: Sizer = sys.getsizeof) -> int:
+        size = sum(sizer(value) for value in self._namespaces.get(page_id, {}).values())
+        size += sum(sizer(state[key]) for key in keys if key in state)
+        self._sizes[page_id] = size
+        return size
+
+    def evict(self, page_id: str, state: MutableMapping, keys: Iterable[str]) -> None:
+        for key in keys:
+            if key in state:
+                del state[key]
+        self._namespaces.pop(page_id, None)
+        self._sizes.pop(page_id, None)
+        self.evictions += 1
+
+    def enforce(
+        self,
+        state: MutableMapping,
+        keys_of: KeysOf,
+        max_pages: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> list[str]:
+        """Evicts the least recently shown pages until both limits hold. Returns the evicted ids."""
+        evicted = []
+        for page_id in list(self._namespaces)[:-1]:
+            over_pages = max_pages is not None and len(self._namespaces) > max_pages
+            over_bytes = max_bytes is not None and self.retained_bytes > max_bytes
+            if not (over_pages or over_bytes):
+                break
+            self.evict(page_id, state, keys_of(page_id))
+            evicted.append(page_id)
+        return evicted
+
+
+def get_page_state_store() -> PageStateLRU:
+    store = st.session_state.get(PAGE_STATE_SESSION_KEY)
+    if store is None:
+        store = st.session_state[PAGE_STATE_SESSION_KEY] = PageStateLRU()
+    return store
+
+
+def page_state() -> dict:
+    """
+    Namespace of the page being shown, evicted together with the page keys.
+
+    Use it for the data a page does not need to share, e.g. `page_state()["df"] = load()`.
+    """
+    store = get_page_state_store()
+    page_id = store.current_page_id
+    if page_id is None:
+        raise RuntimeError("page_state() can only be used while a Multilit page is running")
+    return store.namespace(page_id)
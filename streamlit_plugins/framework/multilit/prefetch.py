@@ -0,0 +1,130 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TransitionModel:
+    """
+    Page transition frequencies aggregated across all the sessions of the process.
+
+    Each navigation from one page to another adds one to the (previous, next) counter, so
+    the next pages of a page are ranked by how often users went there from it.
+    """
+
+    def __init__(self):
+        self._counts: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, prev_page_id: Optional[str], page_id: str) -> None:
+        if prev_page_id is None or prev_page_id == page_id:
+            return
+        with self._lock:
+            next_counts = self._counts.setdefault(prev_page_id, {})
+            next_counts[page_id] = next_counts.get(page_id, 0) + 1
+
+    def likely_next(self, page_id: str, limit: int = 2, min_probability: float = 0.0) -> list[tuple[str, float]]:
+        """
+        Most likely next pages of page_id as (page_id, probability), most likely first.
+        """
+        with self._lock:
+            next_counts = dict(self._counts.get(page_id, {}))
+        total = sum(next_counts.values())
+        if not total:
+            return []
+
+        ranked = sorted(next_counts.items(), key=lambda item: (-item[1], item[0]))
+        return [
+            (next_page_id, count / total)
+            for next_page_id, count in ranked[:limit]
+            if count / total >= min_probability
+        ]
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {page_id: dict(next_counts) for page_id, next_counts in self._counts.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+class PagePrefetcher:
+    """
+    Runs page prefetch hooks in a bounded background thread pool.
+
+    A page is never warmed twice at the same time nor again before `cooldown_s`, and when all
+    the workers are busy new requests are dropped instead of queued: prefetching is best effort
+    and must not pile up behind slow hooks.
+    """
+
+    def __init__(self, max_workers: int = 2, cooldown_s: float = 60.0):
+        self.max_workers = max_workers
+        self.cooldown_s = cooldown_s
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight: set[str] = set()
+        self._last_warmed: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, page_id: str, hook: Callable[[], Any]) -> bool:
+        """Schedules hook to warm page_id. Returns False if it was skipped."""
+        now = time.monotonic()
+        with self._lock:
+            if page_id in self._in_flight or len(self._in_flight) >= self.max_workers:
+                return False
+            last_warmed = self._last_warmed.get(page_id)
+            if last_warmed is not None and now - last_warmed < self.cooldown_s:
+                return False
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="multilit-prefetch"
+                )
+            self._in_flight.add(page_id)
+
+        self._executor.submit(self._run, page_id, hook)
+        return True
+
+    def _run(self, page_id: str, hook: Callable[[], Any]) -> None:
+        try:
+            hook()
+        except Exception:
+            logger.exception("Prefetch of page %r failed", page_id)
+        finally:
+            # Tambien tras un fallo, para no reintentar en cada rerun
+            with self._lock:
+                self._in_flight.discard(page_id)
+                self._last_warmed[page_id] = time.monotonic()
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._in_flight)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._last_warmed.clear()
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+# Compartidos por todas las sesiones del proceso
+_TRANSITIONS = TransitionModel()
+_PREFETCHER: Optional[PagePrefetcher] = None
+_PREFETCHER_LOCK = threading.Lock()
+
+
+def get_transition_model() -> TransitionModel:
+    return _TRANSITIONS
+
+
+def get_prefetcher(max_workers: int = 2, cooldown_s: float = 60.0) -> PagePrefetcher:
+    """Process-wide prefetcher, created with the settings of the first caller"""
+    global _PREFETCHER
+    with _PREFETCHER_LOCK:
+        if _PREFETCHER is None:
+            _PREFETCHER = PagePrefetcher(max_workers=max_workers, cooldown_s=cooldown_s)
+        return _PREFETCHER
@@ -0,0 +1,569 @@
+"""
+Tests for the pure logic of Multilit (no Streamlit server needed).
+
+Run with:
+    pytest test_multilit.py -v
+"""
+
+import importlib
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from streamlit_plugins.components.loader import BaseLoader
+from streamlit_plugins.framework.multilit import page_state, prefetch
+from streamlit_plugins.framework.multilit.app_definition import (
+    DEFINITION_ATTRS, AppDefinition, clear_app_definitions, get_app_definition, script_version,
+    store_app_definition
+)
+from streamlit_plugins.framework.multilit.app_wrapper import STPageWrapper
+from streamlit_plugins.framework.multilit.lazy_page import LazyPage, is_import_string
+from streamlit_plugins.framework.multilit.page_state import PageStateLRU
+from streamlit_plugins.framework.multilit.prefetch import PagePrefetcher, TransitionModel, get_transition_model
+
+
+# =============================================================================
+# Lazy pages
+# =============================================================================
+
+def test_is_import_string():
+    assert is_import_string("my_app.pages.reports:render")
+    assert is_import_string("reports:render")
+
+    assert not is_import_string("pages/reports.py")
+    assert not is_import_string("reports.py:render")
+    assert not is_import_string("app\\reports:render")
+    assert not is_import_string("my_app.pages.reports")
+    assert not is_import_string("a:b:c")
+    assert not is_import_string(":render")
+    assert not is_import_string("reports:")
+    assert not is_import_string(None)
+
+
+def _write_page_module(tmp_path, name, body):
+    (tmp_path / f"{name}.py").write_text(body)
+    importlib.invalidate_caches()
+
+
+def test_lazy_page_imports_on_first_call_and_follows_module_edits(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    _write_page_module(tmp_path, "multilit_lazy_reports", "def render():\n    return 'v1'\n")
+
+    page = LazyPage("multilit_lazy_reports:render")
+    assert page.__name__ == "render"
+    assert not page.is_resolved
+    assert "multilit_lazy_reports" not in sys.modules
+
+    assert page() == "v1"
+    assert page.is_resolved
+
+    # Streamlit drops edited modules from sys.modules: the next call runs the new code
+    _write_page_module(tmp_path, "multilit_lazy_reports", "def render():\n    return 'version 2'\n")
+    monkeypatch.delitem(sys.modules, "multilit_lazy_reports")
+    assert page() == "version 2"
+
+
+def test_lazy_page_errors(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    _write_page_module(tmp_path, "multilit_lazy_constants", "TITLE = 'not a page'\n")
+
+    with pytest.raises(ValueError):
+        LazyPage("pages/reports.py")
+
+    with pytest.raises(ImportError):
+        LazyPage("multilit_lazy_constants:TITLE").resolve()
+
+    with pytest.raises(ImportError):
+        LazyPage("multilit_lazy_constants:missing").resolve()
+
+
+# =============================================================================
+# App definitions
+# =============================================================================
+
+class _FakePage:
+    """Stand-in for st.Page, which is only half built outside a script run"""
+
+    def __init__(self, title):
+        self.title = title
+        self._default = False
+        self._can_be_called = False
+
+
+def _fake_app():
+    app = SimpleNamespace(**{name: None for name in DEFINITION_ATTRS})
+    home = STPageWrapper(_FakePage("Home"))
+    home.id = "home"
+    reports = STPageWrapper(_FakePage("Reports"))
+    reports.id = "reports"
+    app._pages = {"home": home, "reports": reports}
+    app._complex_nav = {"home": home, "Analytics": {"subpages": [reports]}}
+    app._navbar_pointers = {}
+    app._nav_item_count = 2
+    app._home_page, app._home_label, app._home_id = home, ("Home", ""), "home"
+    return app
+
+
+def test_script_version_follows_mtime(tmp_path):
+    script = tmp_path / "app.py"
+    script.write_text("print('app')\n")
+    version = script_version(str(script), None, str(script))
+    assert version == ((str(script), os.stat(script).st_mtime_ns),)
+
+    mtime_ns = os.stat(script).st_mtime_ns + 1_000_000_000
+    os.utime(script, ns=(mtime_ns, mtime_ns))
+    assert script_version(str(script)) != version
+
+    missing = str(tmp_path / "missing.py")
+    assert script_version(missing) == ((missing, None),)
+
+
+def test_app_definition_store_get_and_clear():
+    clear_app_definitions()
+    try:
+        first = AppDefinition.capture(_fake_app(), "app", ("v1",))
+        assert store_app_definition(first) is first
+        # Otra sesion que compila la misma version recibe la definicion ya guardada
+        assert store_app_definition(AppDefinition.capture(_fake_app(), "app", ("v1",))) is first
+
+        assert get_app_definition("app", ("v1",)) is first
+        assert first.hits == 1
+        assert get_app_definition("app", ("v2",)) is None
+
+        second = AppDefinition.capture(_fake_app(), "app", ("v2",))
+        assert store_app_definition(second) is second
+        assert get_app_definition("app", ("v1",)) is None
+
+        clear_app_definitions()
+        assert get_app_definition("app", ("v2",)) is None
+    finally:
+        clear_app_definitions()
+
+
+def test_app_definition_restore_gives_each_app_its_own_copy():
+    source = _fake_app()
+    definition = AppDefinition.capture(source, "app", ("v1",))
+    first, second = SimpleNamespace(), SimpleNamespace()
+    definition.restore(first)
+    definition.restore(second)
+
+    for app in (first, second):
+        assert app._pages.keys() == {"home", "reports"}
+        assert app._pages["home"] is not source._pages["home"]
+        assert app._pages["home"].st_page is not source._pages["home"].st_page
+        # Paginas, navegacion y home siguen compartiendo los mismos objetos dentro de cada app
+        assert app._complex_nav["home"] is app._pages["home"]
+        assert app._complex_nav["Analytics"]["subpages"][0] is app._pages["reports"]
+        assert app._home_page is app._pages["home"]
+    assert first._pages["reports"] is not second._pages["reports"]
+    assert first._pages["reports"].st_page is not second._pages["reports"].st_page
+
+    # Los cambios de un run no llegan a otras sesiones ni a la definicion
+    first._pages["home"].st_page._can_be_called = True
+    first._pages["logout"] = STPageWrapper(_FakePage("Logout"))
+    first._complex_nav["Analytics"]["subpages"].append(first._pages["logout"])
+    assert not second._pages["home"].st_page._can_be_called
+    assert not source._pages["home"].st_page._can_be_called
+    assert "logout" not in second._pages
+    assert "logout" not in definition.attrs["_pages"]
+    assert len(second._complex_nav["Analytics"]["subpages"]) == 1
+    assert len(source._complex_nav["Analytics"]["subpages"]) == 1
+
+
+# =============================================================================
+# Prefetch
+# =============================================================================
+
+def test_transition_model_likely_next():
+    model = TransitionModel()
+    model.record(None, "home")
+    model.record("home", "home")
+    assert model.likely_next("home") == []
+
+    for next_page in ("reports", "reports", "reports", "settings", "alerts", "alerts"):
+        model.record("home", next_page)
+
+    assert model.likely_next("home") == [("reports", 0.5), ("alerts", pytest.approx(1 / 3))]
+    assert model.likely_next("home", limit=1) == [("reports", 0.5)]
+    assert model.likely_next("home", limit=3, min_probability=0.3) == [
+        ("reports", 0.5), ("alerts", pytest.approx(1 / 3))
+    ]
+    assert model.likely_next("reports") == []
+
+    # Empate de frecuencias: se ordena por id para que el resultado sea estable
+    model.record("reports", "settings")
+    model.record("reports", "alerts")
+    assert [page_id for page_id, _ in model.likely_next("reports")] == ["alerts", "settings"]
+
+    model.clear()
+    assert model.snapshot() == {}
+
+
+def test_prefetch_hook_runs_prefetch_when_the_background_import_fails():
+    ran = []
+    st_page = _FakePage("Reports")
+    st_page._page = LazyPage("multilit_missing_page_module:render")
+    page = STPageWrapper(st_page, prefetch=lambda: ran.append("prefetch"))
+
+    page.get_prefetch_hook()()
+    assert ran == ["prefetch"]
+
+    # Sin prefetch y sin importar en segundo plano no hay nada que calentar
+    assert STPageWrapper(st_page).get_prefetch_hook(import_lazy_page=False) is None
+
+
+def _blocking_hook(release: threading.Event, ran: list, page_id: str):
+    def hook():
+        ran.append(page_id)
+        release.wait(timeout=5)
+    return hook
+
+
+def test_prefetcher_drops_requests_when_busy():
+    prefetcher = PagePrefetcher(max_workers=2, cooldown_s=60)
+    release, ran = threading.Event(), []
+    try:
+        assert prefetcher.submit("reports", _blocking_hook(release, ran, "reports"))
+        assert not prefetcher.submit("reports", _blocking_hook(release, ran, "reports"))
+        assert prefetcher.submit("settings", _blocking_hook(release, ran, "settings"))
+        # Con todos los workers ocupados la peticion se descarta, no se encola
+        assert not prefetcher.submit("alerts", _blocking_hook(release, ran, "alerts"))
+        assert prefetcher.in_flight == 2
+    finally:
+        release.set()
+        prefetcher.shutdown()
+    assert sorted(ran) == ["reports", "settings"]
+    assert prefetcher.in_flight == 0
+
+
+def test_prefetcher_cooldown(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(prefetch, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    prefetcher = PagePrefetcher(max_workers=1, cooldown_s=60)
+    warmed = threading.Event()
+
+    def failing_hook():
+        warmed.set()
+        raise RuntimeError("warm failed")
+
+    try:
+        assert prefetcher.submit("reports", failing_hook)
+        assert warmed.wait(timeout=5)
+        while prefetcher.in_flight:
+            time.sleep(0.01)
+
+        # Tambien tras un fallo se respeta el cooldown
+        now[0] += 59
+        assert not prefetcher.submit("reports", lambda: None)
+        now[0] += 1
+        assert prefetcher.submit("reports", lambda: None)
+    finally:
+        prefetcher.shutdown()
+
+
+# =============================================================================
+# Page state
+# =============================================================================
+
+def _visit(store, state, page_id, keys_of):
+    """Shows page_id and measures the page left behind, as Multilit does on navigation"""
+    previous_page_id = store.touch(page_id)
+    if previous_page_id is not None:
+        store.measure(previous_page_id, state, keys_of(previous_page_id), sizer=len)
+    return previous_page_id
+
+
+def test_page_state_lru_never_evicts_current_page():
+    store, state = PageStateLRU(), {"nav": "keep"}
+    keys_of = lambda page_id: [f"{page_id}_key"]
+
+    for page_id in ("home", "reports", "settings"):
+        assert store.touch(page_id) != page_id
+        state[f"{page_id}_key"] = "x"
+        store.namespace(page_id)["rows"] = "x"
+    assert store.touch("settings") is None
+
+    assert store.enforce(state, keys_of, max_pages=0) == ["home", "reports"]
+    assert store.page_ids == ["settings"]
+    assert store.current_page_id == "settings"
+    assert state == {"nav": "keep", "settings_key": "x"}
+    assert store.namespace("settings") == {"rows": "x"}
+    assert store.evictions == 2
+
+
+def test_page_state_lru_honors_byte_budget():
+    store, state = PageStateLRU(), {}
+    keys_of = lambda page_id: [f"{page_id}_key"]
+
+    for page_id, size in (("home", 10), ("reports", 20), ("settings", 30), ("alerts", 1)):
+        _visit(store, state, page_id, keys_of)
+        state[f"{page_id}_key"] = "x" * size
+        store.namespace(page_id)["rows"] = "y" * size
+    assert store.current_page_id == "alerts"
+    # El tamano de la pagina que se muestra no se mide hasta salir de ella
+    assert store.retained_bytes == 2 * (10 + 20 + 30)
+
+    assert store.enforce(state, keys_of, max_bytes=120) == []
+    assert store.enforce(state, keys_of, max_bytes=60) == ["home", "reports"]
+    assert store.retained_bytes == 60
+    assert store.page_ids == ["settings", "alerts"]
+    assert set(state) == {"settings_key", "alerts_key"}
+
+    assert store.enforce(state, keys_of, max_bytes=0) == ["settings"]
+    assert store.page_ids == ["alerts"]
+    assert state == {"alerts_key": "x"}
+
+
+# =============================================================================
+# Multilit apps
+# =============================================================================
+
+def _multilit_app(build, options):
+    from streamlit_plugins.framework.multilit.multilit import Multilit
+
+    Multilit(title="Multilit tests", **options).define(build).run()
+
+
+def _start_app(build, **options) -> AppTest:
+    options.setdefault("use_loader", False)
+    return AppTest.from_function(_multilit_app, args=(build, options)).run()
+
+
+def _new_session(at: AppTest) -> AppTest:
+    """Another session of the same script, like a second browser tab"""
+    return AppTest(at._script_path, default_timeout=at.default_timeout, args=at.args).run()
+
+
+def _page_ids(at: AppTest) -> dict[str, str]:
+    return {page.title: page_id for page_id, page in at.session_state["navigation_page_map"].items()}
+
+
+def _navigate(at: AppTest, title: str) -> AppTest:
+    """Selects a page as the navbar does: the component returns the forced page id"""
+    at.session_state["navigation_force_page_id"] = _page_ids(at)[title]
+    return at.run()
+
+
+def _shown(at: AppTest) -> list[str]:
+    return [element.value for element in at.markdown if not element.value.startswith("<style>")]
+
+
+def _home():
+    st.write("Home page")
+
+
+def _reports():
+    st.write("Reports page")
+
+
+class _RecordingLoader(BaseLoader):
+    instances = []
+
+    def __init__(self, loader_container=None, label=""):
+        super().__init__(loader_container=loader_container)
+        self.label = label
+        _RecordingLoader.instances.append(self)
+
+    def run_loader(self, **kwargs):
+        pass
+
+    def stop_loader(self):
+        pass
+
+
+@pytest.fixture
+def app_definitions():
+    clear_app_definitions()
+    yield
+    clear_app_definitions()
+
+
+def test_define_builds_once_and_keeps_sessions_apart(app_definitions):
+    builds = []
+    _RecordingLoader.instances = []
+
+    def build(multi):
+        builds.append(multi)
+        multi.add_page(st.Page(_home, title="Home"), page_type="home")
+        multi.add_page(
+            st.Page(_reports, title="Reports"),
+            page_loader=_RecordingLoader, page_loader_kwargs={"label": "Loading reports"}
+        )
+
+    first = _start_app(build, use_loader=True)
+    second = _new_session(first)
+    assert not first.exception and not second.exception
+    assert len(builds) == 1
+    assert _shown(first) == _shown(second) == ["Home page"]
+
+    # Cambiar de pagina en una sesion no mueve la otra
+    _navigate(first, "Reports")
+    second.run()
+    assert _shown(first) == ["Reports page"]
+    assert _shown(second) == ["Home page"]
+
+    reports_id = _page_ids(first)["Reports"]
+    assert first.session_state["navigation_page_map"][reports_id] is not second.session_state["navigation_page_map"][reports_id]
+
+    # Cada run que muestra la pagina construye su propio loader
+    _navigate(second, "Reports")
+    assert _shown(second) == ["Reports page"]
+    assert len(builds) == 1
+    assert len(_RecordingLoader.instances) == 2
+    first_loader, second_loader = _RecordingLoader.instances
+    assert first_loader is not second_loader
+    assert first_loader.label == second_loader.label == "Loading reports"
+
+
+def _navigation_app(menu_cache, titles):
+    import streamlit as st
+    from streamlit_plugins.components.navbar import st_navigation
+
+    def page():
+        pass
+
+    pages = [st.Page(page, title=title, url_path=title.lower(), default=i == 0) for i, title in enumerate(titles)]
+    st_navigation(pages, menu_cache=menu_cache)
+
+
+def test_menu_cache_is_keyed_on_the_pages_shown():
+    menu_cache = {}
+    full = AppTest.from_function(_navigation_app, args=(menu_cache, ["Home", "Reports", "Admin"])).run()
+    # Otra sesion con un menu filtrado (p. ej. sin permisos de administracion)
+    filtered = AppTest.from_function(_navigation_app, args=(menu_cache, ["Home", "Reports"])).run()
+    assert not full.exception and not filtered.exception
+
+    assert [item["label"] for item in full.session_state["navigation_menu_pages"]] == ["Reports", "Admin"]
+    assert [item["label"] for item in filtered.session_state["navigation_menu_pages"]] == ["Reports"]
+    assert len(menu_cache) == 2
+
+    # El mismo conjunto de paginas reutiliza su menu
+    full.run()
+    assert len(menu_cache) == 2
+
+
+def test_import_string_page_is_imported_when_selected(app_definitions, tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    _write_page_module(
+        tmp_path, "multilit_lazy_sales",
+        "import streamlit as st\n\ndef render():\n    st.write('Sales page')\n"
+    )
+
+    def build(multi):
+        multi.add_page(st.Page(_home, title="Home"), page_type="home")
+        multi.add_page("multilit_lazy_sales:render", title="Sales", url_path="sales")
+
+    at = _start_app(build, prefetch_next_pages=0)
+    assert not at.exception
+    # El menu se construye sin importar la pagina
+    assert "Sales" in _page_ids(at)
+    assert "multilit_lazy_sales" not in sys.modules
+
+    _navigate(at, "Home")
+    assert "multilit_lazy_sales" not in sys.modules
+
+    _navigate(at, "Sales")
+    assert not at.exception
+    assert _shown(at) == ["Sales page"]
+    assert "multilit_lazy_sales" in sys.modules
+    monkeypatch.delitem(sys.modules, "multilit_lazy_sales")
+
+
+def test_prefetch_warms_the_next_page_while_the_current_one_is_shown(app_definitions, tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    _write_page_module(
+        tmp_path, "multilit_prefetch_forecast",
+        "import streamlit as st\n\ndef render():\n    st.write('Forecast page')\n"
+    )
+    warmed = []
+
+    def build(multi):
+        multi.add_page(st.Page(_home, title="Start", url_path="prefetch_start"), page_type="home")
+        multi.add_page(
+            "multilit_prefetch_forecast:render", title="Forecast", url_path="prefetch_forecast",
+            prefetch=lambda: warmed.append(threading.current_thread().name)
+        )
+
+    at = _start_app(build, use_st_navigation=True)
+    start_id, forecast_id = _page_ids(at)["Start"], _page_ids(at)["Forecast"]
+
+    # Primera visita: todavia no hay transiciones desde Start
+    _navigate(at, "Forecast")
+    assert _shown(at) == ["Forecast page"]
+    monkeypatch.delitem(sys.modules, "multilit_prefetch_forecast")
+    assert warmed == []
+
+    # De vuelta en Start, Forecast es la siguiente probable y se calienta en segundo plano
+    _navigate(at, "Start")
+    assert _shown(at) == ["Home page"]
+    deadline = time.monotonic() + 5
+    while not warmed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert warmed and warmed[0].startswith("multilit-prefetch")
+
+    for _ in range(2):
+        _navigate(at, "Forecast")
+        _navigate(at, "Start")
+    assert not at.exception
+    # El cooldown del prefetcher evita recalentar la pagina en cada visita
+    assert len(warmed) == 1
+    assert get_transition_model().likely_next(start_id) == [(forecast_id, 1.0)]
+    assert at.session_state["navigation_history"] == [
+        f"{page_id}::1" for page_id in [start_id, forecast_id] * 3 + [start_id]
+    ]
+    monkeypatch.delitem(sys.modules, "multilit_prefetch_forecast", raising=False)
+
+
+def _state_page(name: str):
+    def render():
+        st.session_state[f"{name}_filters"] = name
+        page_state()["rows"] = [name]
+        st.write(f"{name} page")
+    return st.Page(render, title=name.title(), url_path=f"state_{name}")
+
+
+def _state_app_build(multi):
+    multi.add_page(_state_page("orders"), page_type="home", state_keys=["orders_filters"])
+    multi.add_page(_state_page("invoices"), state_keys=["invoices_filters"])
+    multi.add_page(_state_page("customers"), state_keys=["customers_filters"])
+
+
+def _page_keys(at: AppTest) -> set[str]:
+    return {key for key in ("orders_filters", "invoices_filters", "customers_filters") if key in at.session_state}
+
+
+def test_page_state_keeps_the_most_recently_shown_pages(app_definitions):
+    at = _start_app(_state_app_build, page_state_max_pages=2)
+    at.session_state["theme"] = "dark"
+    _navigate(at, "Invoices")
+    assert _page_keys(at) == {"orders_filters", "invoices_filters"}
+
+    _navigate(at, "Customers")
+    assert not at.exception
+    assert _shown(at) == ["customers page"]
+    # Orders es la pagina mostrada hace mas tiempo: solo se borran sus keys declaradas
+    assert _page_keys(at) == {"invoices_filters", "customers_filters"}
+    assert at.session_state["theme"] == "dark"
+    assert at.session_state["navigation_page_id"] == _page_ids(at)["Customers"]
+    store = at.session_state["multilit_page_states"]
+    assert store.page_ids == [_page_ids(at)["Invoices"], _page_ids(at)["Customers"]]
+    assert store.namespace(_page_ids(at)["Customers"]) == {"rows": ["customers"]}
+
+    # Volver a una pagina desalojada la ejecuta desde cero y desaloja la siguiente
+    _navigate(at, "Orders")
+    assert _page_keys(at) == {"customers_filters", "orders_filters"}
+
+
+def test_clear_cross_page_sessions_keeps_only_the_page_shown(app_definitions):
+    at = _start_app(_state_app_build)
+    at.session_state["theme"] = "dark"
+    _navigate(at, "Invoices")
+    _navigate(at, "Customers")
+    assert _page_keys(at) == {"customers_filters"}
+    assert at.session_state["theme"] == "dark"
@@ -34,13 +34,21 @@ from .reactlit import (
     register_dependency,
     register_dependencies,
     # Query & Introspection
+    get_app_graph,
     get_fragment_metadata,
+    get_fragment_runtime,
     get_all_fragments,
     get_dependency_chain,
     has_dependency_cycle,
+    # Observable State
+    set_state,
+    touch_state,
+    mutate_state,
+    get_state_revision,
     # Utilities
     get_fragment_state,
     set_fragment_dirty,
+    set_cascade_batch_mode,
     enqueue_fragment_rerun,
     manually_trigger_rerun_cascade,
     # Debugging
@@ -48,7 +56,35 @@ from .reactlit import (
     reset_reactive_state,
     # Data Models
     FragmentMetadata,
+    FragmentRuntime,
     DependencyGraph,
+    GraphAnalysis,
+    CompiledAppGraph,
+)
+from .metrics import (
+    configure_metrics,
+    get_fragment_metrics,
+    FragmentMetrics,
+)
+from .tracing import (
+    configure_tracing,
+    get_tracer,
+    ReactiveTracer,
+    TraceEvent,
+)
+from .resources import (
+    use_resource,
+    invalidate_resource,
+    configure_resources,
+    Resource,
+)
+from .sources import (
+    reactive_source,
+    polling_source,
+    get_source,
+    stop_all_sources,
+    ReactiveSource,
+    PollingSource,
 )
 
 __all__ = [
@@ -58,21 +94,51 @@ __all__ = [
     "register_dependency",
     "register_dependencies",
     # Query & Introspection
+    "get_app_graph",
     "get_fragment_metadata",
+    "get_fragment_runtime",
     "get_all_fragments",
     "get_dependency_chain",
     "has_dependency_cycle",
+    # Observable State
+    "set_state",
+    "touch_state",
+    "mutate_state",
+    "get_state_revision",
+    # Resources
+    "use_resource",
+    "invalidate_resource",
+    "configure_resources",
+    # Shared Sources
+    "reactive_source",
+    "polling_source",
+    "get_source",
+    "stop_all_sources",
     # Utilities
     "get_fragment_state",
     "set_fragment_dirty",
+    "set_cascade_batch_mode",
     "enqueue_fragment_rerun",
     "manually_trigger_rerun_cascade",
     # Debugging
     "debug_dependency_graph",
     "reset_reactive_state",
+    "configure_tracing",
+    "get_tracer",
+    "configure_metrics",
+    "get_fragment_metrics",
     # Data Models
     "FragmentMetadata",
+    "FragmentRuntime",
     "DependencyGraph",
+    "GraphAnalysis",
+    "CompiledAppGraph",
+    "FragmentMetrics",
+    "ReactiveTracer",
+    "TraceEvent",
+    "Resource",
+    "ReactiveSource",
+    "PollingSource",
 ]
 
 __version__ = "0.1.0"
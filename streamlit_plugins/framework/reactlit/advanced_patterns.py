@@ -7,9 +7,14 @@ con el framework de fragmentos reactivos.
 """
 
 import streamlit as st
-from typing import Any, Callable, Optional, Dict
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, Dict
 from dataclasses import dataclass
 
+from .persistent import PersistentMap
+from .reactlit import _values_differ, set_state
+
 
 # =============================================================================
 # 🏗️ ARQUITECTURA: FLUX-LIKE PATTERN
@@ -22,22 +27,111 @@ class Action:
     payload: Optional[Dict[str, Any]] = None
 
 
+_MISSING = object()
+
+
+class _TrackingState(Mapping):
+    """Vista de solo lectura del estado que registra qué keys top-level se leen"""
+
+    def __init__(self, state: Mapping):
+        self._state = state
+        self.read_keys: set = set()
+        self.read_all = False  # El selector recorrió el estado completo
+
+    def __getitem__(self, key):
+        self.read_keys.add(key)
+        return self._state[key]
+
+    def get(self, key, default=None):
+        self.read_keys.add(key)
+        return self._state.get(key, default)
+
+    def __contains__(self, key):
+        self.read_keys.add(key)
+        return key in self._state
+
+    def __iter__(self):
+        self.read_all = True
+        return iter(self._state)
+
+    def __len__(self):
+        self.read_all = True
+        return len(self._state)
+
+
+class Selector:
+    """
+    Selector memoizado (estilo reselect). La memo vive en cada store:
+    se recalcula solo si alguna de las keys que leyó cambió de identidad.
+    """
+    __slots__ = ('func', 'name')
+
+    def __init__(self, func: Callable[[Mapping], Any], name: Optional[str] = None):
+        self.func = func
+        self.name = name or getattr(func, '__name__', 'selector')
+
+    def __call__(self, state: Mapping) -> Any:
+        """Evalúa el selector sin memo"""
+        return self.func(state)
+
+    def __repr__(self) -> str:
+        return f"Selector({self.name!r})"
+
+
+def create_selector(func: Callable[[Mapping], Any], name: Optional[str] = None) -> Selector:
+    """
+    Crea un selector memoizado.
+
+    Ejemplo:
+        visible_items = create_selector(
+            lambda s: [i for i in s.get('items', []) if i['visible']]
+        )
+        items = store.select(visible_items)
+    """
+    return Selector(func, name)
+
+
+class _SelectorMemo:
+    """Último resultado de un selector y las keys (con su valor) de las que depende"""
+    __slots__ = ('deps', 'whole_state', 'value')
+
+    def __init__(self, deps: Dict[Any, Any], whole_state: Optional[Mapping], value: Any):
+        self.deps = deps
+        self.whole_state = whole_state
+        self.value = value
+
+    def is_valid_for(self, state: Mapping) -> bool:
+        if self.whole_state is not None:
+            return self.whole_state is state
+        return all(state.get(key, _MISSING) is value for key, value in self.deps.items())
+
+
 class ReactiveStore:
     """
     Almacén centralizado similar a Redux/Flux
     para gestionar estado compartido complejo.
 
+    El estado es un PersistentMap (structural sharing): los reducers pueden
+    devolver state.set(key, value) en O(log n), y detectar si una acción
+    cambió algo es una comprobación de identidad. Los reducers que devuelven
+    un dict ({**state, ...}) siguen funcionando.
+
     Uso:
         store = ReactiveStore()
         store.define_action('SET_USER', lambda state, user: {**state, user})
         store.dispatch(Action('SET_USER', {'id': 1, 'name': 'John'}))
         store.subscribe('user_changed', my_callback)
+        store.subscribe_selector(visible_items, state_key='visible_items')
     """
 
     def __init__(self):
-        self.state: Dict[str, Any] = {}
+        self.state: PersistentMap = PersistentMap()
         self.reducers: Dict[str, Callable] = {}
         self.subscribers: Dict[str, list] = {}
+        self._batch_depth = 0
+        self._batched_actions: Dict[str, None] = {}  # Tipos de acción pendientes de notificar
+        self._selector_cache: Dict[Selector, _SelectorMemo] = {}
+        self._selector_subscribers: Dict[Selector, list] = {}
         self._in_session_state()
 
     def _in_session_state(self):
@@ -48,7 +142,7 @@ class ReactiveStore:
     def define_action(
         self,
         action_type: str,
-        reducer: Callable[[Dict, Any], Dict]
+        reducer: Callable[[Mapping, Any], Mapping]
     ) -> None:
         """
         Define cómo una acción transforma el estado.
@@ -59,10 +153,7 @@ class ReactiveStore:
 
         Ejemplo:
             def increment_counter(state, amount):
-                return {
-                    **state,
-                    'counter': state.get('counter', 0) + amount
-                }
+                return state.set('counter', state.get('counter', 0) + amount)
 
             store.define_action('INCREMENT', increment_counter)
         """
@@ -82,12 +173,54 @@ class ReactiveStore:
             return
 
         reducer = self.reducers[action.type]
-        new_state = reducer(self.state, action.payload)
+        new_state = self.state.replace_with(reducer(self.state, action.payload))
 
         # Solo actualiza si cambió
-        if new_state != self.state:
-            self.state = new_state
-            self._notify_subscribers(action.type)
+        if new_state is self.state:
+            return
+        self.state = new_state
+
+        if self._batch_depth:
+            self._batched_actions[action.type] = None
+            return
+        self._notify_subscribers(action.type)
+        self._notify_selector_subscribers()
+
+    @contextmanager
+    def batch(self) -> Iterator["ReactiveStore"]:
+        """
+        Agrupa varias acciones en una transacción: los suscriptores se notifican
+        una sola vez al salir (cada callback una vez aunque escuche varias
+        acciones). Si el bloque lanza una excepción, el estado vuelve al de
+        antes del batch y no se notifica nada.
+
+        Ejemplo:
+            with store.batch():
+                store.dispatch(Action('SET_FILTER', {...}))
+                store.dispatch(Action('RESET_PAGE'))
+        """
+        start_state = self.state
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            self.state = start_state
+            if self._batch_depth == 0:
+                self._batched_actions.clear()
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth or not self._batched_actions:
+            return
+
+        action_types = list(self._batched_actions)
+        self._batched_actions.clear()
+        callbacks: Dict[Callable, None] = {}
+        for action_type in action_types:
+            for callback in self.subscribers.get(action_type, ()):
+                callbacks[callback] = None
+        self._run_callbacks(callbacks)
+        self._notify_selector_subscribers()
 
     def subscribe(self, event_type: str, callback: Callable) -> None:
         """
@@ -107,11 +240,80 @@ class ReactiveStore:
     def _notify_subscribers(self, event_type: str) -> None:
         """Notifica a todos los suscriptores de un evento"""
         if event_type in self.subscribers:
-            for callback in self.subscribers[event_type]:
+            self._run_callbacks(self.subscribers[event_type])
+
+    @staticmethod
+    def _run_callbacks(callbacks) -> None:
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                st.error(f"Error en subscriber: {e}")
+
+    def subscribe_selector(
+        self,
+        selector: Selector,
+        callback: Optional[Callable[[Any], None]] = None,
+        state_key: Optional[str] = None,
+    ) -> None:
+        """
+        Se suscribe al valor derivado de un selector: solo notifica cuando
+        ese valor cambia, no en cada acción.
+
+        Args:
+            selector: Selector creado con create_selector
+            callback: Función que recibe el nuevo valor derivado
+            state_key: Key de session_state donde publicar el valor (con
+                set_state), para que los fragmentos con esa dependencia se
+                rerunneen solo cuando cambia
+
+        Ejemplo:
+            store.subscribe_selector(visible_items, state_key='visible_items')
+
+            @reactive_fragment(dependencies=['visible_items'])
+            def items_table():
+                st.dataframe(st.session_state.visible_items)
+        """
+        listeners = self._selector_subscribers.setdefault(selector, [])
+        if (callback, state_key) not in listeners:
+            listeners.append((callback, state_key))
+
+        value, _ = self._select_memoized(selector)
+        if state_key is not None and state_key not in st.session_state:
+            set_state(state_key, value)
+
+    def _select_memoized(self, selector: Selector) -> tuple[Any, bool]:
+        """Retorna (valor, recalculado)"""
+        memo = self._selector_cache.get(selector)
+        if memo is not None and memo.is_valid_for(self.state):
+            return memo.value, False
+
+        tracking = _TrackingState(self.state)
+        value = selector.func(tracking)
+        self._selector_cache[selector] = _SelectorMemo(
+            deps={key: self.state.get(key, _MISSING) for key in tracking.read_keys},
+            whole_state=self.state if tracking.read_all else None,
+            value=value,
+        )
+        return value, True
+
+    def _notify_selector_subscribers(self) -> None:
+        """Notifica a los suscriptores de selectores cuyo valor derivado cambió"""
+        for selector, listeners in self._selector_subscribers.items():
+            memo = self._selector_cache.get(selector)
+            previous = memo.value if memo is not None else _MISSING
+            value, recomputed = self._select_memoized(selector)
+            if not recomputed or not _values_differ(previous, value):
+                continue
+
+            for callback, state_key in listeners:
                 try:
-                    callback()
+                    if state_key is not None:
+                        set_state(state_key, value)
+                    if callback is not None:
+                        callback(value)
                 except Exception as e:
-                    st.error(f"Error en subscriber: {e}")
+                    st.error(f"Error en subscriber de {selector.name}: {e}")
 
     def get(self, key: str, default: Any = None) -> Any:
         """Accede a un valor del estado"""
@@ -120,11 +322,14 @@ class ReactiveStore:
     def select(self, selector: Callable) -> Any:
         """
         Selecciona una parte del estado con una función.
+        Los Selector (create_selector) se memoizan por store.
 
         Ejemplo:
             user = store.select(lambda s: s.get('user'))
             items = store.select(lambda s: s.get('items', []))
         """
+        if isinstance(selector, Selector):
+            return self._select_memoized(selector)[0]
         return selector(self.state)
 
 
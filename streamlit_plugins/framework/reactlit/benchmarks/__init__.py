@@ -0,0 +1,8 @@
+"""
+Benchmarks del framework Reactlit.
+
+Ejecutar con:
+    python -m streamlit_plugins.framework.reactlit.benchmarks.wrapper_overhead
+    python -m streamlit_plugins.framework.reactlit.benchmarks.cascades --json
+    python -m streamlit_plugins.framework.reactlit.benchmarks.registration
+"""
@@ -0,0 +1,297 @@
+"""
+Benchmark headless de cascadas reactivas con streamlit.testing AppTest
+=====================================================================
+
+Genera apps sintéticas con N fragmentos reactivos en distintas formas de
+grafo y mide el coste real de una cascada en el runtime de Streamlit:
+
+- chain:      f0 → f1 → ... → fN-1
+- fan_out:    f0 → {f1, ..., fN-1}
+- diamond:    f0 → {f1, ..., fN-2} → fN-1
+- random_dag: cada fragmento depende de 1-2 anteriores (semilla fija)
+
+Cada fragmento observa la key de sus padres y escribe la suya con set_state,
+así que la cascada la propaga la detección de cambios del framework. La
+cascada se dispara encolando f0 desde un botón (un rerun completo + los
+reruns fragment-scoped que genere el framework).
+
+Por cascada se reporta:
+- wall_ms:        tiempo de pared de la cascada completa
+- script_runs:    ejecuciones del ScriptRunner (completas + fragment-scoped)
+- fragment_runs:  ejecuciones de fragmentos en reruns fragment-scoped
+- peak_session_state_bytes: tamaño máximo (sys.getsizeof recursivo) de
+  session_state observado durante la cascada
+
+Ejecutar con:
+    python -m streamlit_plugins.framework.reactlit.benchmarks.cascades --json
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Any, Optional
+from unittest import mock
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx, ScriptRunContext
+from streamlit.testing.v1 import AppTest
+
+from streamlit_plugins.framework.reactlit import reactlit
+
+SHAPES = ('chain', 'fan_out', 'diamond', 'random_dag')
+
+
+# =============================================================================
+# 🏗️ APPS SINTÉTICAS
+# =============================================================================
+
+def build_edges(shape: str, size: int, seed: int = 0) -> dict[int, list[int]]:
+    """Retorna {fragmento: [padres]} para la forma indicada"""
+    if size < 2:
+        raise ValueError(f"size must be at least 2, got {size}")
+
+    if shape == 'chain':
+        return {i: [i - 1] if i else [] for i in range(size)}
+    if shape == 'fan_out':
+        return {i: [0] if i else [] for i in range(size)}
+    if shape == 'diamond':
+        if size < 3:
+            return {0: [], 1: [0]}
+        last = size - 1
+        edges = {i: [0] for i in range(1, last)}
+        edges[0] = []
+        edges[last] = list(range(1, last))
+        return dict(sorted(edges.items()))
+    if shape == 'random_dag':
+        rng = random.Random(seed)
+        return {
+            i: sorted(rng.sample(range(i), min(i, rng.randint(1, 2)))) if i else []
+            for i in range(size)
+        }
+    raise ValueError(f"Unknown shape: {shape!r} (expected one of {SHAPES})")
+
+
+def build_script(edges: dict[int, list[int]]) -> str:
+    """Código de la app sintética para AppTest.from_string"""
+    lines = [
+        "import streamlit as st",
+        "from streamlit_plugins.framework.reactlit import reactlit_fragment, set_state, enqueue_fragment_rerun",
+        "from streamlit_plugins.framework.reactlit.benchmarks import cascades as _bench",
+        "",
+    ]
+    for node, parents in edges.items():
+        deps = [f"k{parent}" for parent in parents]
+        if parents:
+            value = " + ".join(f"st.session_state.get('k{parent}', 0)" for parent in parents) + " + 1"
+        else:
+            value = f"st.session_state.get('k{node}', 0) + 1"
+        lines += [
+            f"@reactlit_fragment(dependencies={deps!r})",
+            f"def f{node}():",
+            f"    _bench.probe()",
+            f"    set_state('k{node}', {value})",
+            f"    st.write('f{node}', st.session_state.k{node})",
+            "",
+        ]
+    lines += [f"f{node}()" for node in edges]
+    lines += [
+        "",
+        "if st.button('cascade'):",
+        "    enqueue_fragment_rerun('f0')",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+# =============================================================================
+# 📏 SONDA
+# =============================================================================
+# La app sintética llama a probe() en cada ejecución de fragmento. AppTest
+# ejecuta el script en este mismo proceso, así que la sonda escribe aquí.
+
+_PROBE: dict[str, Any] = {
+    'fragment_runs': 0,
+    'peak_bytes': 0,
+    'overhead_s': 0.0,
+    'measure_memory': True,
+}
+
+
+def _probe_state() -> dict[str, Any]:
+    """
+    _PROBE del módulo importable: con `python -m` este fichero es __main__ y
+    la app sintética importa otra copia del módulo.
+    """
+    return importlib.import_module("streamlit_plugins.framework.reactlit.benchmarks.cascades")._PROBE
+
+
+def _reset_probe(measure_memory: bool) -> dict[str, Any]:
+    state = _probe_state()
+    state.update(fragment_runs=0, peak_bytes=0, overhead_s=0.0, measure_memory=measure_memory)
+    return state
+
+
+def deep_sizeof(value: Any, seen: Optional[set] = None) -> int:
+    """sys.getsizeof recursivo sobre contenedores, __dict__ y __slots__"""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    try:
+        size = sys.getsizeof(value)
+    except TypeError:
+        return 0
+
+    if isinstance(value, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+    if isinstance(value, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in value)
+    else:
+        if hasattr(value, '__dict__'):
+            size += deep_sizeof(vars(value), seen)
+        for slot in getattr(type(value), '__slots__', ()):
+            if hasattr(value, slot):
+                size += deep_sizeof(getattr(value, slot), seen)
+    return size
+
+
+def probe() -> None:
+    """Registra una ejecución de fragmento y el tamaño de session_state"""
+    started = time.perf_counter()
+    ctx = get_script_run_ctx()
+    if ctx is not None and ctx.fragment_ids_this_run:
+        _PROBE['fragment_runs'] += 1
+    if _PROBE['measure_memory']:
+        size = deep_sizeof(st.session_state.to_dict())
+        _PROBE['peak_bytes'] = max(_PROBE['peak_bytes'], size)
+    _PROBE['overhead_s'] += time.perf_counter() - started
+
+
+# =============================================================================
+# ⏱️ EJECUCIÓN
+# =============================================================================
+
+def run_case(
+    shape: str,
+    size: int,
+    cascades: int = 5,
+    seed: int = 0,
+    measure_memory: bool = True,
+    timeout: float = 60.0,
+) -> dict[str, Any]:
+    """Ejecuta `cascades` cascadas sobre una app sintética y retorna sus mediciones"""
+    # Fuera del hilo del script Streamlit avisa de que no hay ScriptRunContext
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+
+    edges = build_edges(shape, size, seed)
+    script_runs = [0]
+    original_reset = ScriptRunContext.reset
+
+    def counting_reset(self, *args, **kwargs):
+        script_runs[0] += 1
+        return original_reset(self, *args, **kwargs)
+
+    results = []
+    # Cada caso parte de un grafo vacío: los fragmentos f0..fN se redeclaran entre casos
+    with mock.patch.object(ScriptRunContext, "reset", counting_reset), \
+            reactlit._isolated_app_graph():
+        app = AppTest.from_string(build_script(edges), default_timeout=timeout)
+        app.run()  # Render inicial (no cuenta como cascada)
+
+        for _ in range(cascades):
+            probe_state = _reset_probe(measure_memory)
+            script_runs[0] = 0
+            app.button[0].click()
+            started = time.perf_counter()
+            app.run()
+            wall_s = time.perf_counter() - started - probe_state['overhead_s']
+            if app.exception:
+                raise RuntimeError(f"Synthetic app failed: {app.exception[0].message}")
+            results.append({
+                'wall_ms': round(wall_s * 1000, 3),
+                'script_runs': script_runs[0],
+                'fragment_runs': probe_state['fragment_runs'],
+                'peak_session_state_bytes': probe_state['peak_bytes'] if measure_memory else None,
+            })
+
+    wall = [cascade['wall_ms'] for cascade in results]
+    return {
+        'shape': shape,
+        'size': size,
+        'edges': sum(len(parents) for parents in edges.values()),
+        'cascades': results,
+        'summary': {
+            'wall_ms_median': round(statistics.median(wall), 3),
+            'wall_ms_min': min(wall),
+            'script_runs_median': statistics.median(c['script_runs'] for c in results),
+            'fragment_runs_median': statistics.median(c['fragment_runs'] for c in results),
+            'peak_session_state_bytes': max(
+                (c['peak_session_state_bytes'] or 0) for c in results
+            ) if measure_memory else None,
+        },
+    }
+
+
+def run(
+    shapes: tuple[str, ...] = SHAPES,
+    sizes: tuple[int, ...] = (5, 20),
+    cascades: int = 5,
+    seed: int = 0,
+    measure_memory: bool = True,
+) -> dict[str, Any]:
+    return {
+        'meta': {
+            'streamlit': st.__version__,
+            'python': platform.python_version(),
+            'timestamp': time.time(),
+            'seed': seed,
+        },
+        'results': [
+            run_case(shape, size, cascades, seed, measure_memory)
+            for shape in shapes
+            for size in sizes
+        ],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=list(SHAPES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[5, 20], help="Fragmentos por app")
+    parser.add_argument("--cascades", type=int, default=5, help="Cascadas medidas por app")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de random_dag")
+    parser.add_argument("--no-memory", action="store_true", help="No medir session_state")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    parser.add_argument("--output", help="Fichero donde guardar el JSON")
+    args = parser.parse_args()
+
+    report = run(tuple(args.shapes), tuple(args.sizes), args.cascades, args.seed, not args.no_memory)
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(report, fp, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    for case in report['results']:
+        summary = case['summary']
+        print(
+            f"{case['shape']:<11} n={case['size']:<4} "
+            f"wall={summary['wall_ms_median']:>9.2f} ms  "
+            f"runs={summary['script_runs_median']:>5}  "
+            f"fragment_runs={summary['fragment_runs_median']:>5}  "
+            f"peak_state={summary['peak_session_state_bytes'] or '-'} B"
+        )
+
+
+if __name__ == "__main__":
+    main()
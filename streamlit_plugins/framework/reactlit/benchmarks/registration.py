@@ -0,0 +1,100 @@
+"""
+Benchmark: coste de registrar el grafo de la app
+================================================
+
+Mide cuánto tarda el primer run de una app (o el primero tras guardar el
+script) en declarar N fragmentos reactivos y una cadena de dependencias
+f0 → f1 → ... → fN-1 con register_dependency:
+
+- declare:       se declaran todos los fragmentos y aristas y se lee el
+                 grafo una vez al final
+- declare_read:  tras cada declaración se lee el grafo y se comprueba si hay
+                 ciclos, como hace cada fragmento al ejecutarse justo después
+                 de declararse (el primer run de un script normal)
+
+El registro debería crecer de forma aproximadamente lineal con N: la
+columna ms/fragment tiene que mantenerse estable entre tamaños. En
+declare_read queda un término cuadrático pequeño: cada publicación copia
+(superficialmente) los diccionarios del grafo.
+
+Se ejecuta en modo bare (sin servidor de Streamlit), con un st.fragment
+identidad y un grafo vacío por medición.
+
+Ejecutar con:
+    python -m streamlit_plugins.framework.reactlit.benchmarks.registration
+"""
+
+import argparse
+import json
+import logging
+import time
+from unittest import mock
+
+import streamlit as st
+
+from streamlit_plugins.framework.reactlit import reactlit
+
+PATTERNS = ('declare', 'declare_read')
+
+
+def _make_func(name: str):
+    def func():
+        return name
+    func.__name__ = name
+    return func
+
+
+def register_app(size: int, read_each: bool = False) -> float:
+    """Registra la app sintética sobre un grafo vacío y retorna los segundos empleados"""
+    funcs = [_make_func(f"reg_f{i}") for i in range(size)]
+    with mock.patch.object(st, "fragment", lambda func: func), \
+            reactlit._isolated_app_graph():
+        started = time.perf_counter()
+        for i, func in enumerate(funcs):
+            reactlit.reactlit_fragment(dependencies=[f"key_{i}"])(func)
+            if read_each:
+                reactlit._detect_complex_cycles(reactlit.get_app_graph().graph)
+        for i in range(1, size):
+            reactlit.register_dependency(f"reg_f{i}", f"reg_f{i - 1}")
+            if read_each:
+                reactlit._detect_complex_cycles(reactlit.get_app_graph().graph)
+        reactlit.get_app_graph().graph.analysis()
+        return time.perf_counter() - started
+
+
+def run(sizes: tuple[int, ...] = (100, 300, 600), repeat: int = 3) -> list[dict]:
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+    results = []
+    for pattern in PATTERNS:
+        for size in sizes:
+            best_s = min(register_app(size, pattern == 'declare_read') for _ in range(repeat))
+            results.append({
+                'pattern': pattern,
+                'size': size,
+                'ms': round(best_s * 1000, 3),
+                'ms_per_fragment': round(best_s * 1000 / size, 4),
+            })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 300, 600], help="Fragmentos por app")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones (se toma la mejor)")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    results = run(tuple(args.sizes), args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for result in results:
+        print(
+            f"{result['pattern']:<14} n={result['size']:<6} "
+            f"{result['ms']:>10.2f} ms {result['ms_per_fragment']:>8.4f} ms/fragment"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Micro-benchmark: overhead por llamada del wrapper de reactlit_fragment
+======================================================================
+
+Compara el coste de llamar a:
+- una función desnuda
+- el wrapper de reactlit_fragment con watch_params=False / True
+- el binding de parámetros con inspect (antes) frente al plan precompilado
+
+Se ejecuta en modo bare (sin servidor de Streamlit). En ese modo st.fragment
+no ejecuta el cuerpo, por lo que el wrapper reactivo se decora con un
+st.fragment identidad: la diferencia con la función desnuda es exactamente
+el overhead que reactlit_fragment añade sobre un st.fragment normal.
+
+Ejecutar con:
+    python -m streamlit_plugins.framework.reactlit.benchmarks.wrapper_overhead
+"""
+
+import argparse
+import inspect
+import json
+import logging
+import timeit
+from unittest import mock
+
+import streamlit as st
+
+from streamlit_plugins.framework.reactlit.reactlit import (
+    _CallPlan,
+    reactlit_fragment,
+    reset_reactive_state,
+)
+
+
+def _panel(user_id, filters=None, limit=10):
+    return user_id
+
+
+def _inspect_bind(args: tuple, kwargs: dict) -> dict:
+    """Binding por llamada tal y como lo hacía el wrapper antes del plan precompilado"""
+    bound = inspect.signature(_panel).bind_partial(*args, **kwargs)
+    bound.apply_defaults()
+    return dict(bound.arguments)
+
+
+def _per_call_us(func, number: int, repeat: int) -> float:
+    """Mejor tiempo por llamada en microsegundos"""
+    timings = timeit.repeat(func, number=number, repeat=repeat)
+    return min(timings) / number * 1e6
+
+
+def run(number: int = 5000, repeat: int = 5) -> dict[str, float]:
+    # En modo bare Streamlit avisa en cada llamada de que no hay ScriptRunContext
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+    reset_reactive_state()
+
+    with mock.patch.object(st, "fragment", lambda func: func):
+        reactive_no_watch = reactlit_fragment(watch_params=False, prevent_cycles=False)(_panel)
+        reactive_watch = reactlit_fragment(watch_params=True)(_panel)
+
+    plan = _CallPlan(_panel)
+    args, kwargs = (42,), {'filters': {'region': 'EU'}}
+
+    results = {
+        'bare_function': _per_call_us(lambda: _panel(*args, **kwargs), number, repeat),
+        'reactlit_wrapper_no_watch': _per_call_us(lambda: reactive_no_watch(*args, **kwargs), number, repeat),
+        'reactlit_wrapper_watch': _per_call_us(lambda: reactive_watch(*args, **kwargs), number, repeat),
+        'bind_inspect': _per_call_us(lambda: _inspect_bind(args, kwargs), number, repeat),
+        'bind_call_plan': _per_call_us(lambda: plan.bind(args, kwargs), number, repeat),
+    }
+    results['wrapper_overhead_no_watch'] = results['reactlit_wrapper_no_watch'] - results['bare_function']
+    results['wrapper_overhead_watch'] = results['reactlit_wrapper_watch'] - results['bare_function']
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=5000, help="Llamadas por medición")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones (se toma la mejor)")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    results = run(args.number, args.repeat)
+    if args.json:
+        print(json.dumps({name: round(value, 3) for name, value in results.items()}, indent=2))
+        return
+
+    for name, value in results.items():
+        print(f"{name:<30} {value:>10.2f} µs/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Fragment State Table
+====================
+
+Estado por fragmento de una sesión en una única tabla
+(_reactive_fragment_states) indexada por el ordinal del fragmento: columnas
+en listas y el flag dirty como bitmap en un int. Resetear la sesión es
+borrar una key.
+
+Los ordinales son de proceso (compartidos por todas las sesiones), así que
+cada sesión solo paga sus columnas. Este módulo es el único dueño de la
+tabla y de los ordinales: reactlit_fragment y reactive_fragment escriben en
+la misma key de session_state, así que tienen que compartir el registro de
+ordinales o un fragmento de uno leería la fila de otro.
+
+La tabla vive en session_state, por lo que solo guarda datos serializables
+(compatible con runner.enforceSerializableSessionState); el lock que protege
+el bitmap dirty frente a las fuentes de otros hilos es de proceso.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+import streamlit as st
+
+FRAGMENT_STATES_KEY = '_reactive_fragment_states'
+
+_FRAGMENT_ORDINALS: dict[str, int] = {}
+_ORDINALS_LOCK = threading.Lock()
+_DIRTY_LOCK = threading.Lock()  # Las fuentes marcan dirty desde otros hilos
+
+
+def _fragment_ordinal(fragment_name: str) -> int:
+    """Ordinal estable del fragmento en el proceso (se asigna al primer uso)"""
+    ordinal = _FRAGMENT_ORDINALS.get(fragment_name)
+    if ordinal is None:
+        with _ORDINALS_LOCK:
+            ordinal = _FRAGMENT_ORDINALS.setdefault(fragment_name, len(_FRAGMENT_ORDINALS))
+    return ordinal
+
+
+class _FragmentStateTable:
+    """Estado de todos los fragmentos de una sesión, por columnas"""
+    __slots__ = ('params', 'last_rendered_params', 'memo', 'dirty')
+
+    def __init__(self):
+        self.params: list[Optional[dict]] = []
+        self.last_rendered_params: list[Optional[dict]] = []
+        self.memo: list[Optional[OrderedDict]] = []
+        self.dirty = 0  # Bit i → fragmento con ordinal i pendiente de rerun
+
+    def ensure(self, ordinal: int) -> None:
+        missing = ordinal + 1 - len(self.params)
+        if missing > 0:
+            padding = [None] * missing
+            self.params.extend(padding)
+            self.last_rendered_params.extend(padding)
+            self.memo.extend(padding)
+
+    def is_dirty(self, ordinal: int) -> bool:
+        return bool(self.dirty >> ordinal & 1)
+
+    def set_dirty(self, ordinal: int, dirty: bool = True) -> None:
+        with _DIRTY_LOCK:
+            if dirty:
+                self.dirty |= 1 << ordinal
+            else:
+                self.dirty &= ~(1 << ordinal)
+
+    def dirty_ordinals(self) -> list[int]:
+        dirty, ordinals, ordinal = self.dirty, [], 0
+        while dirty:
+            if dirty & 1:
+                ordinals.append(ordinal)
+            dirty >>= 1
+            ordinal += 1
+        return ordinals
+
+    def dirty_fragments(self) -> list[str]:
+        """Nombres de los fragmentos marcados como dirty"""
+        return [name for name, ordinal in _FRAGMENT_ORDINALS.items() if self.is_dirty(ordinal)]
+
+    def view(self, ordinal: int) -> "_FragmentStateView":
+        self.ensure(ordinal)
+        return _FragmentStateView(self, ordinal)
+
+
+class _FragmentStateView:
+    """
+    Vista dict-like sobre la fila de un fragmento, para el código que trata
+    el estado como {'params', 'is_dirty', 'last_rendered_params', 'memo'}.
+    """
+    __slots__ = ('_table', '_ordinal')
+
+    _COLUMNS = ('params', 'is_dirty', 'last_rendered_params')
+
+    def __init__(self, table: _FragmentStateTable, ordinal: int):
+        self._table = table
+        self._ordinal = ordinal
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'is_dirty':
+            return self._table.is_dirty(self._ordinal)
+        if key in ('params', 'last_rendered_params'):
+            column = getattr(self._table, key)
+            if column[self._ordinal] is None:
+                column[self._ordinal] = {}
+            return column[self._ordinal]
+        if key == 'memo' and self._table.memo[self._ordinal] is not None:
+            return self._table.memo[self._ordinal]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key == 'is_dirty':
+            self._table.set_dirty(self._ordinal, bool(value))
+        elif key in ('params', 'last_rendered_params', 'memo'):
+            getattr(self._table, key)[self._ordinal] = value
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._COLUMNS or (key == 'memo' and self._table.memo[self._ordinal] is not None)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def copy(self) -> dict:
+        return {key: self[key] for key in self._COLUMNS}
+
+
+def _get_fragment_states() -> _FragmentStateTable:
+    if FRAGMENT_STATES_KEY not in st.session_state:
+        st.session_state[FRAGMENT_STATES_KEY] = _FragmentStateTable()
+    return st.session_state[FRAGMENT_STATES_KEY]
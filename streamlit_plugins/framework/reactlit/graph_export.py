@@ -0,0 +1,330 @@
+"""
+Graph Export
+============
+
+Compilador estático del grafo de una app reactlit.
+
+Importa el módulo de la app en modo bare (sin servidor: st.fragment no
+ejecuta el cuerpo de los fragmentos), recoge todas las declaraciones de
+reactlit_fragment y register_dependency, y genera un informe del DAG con:
+- Nivel topológico de cada fragmento
+- SCCs (ciclos) y profundidad máxima de cascada
+- Camino crítico ponderado por los tiempos registrados de cada fragmento
+- Hot spots de fan-out (fragmentos que disparan más dependientes)
+
+El informe se exporta a JSON o a DOT (Graphviz), pensado para revisar el
+grafo en CI sin levantar la UI.
+
+Uso:
+    python -m streamlit_plugins.framework.reactlit.graph_export app.py --format dot
+    python -m streamlit_plugins.framework.reactlit.graph_export pkg.app --timings metrics.json --fail-on-cycles
+
+    # Desde código, sobre el grafo ya registrado en el proceso
+    from streamlit_plugins.framework.reactlit.graph_export import build_graph_report
+    report = build_graph_report(timings=timings_from_metrics(get_fragment_metrics('process')))
+"""
+
+import argparse
+import json
+import logging
+import os
+import runpy
+import sys
+from typing import Any, Mapping, Optional, Set
+
+from .reactlit import _isolated_app_graph, CompiledAppGraph, get_app_graph
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# 📥 CARGA DE LA APP
+# =============================================================================
+
+def load_app_graph(target: str, strict: bool = False) -> CompiledAppGraph:
+    """
+    Ejecuta la app indicada (ruta a un .py o nombre de módulo) sobre un grafo
+    vacío y retorna el grafo compilado con sus declaraciones.
+
+    Las declaraciones se registran al decorar, así que un error más adelante
+    en el script (p. ej. código que necesita una sesión real) no impide
+    obtener el grafo: se registra un warning, salvo con strict=True.
+
+    La app se ejecuta en este proceso: los módulos que ya estaban en
+    sys.modules no se vuelven a importar y sus fragmentos no aparecen en el
+    grafo. Para exportar una app completa, llamar a esta función desde un
+    intérprete limpio (como hace la línea de comandos). Si faltan fragmentos
+    de módulos ya importados se avisa con un warning.
+    """
+    # En modo bare Streamlit avisa en cada llamada de que no hay ScriptRunContext
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+
+    is_path = target.endswith(".py") or os.path.sep in target
+    script_dir = os.path.dirname(os.path.abspath(target)) if is_path else None
+
+    process_graph = get_app_graph()
+    with _isolated_app_graph():
+        # Igual que `streamlit run`: el directorio del script es importable
+        if script_dir is not None:
+            sys.path.insert(0, script_dir)
+        try:
+            if is_path:
+                runpy.run_path(target, run_name="__main__")
+            else:
+                runpy.run_module(target, run_name="__main__", alter_sys=False)
+        except Exception as e:
+            if strict:
+                raise
+            logger.warning("App %r raised %s: %s (graph collected up to that point)", target, type(e).__name__, e)
+        finally:
+            if script_dir is not None:
+                sys.path.remove(script_dir)
+        app = get_app_graph()
+
+    # Fragmentos que el proceso conoce de módulos importados: runpy no los vuelve a declarar
+    skipped = sorted(
+        name for name, meta in process_graph.registry.items()
+        if name not in app.registry and meta.func.__module__ != '__main__' and meta.func.__module__ in sys.modules
+    )
+    if skipped:
+        logger.warning(
+            "Fragments %s were declared by modules imported before the export and are not re-declared; "
+            "if %r imports them, run the export in a fresh interpreter", skipped, target,
+        )
+    return app
+
+
+def timings_from_metrics(metrics: Mapping[str, Any], stat: str = 'mean_ms') -> dict[str, float]:
+    """
+    Convierte la salida de get_fragment_metrics() ({name: {...}}) en
+    {name: ms}. Acepta también un dict ya plano {name: ms}.
+    """
+    timings = {}
+    for name, value in metrics.items():
+        timings[name] = float(value[stat] if isinstance(value, Mapping) else value)
+    return timings
+
+
+# =============================================================================
+# 🧭 INFORME
+# =============================================================================
+
+def _critical_path(
+    app: CompiledAppGraph,
+    weights: dict[str, float],
+) -> tuple[list[str], float]:
+    """
+    Camino más costoso del grafo condensado (cada SCC pesa la suma de sus
+    miembros). Los miembros de un ciclo aparecen juntos y ordenados.
+    """
+    graph = app.graph
+    analysis = graph.analysis()
+    components = analysis.components
+    if not components:
+        return [], 0.0
+
+    # Tarjan emite las SCCs en orden topológico inverso: los sumideros primero
+    best = [0.0] * len(components)
+    following: list[Optional[int]] = [None] * len(components)
+    for idx, members in enumerate(components):
+        successors = {
+            analysis.component_of[succ]
+            for name in members
+            for succ in graph._successors(name)
+        } - {idx}
+        weight = sum(weights.get(name, 0.0) for name in members)
+        next_idx = max(successors, key=lambda succ: best[succ], default=None)
+        best[idx] = weight + (best[next_idx] if next_idx is not None else 0.0)
+        following[idx] = next_idx
+
+    current: Optional[int] = max(range(len(components)), key=lambda idx: best[idx])
+    total = best[current]
+    path: list[str] = []
+    while current is not None:
+        path.extend(sorted(components[current]))
+        current = following[current]
+    return path, total
+
+
+def build_graph_report(
+    app: Optional[CompiledAppGraph] = None,
+    timings: Optional[Mapping[str, float]] = None,
+    hot_spots: int = 5,
+) -> dict[str, Any]:
+    """
+    Informe serializable del grafo de la app.
+
+    Args:
+        app: Grafo a analizar (por defecto, el publicado en el proceso)
+        timings: {fragmento: ms} para ponderar el camino crítico. Sin
+            timings cada fragmento pesa 1 (el camino crítico es la cadena
+            más larga); con timings, los fragmentos sin medir pesan 0
+        hot_spots: Número de fragmentos con más fan-out a listar
+    """
+    app = app if app is not None else get_app_graph()
+    graph = app.graph
+    analysis = graph.analysis()
+
+    weights = {
+        name: float(timings.get(name, 0.0)) if timings is not None else 1.0
+        for name in app.registry
+    }
+    critical_path, critical_ms = _critical_path(app, weights)
+
+    # Las aristas entre fragmentos son las de dependents; `dependencies` mezcla
+    # esas aristas con las keys de session_state declaradas en el decorador
+    depends_on: dict[str, Set[str]] = {name: set() for name in app.registry}
+    for name, meta in app.registry.items():
+        for dependent in meta.dependents:
+            if dependent in depends_on:
+                depends_on[dependent].add(name)
+
+    fragments = {}
+    for name, meta in app.registry.items():
+        fragments[name] = {
+            'level': analysis.levels.get(name, 0),
+            'scc': analysis.component_of.get(name),
+            'cyclic': name in analysis.cyclic,
+            'depends_on': sorted(depends_on[name]),
+            'state_keys': sorted(app.declarations.get(name, (frozenset(),))[0]),
+            'dependents': sorted(dep for dep in meta.dependents if dep in app.registry),
+            'cascade_size': len(graph.get_dependents_chain(name)),
+            'cost_ms': timings.get(name) if timings is not None else None,
+            'priority': meta.priority,
+            'debounce_ms': meta.debounce_ms,
+            'throttle_ms': meta.throttle_ms,
+            'lazy_when_hidden': meta.lazy_when_hidden,
+        }
+
+    edges = sorted(
+        (source, name)
+        for name, data in fragments.items()
+        for source in data['depends_on']
+    )
+    ranked = sorted(
+        (name for name, data in fragments.items() if data['cascade_size']),
+        key=lambda name: (-fragments[name]['cascade_size'], -len(fragments[name]['dependents']), name),
+    )
+
+    return {
+        'version': app.version,
+        'fragments': fragments,
+        'edges': [list(edge) for edge in edges],
+        'state_keys': {
+            key: sorted(names)
+            for key, names in sorted(app.key_subscribers.items())
+        },
+        'levels': max(analysis.levels.values(), default=-1) + 1,
+        'max_cascade_depth': max(analysis.levels.values(), default=0),
+        'sccs': [sorted(members) for members in analysis.components if len(members) > 1 or members & analysis.cyclic],
+        'critical_path': critical_path,
+        'critical_path_ms': critical_ms if timings is not None else None,
+        'hot_spots': [
+            {
+                'fragment': name,
+                'dependents': len(fragments[name]['dependents']),
+                'cascade_size': fragments[name]['cascade_size'],
+            }
+            for name in ranked[:hot_spots]
+        ],
+    }
+
+
+# =============================================================================
+# 📤 EXPORTADORES
+# =============================================================================
+
+def graph_report_to_json(report: dict[str, Any]) -> str:
+    return json.dumps(report, indent=2, sort_keys=True)
+
+
+def _dot_id(name: str) -> str:
+    return '"' + name.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def graph_report_to_dot(report: dict[str, Any], include_state_keys: bool = False) -> str:
+    """
+    DOT con un rank por nivel topológico. El camino crítico se dibuja en
+    rojo y los fragmentos que forman parte de un ciclo en naranja.
+    """
+    critical = report['critical_path']
+    critical_edges = set(zip(critical, critical[1:]))
+    lines = [
+        "digraph reactlit {",
+        "  rankdir=LR;",
+        '  node [shape=box, style="rounded,filled", fillcolor="#ffffff", fontname="Helvetica"];',
+    ]
+
+    by_level: dict[int, list[str]] = {}
+    for name, data in report['fragments'].items():
+        by_level.setdefault(data['level'], []).append(name)
+        label = f"{name}\\nL{data['level']}"
+        if data['cost_ms'] is not None:
+            label += f" · {data['cost_ms']:.1f} ms"
+        attrs = [f'label="{label}"']
+        if data['cyclic']:
+            attrs.append('fillcolor="#ffd8a8"')
+        if name in critical:
+            attrs.append('color="#e03131", penwidth=2')
+        lines.append(f"  {_dot_id(name)} [{', '.join(attrs)}];")
+
+    for level, names in sorted(by_level.items()):
+        lines.append(f"  {{ rank=same; {' '.join(_dot_id(name) for name in sorted(names))} }}")
+
+    for depends_on, name in report['edges']:
+        attrs = ' [color="#e03131", penwidth=2]' if (depends_on, name) in critical_edges else ''
+        lines.append(f"  {_dot_id(depends_on)} -> {_dot_id(name)}{attrs};")
+
+    if include_state_keys:
+        for key, names in report['state_keys'].items():
+            key_id = _dot_id(f"key:{key}")
+            lines.append(f'  {key_id} [label="{key}", shape=ellipse, style=dashed];')
+            for name in names:
+                lines.append(f"  {key_id} -> {_dot_id(name)} [style=dashed];")
+
+    lines.append("}")
+    return "\n".join(lines)
+
+
+# =============================================================================
+# 🖥️ CLI
+# =============================================================================
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Exporta el grafo de dependencias de una app reactlit")
+    parser.add_argument("target", help="Ruta al script de la app o nombre de módulo importable")
+    parser.add_argument("--format", choices=("json", "dot"), default="json")
+    parser.add_argument("--timings", help="JSON con {fragmento: ms} o la salida de get_fragment_metrics()")
+    parser.add_argument("--stat", default="mean_ms", help="Métrica a usar como coste (mean_ms, p95_ms, max_ms...)")
+    parser.add_argument("--state-keys", action="store_true", help="Incluir las keys de session_state en el DOT")
+    parser.add_argument("--hot-spots", type=int, default=5, help="Fragmentos con más fan-out a listar")
+    parser.add_argument("--output", help="Fichero de salida (por defecto stdout)")
+    parser.add_argument("--strict", action="store_true", help="Fallar si la app lanza una excepción al importarse")
+    parser.add_argument("--fail-on-cycles", action="store_true", help="Código de salida 1 si hay ciclos")
+    args = parser.parse_args(argv)
+
+    timings = None
+    if args.timings:
+        with open(args.timings) as fp:
+            timings = timings_from_metrics(json.load(fp), stat=args.stat)
+
+    report = build_graph_report(load_app_graph(args.target, strict=args.strict), timings, args.hot_spots)
+    if args.format == "dot":
+        output = graph_report_to_dot(report, include_state_keys=args.state_keys)
+    else:
+        output = graph_report_to_json(report)
+
+    if args.output:
+        with open(args.output, "w") as fp:
+            fp.write(output + "\n")
+    else:
+        print(output)
+
+    if args.fail_on_cycles and report['sccs']:
+        print(f"Dependency cycles found: {report['sccs']}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
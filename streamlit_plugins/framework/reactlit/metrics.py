@@ -0,0 +1,222 @@
+"""
+Reactive Metrics
+================
+
+Métricas de rendimiento por fragmento reactivo:
+- Tiempo de ejecución (total, máximo e histograma por buckets)
+- Número de ejecuciones fragment-scoped vs full-script
+- Aciertos de memo
+- Fan-out: cuántos dependientes encola cada ejecución
+
+Las métricas se guardan por sesión en session_state y, opcionalmente,
+agregadas a nivel de proceso (todas las sesiones).
+
+Uso:
+    from streamlit_plugins.framework.reactlit import configure_metrics, get_fragment_metrics
+
+    configure_metrics(process_wide=True)
+    slowest = sorted(
+        get_fragment_metrics().items(),
+        key=lambda item: item[1]['total_ms'],
+        reverse=True,
+    )
+"""
+
+import bisect
+import threading
+from typing import Any, Callable, Optional
+
+import streamlit as st
+
+# Límites superiores (ms) de los buckets del histograma; el último es +inf
+HISTOGRAM_BUCKETS_MS: tuple[float, ...] = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+
+class FragmentMetrics:
+    """Contadores de un fragmento"""
+    __slots__ = (
+        'executions',
+        'fragment_scoped_runs',
+        'full_script_runs',
+        'memo_hits',
+        'total_ms',
+        'max_ms',
+        'histogram',
+        'enqueued_dependents',
+        'max_fan_out',
+    )
+
+    def __init__(self):
+        self.executions = 0
+        self.fragment_scoped_runs = 0
+        self.full_script_runs = 0
+        self.memo_hits = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * len(HISTOGRAM_BUCKETS_MS)
+        self.enqueued_dependents = 0
+        self.max_fan_out = 0
+
+    def observe_run(self, fragment_scoped: bool, duration_ms: Optional[float], memo_hit: bool = False) -> None:
+        if fragment_scoped:
+            self.fragment_scoped_runs += 1
+        else:
+            self.full_script_runs += 1
+
+        if memo_hit:
+            self.memo_hits += 1
+            return
+
+        if duration_ms is not None:
+            self.executions += 1
+            self.total_ms += duration_ms
+            self.max_ms = max(self.max_ms, duration_ms)
+            self.histogram[bisect.bisect_left(HISTOGRAM_BUCKETS_MS, duration_ms)] += 1
+
+    def observe_fan_out(self, enqueued: int) -> None:
+        self.enqueued_dependents += enqueued
+        self.max_fan_out = max(self.max_fan_out, enqueued)
+
+    def percentile(self, q: float) -> float:
+        """Percentil aproximado (límite superior del bucket que lo contiene)"""
+        if not self.executions:
+            return 0.0
+        target = q * self.executions
+        seen = 0
+        for bound, count in zip(HISTOGRAM_BUCKETS_MS, self.histogram):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def merge(self, other: "FragmentMetrics") -> None:
+        self.executions += other.executions
+        self.fragment_scoped_runs += other.fragment_scoped_runs
+        self.full_script_runs += other.full_script_runs
+        self.memo_hits += other.memo_hits
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+        self.enqueued_dependents += other.enqueued_dependents
+        self.max_fan_out = max(self.max_fan_out, other.max_fan_out)
+
+    def as_dict(self) -> dict[str, Any]:
+        runs = self.fragment_scoped_runs + self.full_script_runs
+        return {
+            'runs': runs,
+            'executions': self.executions,
+            'fragment_scoped_runs': self.fragment_scoped_runs,
+            'full_script_runs': self.full_script_runs,
+            'memo_hits': self.memo_hits,
+            'total_ms': self.total_ms,
+            'mean_ms': self.total_ms / self.executions if self.executions else 0.0,
+            'p95_ms': self.percentile(0.95),
+            'max_ms': self.max_ms,
+            'histogram': dict(zip(HISTOGRAM_BUCKETS_MS, self.histogram)),
+            'enqueued_dependents': self.enqueued_dependents,
+            'mean_fan_out': self.enqueued_dependents / runs if runs else 0.0,
+            'max_fan_out': self.max_fan_out,
+        }
+
+
+# =============================================================================
+# ⚙️ REGISTRO
+# =============================================================================
+
+_METRICS_CONFIG = {
+    'process_wide': False,
+}
+_PROCESS_METRICS: dict[str, FragmentMetrics] = {}
+_PROCESS_METRICS_LOCK = threading.Lock()
+
+
+def configure_metrics(process_wide: bool = False) -> None:
+    """Activa/desactiva la agregación de métricas a nivel de proceso"""
+    _METRICS_CONFIG['process_wide'] = process_wide
+
+
+def _session_metrics() -> dict[str, FragmentMetrics]:
+    if '_reactive_metrics' not in st.session_state:
+        st.session_state._reactive_metrics = {}
+    return st.session_state._reactive_metrics
+
+
+def _observe(fragment_name: str, update: Callable[[FragmentMetrics], None]) -> None:
+    """
+    Aplica update al contador de la sesión y, si procede, al del proceso.
+    Solo el agregado del proceso se comparte entre sesiones: el lock se toma
+    únicamente para él y nunca mientras se lee session_state.
+    """
+    session = _session_metrics()
+    if fragment_name not in session:
+        session[fragment_name] = FragmentMetrics()
+    update(session[fragment_name])
+    if _METRICS_CONFIG['process_wide']:
+        with _PROCESS_METRICS_LOCK:
+            update(_PROCESS_METRICS.setdefault(fragment_name, FragmentMetrics()))
+
+
+def record_run(
+    fragment_name: str,
+    fragment_scoped: bool,
+    duration_ms: Optional[float],
+    memo_hit: bool = False,
+) -> None:
+    """Registra una ejecución de fragmento"""
+    _observe(fragment_name, lambda metrics: metrics.observe_run(fragment_scoped, duration_ms, memo_hit))
+
+
+def record_fan_out(fragment_name: str, enqueued: int) -> None:
+    """Registra cuántos dependientes encoló una ejecución"""
+    _observe(fragment_name, lambda metrics: metrics.observe_fan_out(enqueued))
+
+
+def get_fragment_metrics(scope: str = 'session') -> dict[str, dict[str, Any]]:
+    """
+    Retorna {fragment_name: métricas} de la sesión actual o del proceso.
+
+    Args:
+        scope: 'session' o 'process'
+    """
+    if scope == 'session':
+        return {name: metrics.as_dict() for name, metrics in _session_metrics().items()}
+    if scope == 'process':
+        with _PROCESS_METRICS_LOCK:
+            return {name: metrics.as_dict() for name, metrics in _PROCESS_METRICS.items()}
+    raise ValueError(f"Invalid metrics scope: {scope!r} (expected 'session' or 'process')")
+
+
+def reset_process_metrics() -> None:
+    with _PROCESS_METRICS_LOCK:
+        _PROCESS_METRICS.clear()
+
+
+# =============================================================================
+# 📊 PANEL
+# =============================================================================
+
+def render_metrics_panel(scope: str = 'session') -> None:
+    """Tabla de métricas por fragmento, ordenada por tiempo total"""
+    metrics = get_fragment_metrics(scope)
+    if not metrics:
+        st.caption("Sin métricas registradas")
+        return
+
+    rows = [
+        {
+            'fragment': name,
+            'runs': data['runs'],
+            'scoped': data['fragment_scoped_runs'],
+            'full': data['full_script_runs'],
+            'memo hits': data['memo_hits'],
+            'total ms': round(data['total_ms'], 1),
+            'mean ms': round(data['mean_ms'], 1),
+            'p95 ms': round(data['p95_ms'], 1),
+            'max ms': round(data['max_ms'], 1),
+            'fan-out': data['enqueued_dependents'],
+            'max fan-out': data['max_fan_out'],
+        }
+        for name, data in metrics.items()
+    ]
+    rows.sort(key=lambda row: row['total ms'], reverse=True)
+    st.dataframe(rows, width="stretch", hide_index=True)
@@ -0,0 +1,271 @@
+"""
+Persistent Map
+==============
+
+Mapa inmutable con structural sharing (HAMT: hash array mapped trie).
+
+Cada set/delete devuelve un mapa nuevo que comparte con el anterior todos
+los nodos no afectados, de modo que una actualización cuesta O(log32 n) en
+lugar de copiar el dict completo. Si la operación no cambia nada se devuelve
+el mismo objeto: la detección de cambios es una comprobación de identidad.
+
+Uso:
+    state = PersistentMap({'counter': 0})
+    new_state = state.set('counter', 1)
+    assert new_state is not state and state['counter'] == 0
+    assert new_state.set('counter', 1) is new_state
+"""
+
+from collections.abc import Mapping
+from typing import Any, Iterator, Optional
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_MASK = (1 << 64) - 1
+
+_MISSING = object()
+
+
+class _Leaf:
+    __slots__ = ('hash', 'key', 'value')
+
+    def __init__(self, hash_: int, key: Any, value: Any):
+        self.hash = hash_
+        self.key = key
+        self.value = value
+
+
+class _Collision:
+    """Varias keys con el mismo hash completo"""
+    __slots__ = ('hash', 'items')
+
+    def __init__(self, hash_: int, items: tuple):
+        self.hash = hash_
+        self.items = items  # ((key, value), ...)
+
+
+class _Node:
+    """Nodo interno: bitmap de slots ocupados + hijos compactados"""
+    __slots__ = ('bitmap', 'children')
+
+    def __init__(self, bitmap: int, children: tuple):
+        self.bitmap = bitmap
+        self.children = children
+
+
+_EMPTY_NODE = _Node(0, ())
+
+
+def _hash(key: Any) -> int:
+    return hash(key) & _HASH_MASK
+
+
+def _slot(bitmap: int, bit: int) -> int:
+    return bin(bitmap & (bit - 1)).count('1')
+
+
+def _same_key(a: Any, b: Any) -> bool:
+    return a is b or a == b
+
+
+def _merge(a: Any, b: Any, shift: int) -> _Node:
+    """Crea el subárbol que contiene dos hojas con hashes distintos"""
+    index_a = (a.hash >> shift) & _MASK
+    index_b = (b.hash >> shift) & _MASK
+    if index_a == index_b:
+        return _Node(1 << index_a, (_merge(a, b, shift + _BITS),))
+    children = (a, b) if index_a < index_b else (b, a)
+    return _Node((1 << index_a) | (1 << index_b), children)
+
+
+def _get(node: _Node, hash_: int, key: Any) -> Any:
+    shift = 0
+    while True:
+        bit = 1 << ((hash_ >> shift) & _MASK)
+        if not node.bitmap & bit:
+            return _MISSING
+        child = node.children[_slot(node.bitmap, bit)]
+        if isinstance(child, _Node):
+            node = child
+            shift += _BITS
+            continue
+        if child.hash != hash_:
+            return _MISSING
+        if isinstance(child, _Leaf):
+            return child.value if _same_key(child.key, key) else _MISSING
+        for item_key, item_value in child.items:
+            if _same_key(item_key, key):
+                return item_value
+        return _MISSING
+
+
+def _set(node: _Node, hash_: int, key: Any, value: Any, shift: int) -> tuple[_Node, bool]:
+    """Retorna (nodo nuevo, key añadida). Si no cambia nada retorna el mismo nodo."""
+    bit = 1 << ((hash_ >> shift) & _MASK)
+    idx = _slot(node.bitmap, bit)
+
+    if not node.bitmap & bit:
+        children = node.children[:idx] + (_Leaf(hash_, key, value),) + node.children[idx:]
+        return _Node(node.bitmap | bit, children), True
+
+    child = node.children[idx]
+    added = False
+    if isinstance(child, _Node):
+        new_child, added = _set(child, hash_, key, value, shift + _BITS)
+        if new_child is child:
+            return node, False
+    elif child.hash != hash_:
+        new_child = _merge(child, _Leaf(hash_, key, value), shift + _BITS)
+        added = True
+    elif isinstance(child, _Leaf):
+        if _same_key(child.key, key):
+            if child.value is value:
+                return node, False
+            new_child = _Leaf(hash_, key, value)
+        else:
+            new_child = _Collision(hash_, ((child.key, child.value), (key, value)))
+            added = True
+    else:
+        items = list(child.items)
+        for position, (item_key, item_value) in enumerate(items):
+            if _same_key(item_key, key):
+                if item_value is value:
+                    return node, False
+                items[position] = (key, value)
+                break
+        else:
+            items.append((key, value))
+            added = True
+        new_child = _Collision(hash_, tuple(items))
+
+    children = node.children[:idx] + (new_child,) + node.children[idx + 1:]
+    return _Node(node.bitmap, children), added
+
+
+def _delete(node: _Node, hash_: int, key: Any, shift: int) -> Optional[_Node]:
+    """Retorna el nodo sin key, o None si key no estaba"""
+    bit = 1 << ((hash_ >> shift) & _MASK)
+    if not node.bitmap & bit:
+        return None
+    idx = _slot(node.bitmap, bit)
+    child = node.children[idx]
+
+    if isinstance(child, _Node):
+        new_child = _delete(child, hash_, key, shift + _BITS)
+        if new_child is None:
+            return None
+        if not new_child.children:
+            new_child = None
+        elif len(new_child.children) == 1 and not isinstance(new_child.children[0], _Node):
+            # Un subárbol con una sola hoja se colapsa en la hoja
+            new_child = new_child.children[0]
+    elif child.hash != hash_:
+        return None
+    elif isinstance(child, _Leaf):
+        if not _same_key(child.key, key):
+            return None
+        new_child = None
+    else:
+        items = tuple(item for item in child.items if not _same_key(item[0], key))
+        if len(items) == len(child.items):
+            return None
+        new_child = _Leaf(hash_, *items[0]) if len(items) == 1 else _Collision(hash_, items)
+
+    if new_child is None:
+        return _Node(node.bitmap & ~bit, node.children[:idx] + node.children[idx + 1:])
+    return _Node(node.bitmap, node.children[:idx] + (new_child,) + node.children[idx + 1:])
+
+
+def _iter_items(node: _Node) -> Iterator[tuple[Any, Any]]:
+    for child in node.children:
+        if isinstance(child, _Node):
+            yield from _iter_items(child)
+        elif isinstance(child, _Leaf):
+            yield child.key, child.value
+        else:
+            yield from child.items
+
+
+class PersistentMap(Mapping):
+    """Mapping inmutable con structural sharing"""
+    __slots__ = ('_root', '_len')
+
+    def __init__(self, mapping: Optional[Mapping] = None, **kwargs):
+        self._root = _EMPTY_NODE
+        self._len = 0
+        for key, value in dict(mapping or {}, **kwargs).items():
+            self._root, added = _set(self._root, _hash(key), key, value, 0)
+            self._len += added
+
+    @classmethod
+    def _from_root(cls, root: _Node, length: int) -> "PersistentMap":
+        instance = cls.__new__(cls)
+        instance._root = root
+        instance._len = length
+        return instance
+
+    # -- Lectura ---------------------------------------------------------------
+
+    def __getitem__(self, key: Any) -> Any:
+        value = _get(self._root, _hash(key), key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        value = _get(self._root, _hash(key), key)
+        return default if value is _MISSING else value
+
+    def __contains__(self, key: Any) -> bool:
+        return _get(self._root, _hash(key), key) is not _MISSING
+
+    def __iter__(self) -> Iterator[Any]:
+        for key, _ in _iter_items(self._root):
+            yield key
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __eq__(self, other: Any) -> bool:
+        if other is self:
+            return True
+        return Mapping.__eq__(self, other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"PersistentMap({dict(_iter_items(self._root))!r})"
+
+    # -- Escritura (devuelven un mapa nuevo) ----------------------------------
+
+    def set(self, key: Any, value: Any) -> "PersistentMap":
+        root, added = _set(self._root, _hash(key), key, value, 0)
+        if root is self._root:
+            return self
+        return PersistentMap._from_root(root, self._len + added)
+
+    def delete(self, key: Any) -> "PersistentMap":
+        root = _delete(self._root, _hash(key), key, 0)
+        if root is None:
+            return self
+        return PersistentMap._from_root(root, self._len - 1)
+
+    def update(self, mapping: Optional[Mapping] = None, **kwargs) -> "PersistentMap":
+        """Aplica varias asignaciones; retorna self si ningún valor cambia de identidad"""
+        result = self
+        for key, value in dict(mapping or {}, **kwargs).items():
+            result = result.set(key, value)
+        return result
+
+    def replace_with(self, mapping: Mapping) -> "PersistentMap":
+        """
+        Mapa con exactamente el contenido de mapping, reutilizando los nodos
+        cuyos valores conservan identidad (p. ej. el resultado de {**state, ...}).
+        """
+        if isinstance(mapping, PersistentMap):
+            return mapping
+        result = self
+        for key in self:
+            if key not in mapping:
+                result = result.delete(key)
+        return result.update(mapping)
@@ -21,14 +21,37 @@ Uso:
 
 import functools
 import hashlib
+import heapq
 import inspect
-from dataclasses import dataclass, field
-from typing import Any, Callable, Optional, Set
+import itertools
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Iterator, Optional, Set
 
 import streamlit as st
 from streamlit.commands.execution_control import _new_fragment_id_queue
 from streamlit.runtime.scriptrunner import get_script_run_ctx, RerunData
 
+try:
+    from streamlit.delta_generator_singletons import context_dg_stack
+except ImportError:  # Streamlit < 1.39
+    from streamlit.delta_generator import context_dg_stack
+
+try:
+    from streamlit.runtime.scriptrunner_utils.script_run_context import ThreadState
+except ImportError:  # Versiones que guardan el fragmento actual en ctx.current_fragment_id
+    ThreadState = None
+
+from .fragment_states import FRAGMENT_STATES_KEY, _FragmentStateView, _fragment_ordinal, _get_fragment_states
+from .metrics import record_fan_out, record_run, render_metrics_panel
+from .session_bridge import SessionHandle
+from .tracing import get_tracer, is_tracing_enabled, render_trace_timeline
+
 
 # =============================================================================
 # 🏗️ CORE DATA STRUCTURES
@@ -42,36 +65,217 @@ class FragmentMetadata:
     dependencies: Set[str] = field(default_factory=set)  # Qué state keys observa
     dependents: Set[str] = field(default_factory=set)  # Qué otros fragmentos dependen de este
     param_watchers: dict[str, Any] = field(default_factory=dict)  # {param_name: last_value}
-    delta_path: Optional[str] = None
-    fragment_id: Optional[str] = None
-    is_dirty: bool = False
+    debounce_ms: Optional[float] = None  # Espera a que los cambios se estabilicen antes de rerunnear
+    throttle_ms: Optional[float] = None  # Como mucho un rerun por ventana
+    priority: int = 0  # Mayor prioridad → antes dentro de un batch (respetando dependencias)
+    lazy_when_hidden: bool = False  # No rerunnear mientras esté en un expander/tab oculto
+    # Solo datos de declaración: fragment_id y delta_path de cada sesión viven en
+    # FragmentRuntime y el flag dirty en la tabla de estado de la sesión
+
+    def copy(self) -> "FragmentMetadata":
+        """Copia con sets y dicts propios (las aristas se añaden mutando los sets)"""
+        return replace(
+            self,
+            dependencies=set(self.dependencies),
+            dependents=set(self.dependents),
+            param_watchers=dict(self.param_watchers),
+        )
+
+
+class FragmentRuntime:
+    """Datos mutables de un fragmento en una sesión concreta"""
+    __slots__ = ('fragment_id', 'delta_path', 'hidden', 'run_seq')
+
+    def __init__(self, fragment_id: Optional[str] = None, delta_path: Optional[str] = None):
+        self.fragment_id = fragment_id
+        self.delta_path = delta_path
+        self.hidden = False  # Dentro de un expander colapsado o una tab inactiva
+        self.run_seq = 0  # Secuencia de la última ejecución del cuerpo (única en el proceso)
+
+    def __repr__(self) -> str:
+        return (
+            f"FragmentRuntime(fragment_id={self.fragment_id!r}, "
+            f"delta_path={self.delta_path!r}, hidden={self.hidden!r})"
+        )
+
+
+@dataclass
+class GraphAnalysis:
+    """
+    Análisis estructural del grafo, calculado una vez por generación (al
+    primer uso). Se invalida cuando add_fragment/add_dependency modifican las aristas.
+    """
+    generation: int
+    components: list[frozenset[str]]      # SCCs (Tarjan), en orden topológico inverso
+    component_of: dict[str, int]          # {fragment: índice de su SCC}
+    cyclic: frozenset[str]                # Fragmentos que forman parte de un ciclo
+    levels: dict[str, int]                # Nivel topológico sobre el grafo condensado
+    dependents_chain: dict[str, list[str]] = field(default_factory=dict)  # Índice BFS de dependientes
 
 
 @dataclass
 class DependencyGraph:
     """Grafo de dependencias entre fragmentos"""
     fragments: dict[str, FragmentMetadata] = field(default_factory=dict)
+    generation: int = 0
+    _analysis: Optional[GraphAnalysis] = field(default=None, init=False, repr=False, compare=False)
+    # True si se sabe que el grafo no tiene ciclos sin necesidad de analizarlo
+    _known_acyclic: bool = field(default=True, init=False, repr=False, compare=False)
 
     def add_fragment(self, metadata: FragmentMetadata) -> None:
+        previous = self.fragments.get(metadata.name)
         self.fragments[metadata.name] = metadata
+        if (
+            previous is None
+            or previous.dependents != metadata.dependents
+            or previous.dependencies != metadata.dependencies
+        ):
+            self.generation += 1
+            # Las aristas nuevas entran o salen de metadata.name: solo pueden cerrar un ciclo que pase por él
+            self._known_acyclic = self._known_acyclic and not self._reaches(metadata.name, metadata.name)
 
     def add_dependency(self, fragment: str, depends_on: str) -> None:
         """fragment depende de depends_on"""
         if fragment in self.fragments and depends_on in self.fragments:
+            if fragment in self.fragments[depends_on].dependents:
+                return
             self.fragments[fragment].dependencies.add(depends_on)
             self.fragments[depends_on].dependents.add(fragment)
+            self.generation += 1
+            self._known_acyclic = self._known_acyclic and not self._reaches(fragment, depends_on)
+
+    def copy(self) -> "DependencyGraph":
+        """Copia que comparte los metadatos, el análisis cacheado y lo que se sabe de sus ciclos"""
+        graph = DependencyGraph(fragments=dict(self.fragments), generation=self.generation)
+        graph._analysis = self._analysis
+        graph._known_acyclic = self._known_acyclic
+        return graph
+
+    def analysis(self) -> GraphAnalysis:
+        """Retorna el análisis cacheado, recalculándolo si el grafo cambió"""
+        if self._analysis is None or self._analysis.generation != self.generation:
+            self._analysis = self._analyze()
+            self._known_acyclic = not self._analysis.cyclic
+        return self._analysis
+
+    def _successors(self, name: str) -> list[str]:
+        return [dep for dep in self.fragments[name].dependents if dep in self.fragments]
+
+    def _reaches(self, source: str, target: str) -> bool:
+        """True si hay un camino de al menos una arista de source a target"""
+        stack = self._successors(source)
+        visited: Set[str] = set()
+        while stack:
+            name = stack.pop()
+            if name == target:
+                return True
+            if name not in visited:
+                visited.add(name)
+                stack.extend(self._successors(name))
+        return False
+
+    def _analyze(self) -> GraphAnalysis:
+        """Tarjan iterativo + niveles sobre el DAG de componentes"""
+        index_of: dict[str, int] = {}
+        lowlink: dict[str, int] = {}
+        on_stack: Set[str] = set()
+        stack: list[str] = []
+        components: list[frozenset[str]] = []
+        counter = 0
+
+        for root in self.fragments:
+            if root in index_of:
+                continue
+            work = [(root, iter(self._successors(root)))]
+            index_of[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+
+            while work:
+                node, successors = work[-1]
+                advanced = False
+                for succ in successors:
+                    if succ not in index_of:
+                        index_of[succ] = lowlink[succ] = counter
+                        counter += 1
+                        stack.append(succ)
+                        on_stack.add(succ)
+                        work.append((succ, iter(self._successors(succ))))
+                        advanced = True
+                        break
+                    if succ in on_stack:
+                        lowlink[node] = min(lowlink[node], index_of[succ])
+                if advanced:
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                if lowlink[node] == index_of[node]:
+                    members: Set[str] = set()
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        members.add(member)
+                        if member == node:
+                            break
+                    components.append(frozenset(members))
+
+        component_of = {
+            name: idx
+            for idx, members in enumerate(components)
+            for name in members
+        }
+
+        cyclic: Set[str] = set()
+        for members in components:
+            if len(members) > 1:
+                cyclic.update(members)
+            else:
+                (name,) = members
+                if name in self.fragments[name].dependents:
+                    cyclic.add(name)
+
+        # Tarjan emite las SCCs en orden topológico inverso: se recorren al revés
+        component_levels = [0] * len(components)
+        for idx in range(len(components) - 1, -1, -1):
+            for name in components[idx]:
+                for succ in self._successors(name):
+                    succ_idx = component_of[succ]
+                    if succ_idx != idx:
+                        component_levels[succ_idx] = max(
+                            component_levels[succ_idx], component_levels[idx] + 1
+                        )
+
+        levels = {name: component_levels[idx] for name, idx in component_of.items()}
+
+        return GraphAnalysis(
+            generation=self.generation,
+            components=components,
+            component_of=component_of,
+            cyclic=frozenset(cyclic),
+            levels=levels,
+        )
 
     def get_dependents_chain(self, fragment_name: str) -> list[str]:
         """
         Retorna todos los fragmentos que dependen transitivamente de este,
         en orden BFS (los directos primero, luego los transitivos).
+        El resultado se indexa por generación del grafo.
         """
+        index = self.analysis().dependents_chain
+        if fragment_name in index:
+            return list(index[fragment_name])
+
         visited: Set[str] = set()
         ordered: list[str] = []
-        queue: list[str] = [fragment_name]
+        queue: deque[str] = deque([fragment_name])
 
         while queue:
-            current = queue.pop(0)
+            current = queue.popleft()
             if current in visited:
                 continue
             visited.add(current)
@@ -82,34 +286,235 @@ class DependencyGraph:
                     if dep not in visited:
                         queue.append(dep)
 
-        return ordered
+        index[fragment_name] = ordered
+        return list(ordered)
 
-    def has_cycle(self, start: str, current: str = None, visited: Set[str] = None) -> bool:
-        """Detecta si existe un ciclo alcanzable desde start"""
-        if current is None:
-            current = start
-            visited = set()
+    def get_levels(self) -> dict[str, int]:
+        """
+        Nivel topológico de cada fragmento (camino más largo desde una raíz).
+        Los fragmentos de un mismo ciclo comparten nivel.
+        """
+        return self.analysis().levels
 
-        if current in visited:
-            return current == start
+    def order_by_level(self, names: list[str]) -> list[str]:
+        """Ordena names por nivel topológico manteniendo el orden FIFO dentro del nivel"""
+        levels = self.get_levels()
+        position = {name: idx for idx, name in enumerate(names)}
+        return sorted(names, key=lambda name: (levels.get(name, 0), position[name]))
 
-        visited.add(current)
+    def schedule(self, names: list[str], priorities: Optional[dict[str, int]] = None) -> list[str]:
+        """
+        Orden de ejecución de names con prioridades: un fragmento va siempre
+        después de sus ancestros dentro de names y, entre los que están
+        listos, primero el de mayor prioridad, luego menor nivel y luego FIFO.
+        Sin prioridades equivale a order_by_level.
+        """
+        if not priorities or len(set(priorities.get(name, 0) for name in names)) <= 1:
+            return self.order_by_level(names)
+
+        analysis = self.analysis()
+        position = {name: idx for idx, name in enumerate(names)}
+        blockers = dict.fromkeys(names, 0)
+        unlocks: dict[str, list[str]] = {name: [] for name in names}
+        for name in names:
+            component = analysis.component_of.get(name)
+            for dependent in self.get_dependents_chain(name):
+                # Dentro de un ciclo no hay orden: no se bloquean entre sí
+                if dependent in blockers and analysis.component_of.get(dependent) != component:
+                    blockers[dependent] += 1
+                    unlocks[name].append(dependent)
+
+        def sort_key(name: str) -> tuple:
+            return (-priorities.get(name, 0), analysis.levels.get(name, 0), position[name], name)
+
+        ready = [sort_key(name) for name in names if not blockers[name]]
+        heapq.heapify(ready)
+        ordered: list[str] = []
+        while ready:
+            name = heapq.heappop(ready)[-1]
+            ordered.append(name)
+            for dependent in unlocks[name]:
+                blockers[dependent] -= 1
+                if not blockers[dependent]:
+                    heapq.heappush(ready, sort_key(dependent))
+        return ordered
 
-        if current in self.fragments:
-            for dependent in self.fragments[current].dependents:
-                if self.has_cycle(start, dependent, visited.copy()):
-                    return True
+    def get_cycle_fragments(self) -> frozenset[str]:
+        """
+        Fragmentos que forman parte de algún ciclo. Mientras el grafo se sabe
+        acíclico no hace falta analizarlo: cada arista nueva se comprueba al añadirla.
+        """
+        if self._known_acyclic:
+            return frozenset()
+        return self.analysis().cyclic
 
-        return False
+    def has_cycle(self, start: str) -> bool:
+        """Detecta si start forma parte de un ciclo"""
+        return start in self.get_cycle_fragments()
 
 
 # =============================================================================
 # 🎛️ GLOBAL STATE MANAGEMENT
 # =============================================================================
 
-_GLOBAL_REGISTRY: dict[str, FragmentMetadata] = {}
-_GLOBAL_GRAPH: DependencyGraph = DependencyGraph()
-_FRAGMENT_ID_TO_NAME: dict[str, str] = {}
+# El grafo de la app se comparte entre sesiones y se trata como solo lectura:
+# los cambios de declaraciones se acumulan en un borrador (copy-on-write) bajo
+# _APP_LOCK y get_app_graph() lo compila y publica en la primera lectura, así
+# que declarar n fragmentos y aristas seguidos cuesta una sola compilación.
+# Re-decorar con la misma declaración (lo normal en cada rerun del script) no
+# muta nada. Lo que cambia por sesión vive en session_state.
+
+@dataclass
+class CompiledAppGraph:
+    """Grafo de la app compilado: registry, grafo e índice invertido de keys"""
+    version: int = 0
+    registry: dict[str, FragmentMetadata] = field(default_factory=dict)
+    graph: DependencyGraph = field(default_factory=DependencyGraph)
+    declarations: dict[str, tuple] = field(default_factory=dict)  # {name: (deps, dependents, opciones...)}
+    key_subscribers: dict[str, frozenset[str]] = field(default_factory=dict)  # {state_key: fragmentos}
+    dependency_keys: frozenset[str] = frozenset()
+    # Borrador de la siguiente versión, pendiente de compilar (ver get_app_graph)
+    _draft: Optional["CompiledAppGraph"] = field(default=None, init=False, repr=False, compare=False)
+    # Fragmentos cuyos metadatos ya son copia propia de este borrador
+    _owned: Set[str] = field(default_factory=set, init=False, repr=False, compare=False)
+
+    def clone(self) -> "CompiledAppGraph":
+        """
+        Borrador para construir la siguiente versión. Comparte los metadatos con
+        esta versión: own_fragment los copia solo al modificarlos.
+        """
+        return CompiledAppGraph(
+            version=self.version,
+            registry=dict(self.registry),
+            graph=self.graph.copy(),
+            declarations=dict(self.declarations),
+            key_subscribers=dict(self.key_subscribers),
+        )
+
+    def own_fragment(self, name: str) -> FragmentMetadata:
+        """Metadatos de name que este borrador puede mutar sin tocar versiones publicadas"""
+        meta = self.graph.fragments[name]
+        if name not in self._owned:
+            meta = meta.copy()
+            self.graph.fragments[name] = meta
+            if name in self.registry:
+                self.registry[name] = meta
+            self._owned.add(name)
+        return meta
+
+    def declare(self, name: str, declaration: tuple) -> None:
+        """Guarda la declaración de name y actualiza el índice invertido de sus keys"""
+        previous = self.declarations.get(name)
+        old_keys = previous[0] if previous is not None else frozenset()
+        new_keys = declaration[0]
+        for key in old_keys - new_keys:
+            names = self.key_subscribers[key] - {name}
+            if names:
+                self.key_subscribers[key] = names
+            else:
+                del self.key_subscribers[key]
+        for key in new_keys - old_keys:
+            self.key_subscribers[key] = self.key_subscribers.get(key, frozenset()) | {name}
+        self.declarations[name] = declaration
+
+    def compile(self) -> None:
+        """
+        Prepara el borrador para publicarlo. El análisis del grafo (SCCs y niveles)
+        no se calcula aquí sino en su primer uso, fuera de _APP_LOCK.
+        """
+        self.dependency_keys = frozenset(self.key_subscribers)
+
+
+_APP_LOCK = threading.Lock()
+_APP: CompiledAppGraph = CompiledAppGraph()
+
+
+@contextmanager
+def _isolated_app_graph() -> Iterator[None]:
+    """
+    Sustituye el grafo del proceso por uno vacío mientras dura el bloque y
+    restaura el anterior al salir (exportadores y benchmarks que registran
+    apps sin tocar el grafo de las sesiones).
+    """
+    global _APP
+
+    with _APP_LOCK:
+        previous, _APP = _APP, CompiledAppGraph()
+    try:
+        yield
+    finally:
+        with _APP_LOCK:
+            _APP = previous
+
+
+def _latest_app_graph() -> CompiledAppGraph:
+    """Borrador pendiente o, si no hay, la versión publicada (solo para consultar declaraciones)"""
+    app = _APP
+    draft = app._draft
+    return draft if draft is not None else app
+
+
+def _update_app_graph(mutate: Callable[[CompiledAppGraph], bool]) -> None:
+    """
+    Aplica mutate sobre el borrador de la siguiente versión del grafo.
+    mutate recibe el borrador y retorna False si no hay nada que cambiar.
+    No compila: el borrador se publica en la siguiente lectura (get_app_graph).
+    """
+    with _APP_LOCK:
+        app = _APP
+        draft = app._draft if app._draft is not None else app.clone()
+        if mutate(draft):
+            app._draft = draft
+
+
+def _register_fragment(metadata: FragmentMetadata) -> None:
+    """Registra (o re-declara) un fragmento en el grafo compartido"""
+    _fragment_ordinal(metadata.name)
+    declaration = (
+        frozenset(metadata.dependencies),
+        frozenset(metadata.dependents),
+        metadata.debounce_ms,
+        metadata.throttle_ms,
+        metadata.priority,
+        metadata.lazy_when_hidden,
+    )
+    if _latest_app_graph().declarations.get(metadata.name) == declaration:
+        return
+
+    def mutate(draft: CompiledAppGraph) -> bool:
+        # Otra sesión pudo registrar la misma declaración mientras esperábamos el lock
+        if draft.declarations.get(metadata.name) == declaration:
+            return False
+        # Copia propia: register_dependency muta los sets del borrador
+        owned = metadata.copy()
+        draft.registry[metadata.name] = owned
+        draft.graph.add_fragment(owned)
+        draft._owned.add(metadata.name)
+        draft.declare(metadata.name, declaration)
+        return True
+
+    _update_app_graph(mutate)
+
+
+def get_app_graph() -> CompiledAppGraph:
+    """
+    Versión publicada del grafo de la app (no mutar). Si hay declaraciones
+    pendientes, las compila y publica antes de retornar.
+    """
+    global _APP
+
+    app = _APP
+    if app._draft is None:
+        return app
+    with _APP_LOCK:
+        app = _APP
+        draft = app._draft
+        if draft is not None:
+            draft.version = app.version + 1
+            draft.compile()
+            app._draft = None
+            _APP = app = draft
+        return app
 
 
 def _get_session_graph() -> dict:
@@ -118,30 +523,52 @@ def _get_session_graph() -> dict:
         st.session_state._reactive_graph_state = {
             'rerun_queue': [],       # Lista ordenada de fragmentos pendientes
             'executing': set(),      # Fragmentos ejecutándose ahora mismo
+            'in_flight': {},         # {fragment_name: fragment_id} del batch solicitado
+            'batch_mode': 'cascade', # 'cascade' (un rerun) | 'level' (un rerun por nivel)
             'last_params': {},
-            'fragment_ids': {},
+            'runtime': {},           # {fragment_name: FragmentRuntime} observado en ejecución
+            'fragment_names': {},    # {fragment_id: fragment_name}
             'global_rerun_count': 0,
+            'cascade_id': 0,         # Id de la cascada en curso (generación)
+            'pending_cascade': {},   # {fragment_name: cascade_id que lo dejó pendiente}
+            'deferred': {},          # {fragment_name: cascade_id} diferidos por debounce/throttle
+            'last_run': {},          # {fragment_name: time.monotonic() de su última ejecución}
+            'source_changed': set(), # Fragmentos con datos nuevos de una fuente (cascada pendiente)
             'cycle_detected': False,
             'cycle_fragments': set(),
         }
     return st.session_state._reactive_graph_state
 
 
-def _get_or_init_fragment_state(fragment_name: str) -> dict:
-    """Inicializa estado para un fragmento específico"""
-    state_key = f'_fragment_state_{fragment_name}'
-    if state_key not in st.session_state:
-        st.session_state[state_key] = {
-            'params': {},
-            'is_dirty': False,
-            'last_rendered_params': {},
-        }
-    return st.session_state[state_key]
+# =============================================================================
+# 🗂️ FRAGMENT STATE TABLE
+# =============================================================================
+# La tabla por columnas y los ordinales viven en fragment_states: las dos
+# variantes del decorador comparten la misma key de session_state.
+
+_RUN_SEQ = itertools.count(1)  # Secuencia de ejecuciones de fragmentos del proceso
+
+
+def _get_or_init_fragment_state(fragment_name: str) -> _FragmentStateView:
+    """Estado de un fragmento específico (vista sobre la tabla de la sesión)"""
+    return _get_fragment_states().view(_fragment_ordinal(fragment_name))
 
 
-def _log(msg: str) -> None:
-    st.session_state._reactive_framework_log = (
-        st.session_state.get('_reactive_framework_log', []) + [msg]
+def _trace(
+    event: str,
+    fragment: Optional[str] = None,
+    detail: str = "",
+    duration_ms: Optional[float] = None,
+) -> None:
+    """Registra un evento en el ring buffer de la sesión (no-op si el tracing está desactivado)"""
+    if not is_tracing_enabled():
+        return
+    get_tracer().record(
+        event,
+        fragment=fragment,
+        cascade_id=_get_session_graph()['cascade_id'],
+        duration_ms=duration_ms,
+        detail=detail,
     )
 
 
@@ -153,50 +580,192 @@ def _is_fragment_scoped_run(ctx: Any) -> bool:
     return bool(fragment_ids_this_run)
 
 
-def _all_dependency_keys() -> set[str]:
+def _all_dependency_keys() -> frozenset[str]:
     """Todas las dependencias declaradas (se usan como keys candidatas de session_state)."""
-    keys: set[str] = set()
-    for metadata in _GLOBAL_REGISTRY.values():
-        keys.update(metadata.dependencies)
-    return keys
+    return get_app_graph().dependency_keys
 
 
 def _snapshot_session_state(keys: set[str]) -> dict[str, Any]:
-    """Snapshot superficial de session_state para las keys observadas."""
+    """
+    Snapshot superficial de session_state para las keys observadas.
+    Las keys escritas con la API observable se representan por su revisión
+    mientras sigan guardando el objeto de la última escritura registrada.
+    """
+    revisions = _get_state_revisions()
     snap: dict[str, Any] = {}
     for key in keys:
-        snap[key] = st.session_state.get(key, None)
+        value = st.session_state.get(key, None)
+        revision = _live_revision(revisions, key, value)
+        snap[key] = _Revision(revision) if revision else value
     return snap
 
 
+def _values_differ(before: Any, after: Any) -> bool:
+    """
+    Compara dos valores de un snapshot sin fallar con DataFrames/ndarrays.
+    Si la comparación es ambigua o lanza excepción se considera cambio.
+    """
+    if before is after:
+        return False
+    if type(before) is _Revision and type(after) is _Revision:
+        return int(before) != int(after)
+    if type(before) is _Revision or type(after) is _Revision:
+        # La key entró o salió de la API observable (p. ej. escritura directa)
+        return True
+    try:
+        return bool(before != after)
+    except Exception:
+        return True
+
+
 def _changed_keys_from_snapshots(before: dict[str, Any], after: dict[str, Any]) -> set[str]:
     """Detecta qué keys cambiaron entre dos snapshots."""
     changed: set[str] = set()
     all_keys = set(before.keys()) | set(after.keys())
     for key in all_keys:
-        if before.get(key) != after.get(key):
+        if _values_differ(before.get(key), after.get(key)):
             changed.add(key)
     return changed
 
 
-def _enqueue_fragments_for_state_changes(current_fragment: str, changed_keys: set[str]) -> None:
+# =============================================================================
+# 👁️ OBSERVABLE STATE
+# =============================================================================
+# Capa opcional: las keys escritas con set_state/mutate_state/touch_state llevan
+# una revisión monótona por sesión. Para esas keys la detección de cambios es
+# una comparación de enteros (detecta mutaciones in-place y evita comparar
+# DataFrames/ndarrays). El resto de keys sigue usando el diff de snapshots.
+# Si una key con revisión se reasigna directamente (st.session_state[k] = v),
+# la revisión deja de describir el valor y se descarta.
+
+class _Revision(int):
+    """Revisión de una key observable dentro de un snapshot"""
+
+
+def _get_state_revisions() -> dict:
+    """Obtiene o crea el registro de revisiones de keys observables"""
+    if '_reactive_state_revisions' not in st.session_state:
+        st.session_state._reactive_state_revisions = {
+            'clock': 0,   # Contador monótono de escrituras de la sesión
+            'keys': {},   # {state_key: revisión de la última escritura}
+            'refs': {},   # {state_key: objeto guardado en esa escritura}
+        }
+    return st.session_state._reactive_state_revisions
+
+
+def _bump_revision(key: str) -> int:
+    revisions = _get_state_revisions()
+    revisions['clock'] += 1
+    revisions['keys'][key] = revisions['clock']
+    revisions['refs'][key] = st.session_state.get(key, None)
+    return revisions['clock']
+
+
+def _live_revision(revisions: dict, key: str, value: Any) -> int:
+    """
+    Revisión de la key si el valor actual es el de la última escritura con la
+    API; si se reasignó por fuera se olvida la revisión y retorna 0.
+    """
+    revision = revisions['keys'].get(key, 0)
+    if revision and revisions['refs'].get(key) is not value:
+        del revisions['keys'][key]
+        revisions['refs'].pop(key, None)
+        return 0
+    return revision
+
+
+def set_state(key: str, value: Any) -> int:
+    """
+    Escribe una key de session_state y registra una nueva revisión.
+    Retorna la revisión asignada.
+    """
+    st.session_state[key] = value
+    return _bump_revision(key)
+
+
+def touch_state(key: str) -> int:
+    """Marca una key como modificada (p. ej. tras mutarla in-place) sin reasignarla"""
+    return _bump_revision(key)
+
+
+@contextmanager
+def mutate_state(key: str, default_factory: Optional[Callable[[], Any]] = None) -> Iterator[Any]:
+    """
+    Context manager para editar in-place el valor de una key.
+    Al salir registra una nueva revisión, de modo que los fragmentos
+    suscritos se encolan aunque el objeto sea el mismo.
+
+    Ejemplo:
+        with mutate_state('items', list) as items:
+            items.append(new_item)
+    """
+    if key not in st.session_state and default_factory is not None:
+        st.session_state[key] = default_factory()
+    try:
+        yield st.session_state[key]
+    finally:
+        _bump_revision(key)
+
+
+def get_state_revision(key: str) -> int:
+    """
+    Revisión actual de una key observable (0 si nunca se escribió con la API
+    o si se reasignó después sin ella)
+    """
+    return _live_revision(_get_state_revisions(), key, st.session_state.get(key, None))
+
+
+def _is_pending(graph_state: dict, fragment_name: str) -> bool:
+    """True si el fragmento ya está encolado, ejecutándose, en vuelo o diferido."""
+    return (
+        fragment_name in graph_state['rerun_queue']
+        or fragment_name in graph_state['executing']
+        or fragment_name in graph_state['in_flight']
+        or fragment_name in graph_state['deferred']
+    )
+
+
+def _claim_for_cascade(graph_state: dict, fragment_name: str) -> None:
+    """
+    Asocia el fragmento pendiente a la cascada en curso.
+    Si estaba diferido por una cascada anterior, ese rerun queda obsoleto:
+    se cancela y el fragmento vuelve a la cola para la cascada nueva.
+    """
+    cascade_id = graph_state['cascade_id']
+    previous = graph_state['pending_cascade'].get(fragment_name)
+    graph_state['pending_cascade'][fragment_name] = cascade_id
+    if previous is None or previous == cascade_id:
+        return
+
+    _pop_deferred_rerun(graph_state, fragment_name)
+    _trace("COALESCE", fragment_name, f"cascade {previous} → {cascade_id}")
+
+
+def _enqueue_fragments_for_state_changes(current_fragment: str, changed_keys: set[str]) -> int:
     """
     Encola fragmentos que declaran dependencias sobre keys de session_state modificadas.
+    Retorna cuántos fragmentos se encolaron.
     """
     if not changed_keys:
-        return
+        return 0
+
+    key_subscribers = get_app_graph().key_subscribers
+    subscribers: Set[str] = set()
+    for key in changed_keys:
+        subscribers.update(key_subscribers.get(key, ()))
+    subscribers.discard(current_fragment)
 
     graph_state = _get_session_graph()
-    for fragment_name, metadata in _GLOBAL_REGISTRY.items():
-        if fragment_name == current_fragment:
-            continue
-        if not (metadata.dependencies & changed_keys):
+    enqueued = 0
+    for fragment_name in sorted(subscribers):
+        _get_fragment_states().set_dirty(_fragment_ordinal(fragment_name))
+        _claim_for_cascade(graph_state, fragment_name)
+        if _is_pending(graph_state, fragment_name):
             continue
-
-        _get_or_init_fragment_state(fragment_name)['is_dirty'] = True
-        if fragment_name not in graph_state['rerun_queue'] and fragment_name not in graph_state['executing']:
-            graph_state['rerun_queue'].append(fragment_name)
-            _log(f"[ENQUEUE_BY_STATE] {fragment_name} <- keys={sorted(changed_keys)}")
+        graph_state['rerun_queue'].append(fragment_name)
+        enqueued += 1
+        _trace("ENQUEUE_BY_STATE", fragment_name, f"keys={sorted(changed_keys)}")
+    return enqueued
 
 
 # =============================================================================
@@ -216,6 +785,20 @@ def _get_fragment_delta_path() -> str:
     return ""
 
 
+def _is_in_hidden_container() -> bool:
+    """
+    True si el código actual se renderiza dentro de un expander colapsado o
+    una tab inactiva. Solo los contenedores que siguen su estado
+    (on_change != 'ignore', Streamlit >= 1.5x) exponen .open; el resto se
+    considera visible.
+    """
+    for dg in context_dg_stack.get():
+        # DeltaGenerator.__getattr__ no lanza AttributeError: se mira la clase
+        if isinstance(getattr(type(dg), 'open', None), property) and dg.open is False:
+            return True
+    return False
+
+
 def _get_current_fragment_id() -> Optional[str]:
     """Obtiene el ID del fragmento actual de ejecución"""
     ctx = get_script_run_ctx()
@@ -223,6 +806,11 @@ def _get_current_fragment_id() -> Optional[str]:
         return None
 
     # El fragment_id se asigna durante la ejecución del fragmento
+    if ThreadState is not None:
+        try:
+            return ThreadState.get().fragment_id
+        except RuntimeError:
+            return None
     return getattr(ctx, 'current_fragment_id', None)
 
 
@@ -230,11 +818,79 @@ def _get_current_fragment_id() -> Optional[str]:
 # 🔄 CHANGE DETECTION
 # =============================================================================
 
+class _UnhashableValue(Exception):
+    """El valor no se puede hashear estructuralmente"""
+
+
+def _update_structural_hash(hasher: Any, value: Any) -> None:
+    """
+    Alimenta el hasher con una representación estructural del valor.
+    Entiende DataFrames/Series de pandas y ndarrays de numpy sin importarlos
+    si la aplicación no los ha cargado.
+    """
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        hasher.update(f"{type(value).__name__}:{value!r};".encode())
+        return
+
+    if isinstance(value, (list, tuple)):
+        hasher.update(f"{type(value).__name__}[{len(value)}]".encode())
+        for item in value:
+            _update_structural_hash(hasher, item)
+        return
+
+    if isinstance(value, dict):
+        hasher.update(f"dict[{len(value)}]".encode())
+        for key in sorted(value, key=repr):
+            _update_structural_hash(hasher, key)
+            _update_structural_hash(hasher, value[key])
+        return
+
+    if isinstance(value, (set, frozenset)):
+        hasher.update(f"set[{len(value)}]".encode())
+        for item_hash in sorted(_structural_hash(item) for item in value):
+            hasher.update(item_hash.encode())
+        return
+
+    pd = sys.modules.get('pandas')
+    if pd is not None and isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        hasher.update(f"{type(value).__name__}{value.shape}".encode())
+        if isinstance(value, pd.DataFrame):
+            _update_structural_hash(hasher, [str(col) for col in value.columns])
+            _update_structural_hash(hasher, [str(dtype) for dtype in value.dtypes])
+        else:
+            hasher.update(str(value.dtype).encode())
+        try:
+            hasher.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+        except TypeError:
+            _update_structural_hash(hasher, value.to_dict() if not isinstance(value, pd.Index) else list(value))
+        return
+
+    np = sys.modules.get('numpy')
+    if np is not None and isinstance(value, np.ndarray):
+        hasher.update(f"ndarray{value.shape}{value.dtype}".encode())
+        if value.dtype.hasobject:
+            _update_structural_hash(hasher, value.tolist())
+        else:
+            hasher.update(np.ascontiguousarray(value).tobytes())
+        return
+
+    try:
+        hasher.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception as e:
+        raise _UnhashableValue(type(value).__name__) from e
+
+
+def _structural_hash(value: Any) -> str:
+    """Hash estructural (blake2b) de un valor arbitrario"""
+    hasher = hashlib.blake2b(digest_size=16)
+    _update_structural_hash(hasher, value)
+    return hasher.hexdigest()
+
+
 def _compute_param_hash(params: dict) -> str:
     """Calcula un hash de los parámetros para detectar cambios"""
     try:
-        param_str = str(sorted(params.items()))
-        return hashlib.md5(param_str.encode()).hexdigest()
+        return _structural_hash(params)
     except Exception:
         return "unknown"
 
@@ -247,12 +903,11 @@ def _detect_param_changes(
     Detecta si los parámetros han cambiado respecto al último render.
     Retorna: (hay_cambios, parámetros_que_cambiaron)
     """
-    state = _get_or_init_fragment_state(fragment_name)
-    last_params = state.get('last_rendered_params', {})
+    last_params = _get_or_init_fragment_state(fragment_name)['last_rendered_params']
 
     changed: Set[str] = set()
     for key, new_value in current_params.items():
-        if last_params.get(key) != new_value:
+        if _values_differ(last_params.get(key), new_value):
             changed.add(key)
     for key in last_params:
         if key not in current_params:
@@ -262,22 +917,29 @@ def _detect_param_changes(
 
 
 
-def _enqueue_dependents(fragment_name: str, graph: DependencyGraph, reason: str = "") -> None:
+def _enqueue_dependents(fragment_name: str, graph: DependencyGraph, reason: str = "") -> int:
     """
     Marca como dirty y encola en rerun_queue todos los dependientes
     de fragment_name, en orden BFS (directos primero).
+    Retorna cuántos fragmentos se encolaron.
     """
     graph_state = _get_session_graph()
+    states = _get_fragment_states()
     dependents = graph.get_dependents_chain(fragment_name)
+    enqueued = 0
 
     for dep in dependents:
         # Marcar como dirty
-        _get_or_init_fragment_state(dep)['is_dirty'] = True
+        states.set_dirty(_fragment_ordinal(dep))
+        _claim_for_cascade(graph_state, dep)
 
-        # Encolar solo si no está ya ni ejecutándose
-        if dep not in graph_state['rerun_queue'] and dep not in graph_state['executing']:
+        # Encolar solo si no está ya encolado, ejecutándose o en el batch en vuelo
+        if not _is_pending(graph_state, dep):
             graph_state['rerun_queue'].append(dep)
-            _log(f"[ENQUEUE] {dep} ← {fragment_name}{' (' + reason + ')' if reason else ''}")
+            enqueued += 1
+            _trace("ENQUEUE", dep, f"← {fragment_name}{' (' + reason + ')' if reason else ''}")
+
+    return enqueued
 
 
 # =============================================================================
@@ -288,10 +950,7 @@ def _enqueue_dependents(fragment_name: str, graph: DependencyGraph, reason: str
 
 def _detect_complex_cycles(graph: DependencyGraph) -> tuple[bool, Set[str]]:
     """Detecta fragmentos que forman parte de un ciclo en el grafo."""
-    with_cycles: Set[str] = set()
-    for name in graph.fragments:
-        if graph.has_cycle(name):
-            with_cycles.add(name)
+    with_cycles = set(graph.get_cycle_fragments())
     return len(with_cycles) > 0, with_cycles
 
 
@@ -308,13 +967,13 @@ def _trigger_global_rerun() -> bool:
             "Multiple global reruns attempted. "
             "State is inconsistent. Please manually refresh the page."
         )
-        _log("[ERROR] Multiple global reruns - state corrupted, execution stopped")
+        _trace("ERROR", detail="Multiple global reruns - state corrupted, execution stopped")
         return False
 
     st.session_state._reactive_global_rerun_flag = True
     graph_state = _get_session_graph()
     graph_state['global_rerun_count'] += 1
-    _log(f"[GLOBAL_RERUN] #{graph_state['global_rerun_count']} - Full reset triggered")
+    _trace("GLOBAL_RERUN", detail=f"#{graph_state['global_rerun_count']} - Full reset triggered")
     return True
 
 
@@ -325,12 +984,13 @@ def _reset_reactive_session_state() -> None:
     """
     old_count = 0
     if '_reactive_graph_state' in st.session_state:
+        _cancel_deferred_reruns(st.session_state._reactive_graph_state)
         old_count = st.session_state._reactive_graph_state.get('global_rerun_count', 0)
         del st.session_state._reactive_graph_state
 
-    for key in list(st.session_state.keys()):
-        if key.startswith('_fragment_state_'):
-            del st.session_state[key]
+    # Todo el estado por fragmento está en una sola key: O(1)
+    if FRAGMENT_STATES_KEY in st.session_state:
+        del st.session_state[FRAGMENT_STATES_KEY]
 
     # Reinicializa preservando el contador
     graph_state = _get_session_graph()
@@ -409,89 +1069,446 @@ def _candidate_fragment_names(wrapper: Any) -> set[str]:
 
     return names
 
+def _get_fragment_map(ctx: Any) -> Optional[dict]:
+    """Mapa {fragment_id: wrapper} del fragment_storage de la sesión."""
+    fragment_storage = getattr(ctx, 'fragment_storage', None)
+    if fragment_storage is None:
+        return None
+
+    internal_fragments = getattr(fragment_storage, '_fragments', None)
+    public_fragments = getattr(fragment_storage, 'fragments', None)
+    return internal_fragments if internal_fragments is not None else public_fragments
+
+
+def _get_fragment_runtime(fragment_name: str) -> FragmentRuntime:
+    """Obtiene o crea los datos de ejecución del fragmento en la sesión actual"""
+    runtime = _get_session_graph()['runtime']
+    if fragment_name not in runtime:
+        runtime[fragment_name] = FragmentRuntime()
+    return runtime[fragment_name]
+
+
+def _record_fragment_id(fragment_name: str, fragment_id: Optional[str]) -> None:
+    """Guarda en el índice de la sesión el fragment_id observado al ejecutar el fragmento."""
+    if not fragment_id:
+        return
+    _get_fragment_runtime(fragment_name).fragment_id = fragment_id
+    _get_session_graph()['fragment_names'][fragment_id] = fragment_name
+
+
+def _flag_source_change(session_state: Any, fragment_name: str, run_seq: Optional[int]) -> bool:
+    """
+    Marca dirty un fragmento suscrito a una fuente y deja pendiente su cascada.
+    Se llama desde el hilo que publica, con el session_state de la sesión
+    suscrita: el estado se busca en cada aviso porque un reset lo sustituye.
+    Retorna False si el fragmento se ejecutó después de run_seq sin volver a
+    leer la fuente (la suscripción está obsoleta).
+    """
+    if session_state is None:
+        return True
+    try:
+        graph_state = session_state['_reactive_graph_state']
+    except KeyError:
+        return True  # Sesión recién reseteada: el rerun vuelve a crear el estado
+
+    runtime = graph_state['runtime'].get(fragment_name)
+    if (
+        run_seq is not None
+        and runtime is not None
+        and runtime.run_seq != run_seq
+        and fragment_name not in graph_state['executing']
+    ):
+        return False
+
+    graph_state['source_changed'].add(fragment_name)
+    if FRAGMENT_STATES_KEY in session_state:
+        session_state[FRAGMENT_STATES_KEY].set_dirty(_fragment_ordinal(fragment_name))
+    return True
+
+
+def _resolve_fragment_ids(ctx: Any, fragment_names: list[str]) -> dict[str, str]:
+    """
+    Resuelve los fragment_id de varios fragmentos.
+    Usa primero el índice {fragment_name: fragment_id} de la sesión y solo
+    recorre el fragment_storage (unwrap + closures) para los ids nunca vistos.
+    Retorna {fragment_name: fragment_id}.
+    """
+    fragment_map = _get_fragment_map(ctx)
+    if not fragment_map:
+        return {}
+
+    runtime = _get_session_graph()['runtime']
+    resolved: dict[str, str] = {}
+    pending: Set[str] = set()
+    for name in fragment_names:
+        fragment_id = runtime[name].fragment_id if name in runtime else None
+        if fragment_id is not None and fragment_id in fragment_map:
+            resolved[name] = fragment_id
+        else:
+            pending.add(name)
+
+    # Fallback: scan del storage para fragmentos que aún no se han indexado
+    for fragment_id, fragment_wrapper in fragment_map.items():
+        if not pending:
+            break
+        for name in _candidate_fragment_names(fragment_wrapper) & pending:
+            resolved[name] = fragment_id
+            pending.discard(name)
+            _record_fragment_id(name, fragment_id)
+
+    return resolved
+
+
+def _request_fragments_rerun(ctx: Any, fragment_ids: list[str]) -> None:
+    """Solicita un único rerun fragment-scoped que drena todos los fragment_ids en orden."""
+    ctx.script_requests.request_rerun(
+        RerunData(
+            query_string=ctx.query_string,
+            page_script_hash=ctx.page_script_hash,
+            fragment_id_queue=list(fragment_ids),
+            is_fragment_scoped_rerun=True,
+            cached_message_hashes=ctx.cached_message_hashes,
+            context_info=ctx.context_info,
+        )
+    )
+
+
 def _trigger_fragment_rerun(fragment_name: str) -> bool:
     """
     Solicita a Streamlit que rerunnee un fragmento específico por su nombre.
     Retorna True si se encontró y programó, False si no existe.
     """
+    return bool(_trigger_fragment_reruns([fragment_name]))
+
+
+def _trigger_fragment_reruns(fragment_names: list[str]) -> dict[str, str]:
+    """
+    Solicita a Streamlit un solo rerun con todos los fragmentos indicados,
+    respetando el orden recibido.
+    Retorna {fragment_name: fragment_id} de los fragmentos programados.
+    """
     ctx = get_script_run_ctx()
     if ctx is None:
-        return False
+        return {}
 
-    fragment_storage = getattr(ctx, 'fragment_storage', None)
-    if fragment_storage is None:
-        return False
+    ordered = _resolve_ordered_fragment_ids(ctx, fragment_names)
+    if ordered:
+        _request_fragments_rerun(ctx, list(ordered.values()))
+    return ordered
 
-    internal_fragments = getattr(fragment_storage, '_fragments', None)
-    public_fragments = getattr(fragment_storage, 'fragments', None)
-    fragment_map = internal_fragments if internal_fragments is not None else public_fragments
-    if fragment_map is None:
-        return False
 
-    for fragment_id, fragment_wrapper in fragment_map.items():
-        names = _candidate_fragment_names(fragment_wrapper)
-        if fragment_name in names:
-            _FRAGMENT_ID_TO_NAME[fragment_id] = fragment_name
-
-            # SE SOLICITA EL RERUN
-            query_string = ctx.query_string
-            page_script_hash = ctx.page_script_hash
-            cached_message_hashes = ctx.cached_message_hashes
-
-            # fragment_queue = _new_fragment_id_queue(ctx, "fragment")
-            fragment_queue = [fragment_id]
-            ctx.script_requests.request_rerun(
-                RerunData(
-                    query_string=query_string,
-                    page_script_hash=page_script_hash,
-                    fragment_id_queue=fragment_queue,
-                    is_fragment_scoped_rerun=True,
-                    cached_message_hashes=cached_message_hashes,
-                    context_info=ctx.context_info,
-                )
-            )
-            return True
+def _resolve_ordered_fragment_ids(ctx: Any, fragment_names: list[str]) -> dict[str, str]:
+    """{fragment_name: fragment_id} de los fragmentos encontrados, en el orden recibido"""
+    resolved = _resolve_fragment_ids(ctx, fragment_names)
+    return {name: resolved[name] for name in fragment_names if name in resolved}
 
-    return False
+
+def _next_batch(
+    graph: DependencyGraph,
+    queue: list[str],
+    batch_mode: str,
+    priorities: Optional[dict[str, int]] = None,
+) -> list[str]:
+    """
+    Ordena el dirty set (dependencias primero, luego prioridad) y devuelve
+    el batch a disparar. En modo 'level' solo se toma el primer nivel,
+    ordenado por prioridad; el resto sigue en cola.
+    """
+    if batch_mode != 'level' or not queue:
+        return graph.schedule(queue, priorities)
+
+    ordered = graph.order_by_level(queue)
+    levels = graph.get_levels()
+    first_level = levels.get(ordered[0], 0)
+    return graph.schedule([name for name in ordered if levels.get(name, 0) == first_level], priorities)
 
 
 def _fire_next_in_queue() -> None:
     """
-    Efecto dominó: al terminar un fragmento, dispara el siguiente en la cola.
-    Solo dispara si no hay ningún fragmento ejecutándose.
+    Efecto dominó: al terminar un fragmento, dispara el dirty set pendiente.
+    Todo el dirty set se ordena por nivel y se envía en un único
+    fragment_id_queue, de modo que Streamlit lo drena en un solo rerun.
+    Solo dispara si no hay ningún fragmento ejecutándose ni un batch en vuelo.
+    Los fragmentos con debounce_ms/throttle_ms se difieren a un timer y los
+    lazy_when_hidden que están ocultos solo quedan dirty hasta ser visibles.
+
+    El batch solo cubre las aristas declaradas (register_dependency /
+    dependents). Las cascadas por state keys no entran: qué keys escribe un
+    fragmento solo se sabe tras ejecutarlo, así que cada nivel de una cadena
+    por keys sigue costando un rerun (una cadena de n fragmentos → n + 1
+    ejecuciones de script contando el rerun completo inicial).
     """
     graph_state = _get_session_graph()
 
     # Si algo se está ejecutando todavía, no interferir
-    if graph_state['executing']:
+    if graph_state['executing'] or graph_state['in_flight']:
         return
 
-    queue = graph_state['rerun_queue']
-    while queue:
-        next_frag = queue.pop(0)
+    # Sin contexto de ejecución no hay a quién pedir el rerun: se conserva la cola
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
 
-        if next_frag in graph_state['executing']:
-            # En ejecución, saltar (no debería pasar pero por seguridad)
+    app = get_app_graph()
+    queue = graph_state['rerun_queue']
+    candidates: list[str] = []
+    now = time.monotonic()
+    for name in queue:
+        if name not in app.registry:
+            _trace("SKIP", name, "not registered")
+        elif name in candidates:
             continue
+        elif app.registry[name].lazy_when_hidden and _is_hidden(graph_state, name):
+            # Se ejecutará en el rerun que lo haga visible
+            graph_state['pending_cascade'].pop(name, None)
+            _trace("HIDDEN", name, "deferred until visible")
+        else:
+            delay_ms = _rerun_delay_ms(app.registry[name], graph_state, now)
+            if delay_ms > 0:
+                _defer_fragment_rerun(ctx, name, delay_ms)
+            else:
+                candidates.append(name)
+    queue.clear()
+
+    if not candidates:
+        return
 
-        if next_frag not in _GLOBAL_REGISTRY:
-            _log(f"[SKIP] {next_frag} not registered")
-            continue
+    priorities = {name: app.registry[name].priority for name in candidates}
+    batch = _next_batch(app.graph, candidates, graph_state['batch_mode'], priorities)
+    queue.extend(name for name in candidates if name not in batch)
 
-        if _trigger_fragment_rerun(next_frag):
-            _log(f"[FIRE] → {next_frag}")
-            st.empty()
-            break
-        else:
-            _log(f"[SKIP] {next_frag} not found in fragment storage")
+    fired = _resolve_ordered_fragment_ids(ctx, batch)
+    for name in batch:
+        if name not in fired:
+            _trace("SKIP", name, "not found in fragment storage")
+
+    if fired:
+        # Todo el bookkeeping va antes de pedir el rerun: tras la petición,
+        # el siguiente acceso a session_state puede lanzar RerunException
+        graph_state['in_flight'] = fired
+        _trace("FIRE", detail=f"→ {list(fired)}")
+        _request_fragments_rerun(ctx, list(fired.values()))
+        st.empty()
+
+
+def _is_hidden(graph_state: dict, fragment_name: str) -> bool:
+    """Visibilidad observada en la última ejecución del fragmento en la sesión"""
+    runtime = graph_state['runtime'].get(fragment_name)
+    return runtime is not None and runtime.hidden
+
+
+def _prune_in_flight(ctx: Any) -> None:
+    """
+    Descarta del batch en vuelo los fragmentos que no forman parte de esta
+    ejecución (p. ej. eliminados del storage antes de que Streamlit los drene).
+    """
+    graph_state = _get_session_graph()
+    if not graph_state['in_flight']:
+        return
+
+    ids_this_run = set(getattr(ctx, 'fragment_ids_this_run', None) or ())
+    graph_state['in_flight'] = {
+        name: fragment_id
+        for name, fragment_id in graph_state['in_flight'].items()
+        if fragment_id in ids_this_run
+    }
 
 
 def _queue_fragment_rerun(fragment_name: str, reason: str = "") -> None:
     """Encola manualmente un fragmento para rerun (API pública interna)"""
     graph_state = _get_session_graph()
-    if fragment_name not in graph_state['rerun_queue'] and fragment_name not in graph_state['executing']:
+    _claim_for_cascade(graph_state, fragment_name)
+    if not _is_pending(graph_state, fragment_name):
         graph_state['rerun_queue'].append(fragment_name)
-        _log(f"[QUEUE] {fragment_name}{' (' + reason + ')' if reason else ''}")
+        _trace("QUEUE", fragment_name, reason)
+
+
+# =============================================================================
+# ⏱️ DEBOUNCE / THROTTLE
+# =============================================================================
+# Un fragmento con debounce_ms no se rerunnea al quedar dirty: se programa un
+# timer y, si antes de que venza llega una cascada más nueva, el timer se
+# cancela y se reprograma (solo se calcula el último valor). Con throttle_ms
+# el primer rerun de la ventana es inmediato y el resto se agrupa en uno al
+# final de la ventana. El timer pide el rerun vía SessionHandle, porque para
+# entonces el script que lo programó ya ha terminado.
+#
+# Los timers no se guardan en session_state (no son serializables): viven en
+# un registro de proceso indexado por (session_id, fragmento) y el estado de
+# la sesión solo guarda la cascada que dejó pendiente cada fragmento.
+
+class _DeferredRerun:
+    """Rerun de un fragmento programado en un timer"""
+    __slots__ = ('key', 'fragment_id', 'cascade_id', 'due', 'cancelled', '_timer')
+
+    # Clase del timer; los tests la sustituyen por un reloj manual
+    timer_factory = threading.Timer
+
+    def __init__(
+        self,
+        key: tuple[Optional[str], str],
+        fragment_id: str,
+        cascade_id: int,
+        delay_s: float,
+        handle: Optional[SessionHandle],
+    ):
+        self.key = key
+        self.fragment_id = fragment_id
+        self.cascade_id = cascade_id
+        self.due = time.monotonic() + delay_s
+        self.cancelled = False
+        self._timer = self.timer_factory(delay_s, self._fire, args=(handle,))
+        self._timer.daemon = True
+
+    def start(self) -> None:
+        self._timer.start()
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        self._timer.cancel()
+
+    def _fire(self, handle: Optional[SessionHandle]) -> None:
+        with _DEFERRED_LOCK:
+            if _DEFERRED_RERUNS.get(self.key) is self:
+                del _DEFERRED_RERUNS[self.key]
+        if self.cancelled or handle is None:
+            return
+        handle.request_fragment_rerun([self.fragment_id])
+
+
+_DEFERRED_RERUNS: dict[tuple[Optional[str], str], _DeferredRerun] = {}
+_DEFERRED_LOCK = threading.Lock()
+
+
+def _deferred_key(fragment_name: str) -> tuple[Optional[str], str]:
+    return getattr(get_script_run_ctx(), 'session_id', None), fragment_name
+
+
+def _pop_deferred_rerun(graph_state: dict, fragment_name: str) -> Optional[int]:
+    """Cancela el rerun diferido del fragmento; retorna la cascada que lo programó"""
+    cascade_id = graph_state['deferred'].pop(fragment_name, None)
+    with _DEFERRED_LOCK:
+        deferred = _DEFERRED_RERUNS.pop(_deferred_key(fragment_name), None)
+    if deferred is not None:
+        deferred.cancel()
+    return cascade_id
+
+
+def _rerun_delay_ms(metadata: FragmentMetadata, graph_state: dict, now: float) -> float:
+    """Milisegundos que hay que esperar antes de rerunnear el fragmento (0 = ya)"""
+    if metadata.debounce_ms:
+        return metadata.debounce_ms
+    if metadata.throttle_ms:
+        last_run = graph_state['last_run'].get(metadata.name)
+        if last_run is not None:
+            return max(0.0, metadata.throttle_ms - (now - last_run) * 1000)
+    return 0.0
+
+
+def _defer_fragment_rerun(ctx: Any, fragment_name: str, delay_ms: float) -> None:
+    """Programa el rerun del fragmento dentro de delay_ms"""
+    graph_state = _get_session_graph()
+    resolved = _resolve_fragment_ids(ctx, [fragment_name])
+    if fragment_name not in resolved:
+        _trace("SKIP", fragment_name, "not found in fragment storage")
+        return
+
+    _pop_deferred_rerun(graph_state, fragment_name)
+    key = _deferred_key(fragment_name)
+    deferred = _DeferredRerun(
+        key,
+        resolved[fragment_name],
+        graph_state['pending_cascade'].get(fragment_name, graph_state['cascade_id']),
+        delay_ms / 1000,
+        SessionHandle.capture(ctx),
+    )
+    graph_state['deferred'][fragment_name] = deferred.cascade_id
+    with _DEFERRED_LOCK:
+        _DEFERRED_RERUNS[key] = deferred
+    deferred.start()
+    _trace("DEFER", fragment_name, f"{delay_ms:.0f} ms")
+
+
+def _cancel_deferred_reruns(graph_state: dict) -> None:
+    for fragment_name in list(graph_state.get('deferred', {})):
+        _pop_deferred_rerun(graph_state, fragment_name)
+
+
+# =============================================================================
+# 📐 CALL PLAN
+# =============================================================================
+
+class _CallPlan:
+    """
+    Plan de llamada compilado al decorar: firma cacheada, nombres posicionales
+    y valores por defecto. Evita inspect.signature/bind_partial en cada ejecución.
+    """
+    __slots__ = ('signature', 'positional', 'defaults', 'fast_path')
+
+    def __init__(self, func: Callable):
+        self.signature = inspect.signature(func)
+        self.positional: tuple[str, ...] = tuple(
+            name for name, param in self.signature.parameters.items()
+            if param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD)
+        )
+        self.defaults: dict[str, Any] = {
+            name: param.default
+            for name, param in self.signature.parameters.items()
+            if param.default is not param.empty
+        }
+        # *args/**kwargs requieren el binding completo de inspect
+        self.fast_path = not any(
+            param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD)
+            for param in self.signature.parameters.values()
+        )
+
+    def bind(self, args: tuple, kwargs: dict) -> dict[str, Any]:
+        """Equivalente a bind_partial + apply_defaults sobre la firma cacheada"""
+        if not self.fast_path or len(args) > len(self.positional):
+            bound = self.signature.bind_partial(*args, **kwargs)
+            bound.apply_defaults()
+            return dict(bound.arguments)
+
+        params = dict(self.defaults)
+        params.update(zip(self.positional, args))
+        params.update(kwargs)
+        return params
+
+
+# =============================================================================
+# 🧮 MEMOIZATION
+# =============================================================================
+
+def _memo_key(params: dict[str, Any], dependencies: Set[str]) -> Optional[str]:
+    """
+    Clave de memo: hash de los parámetros y de las dependencias presentes en
+    session_state (por revisión si son observables). None si no es hasheable.
+    """
+    deps_snapshot = _snapshot_session_state(
+        {key for key in dependencies if key in st.session_state}
+    )
+    try:
+        return _structural_hash((params, deps_snapshot))
+    except _UnhashableValue:
+        return None
+
+
+def _memo_lookup(frag_state: "_FragmentStateView", key: str) -> tuple[bool, Any]:
+    """Busca en el LRU de la sesión. Retorna (hit, valor)."""
+    cache = frag_state.get('memo')
+    if cache is None or key not in cache:
+        return False, None
+    cache.move_to_end(key)
+    return True, cache[key]
+
+
+def _memo_store(frag_state: "_FragmentStateView", key: str, value: Any, max_size: int) -> None:
+    """Guarda un resultado en el LRU de la sesión, descartando los más antiguos"""
+    cache = frag_state.setdefault('memo', OrderedDict())
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > max_size:
+        cache.popitem(last=False)
 
 
 # =============================================================================
@@ -503,6 +1520,13 @@ def reactlit_fragment(
     dependents: Optional[list[str]] = None,
     watch_params: bool = True,
     prevent_cycles: bool = True,
+    memo: bool = False,
+    memo_size: int = 8,
+    render: Optional[Callable[[Any], None]] = None,
+    debounce_ms: Optional[float] = None,
+    throttle_ms: Optional[float] = None,
+    priority: int = 0,
+    lazy_when_hidden: bool = False,
 ):
     """
     Decorador para crear fragmentos reactivos.
@@ -512,28 +1536,79 @@ def reactlit_fragment(
         dependents: Fragmentos que dependen de este (se registran como edges en el grafo)
         watch_params: Si True, detecta cambios en parámetros y encola dependientes
         prevent_cycles: Si True, detecta ciclos y dispara global rerun seguro
+        memo: Si True, la función es pura: su resultado se cachea por sesión según
+            el hash de parámetros y dependencias, y no se recalcula si no cambian
+        memo_size: Tamaño máximo del LRU de resultados por sesión (mínimo 1; para
+            no memoizar se usa memo=False). Un valor menor lanza ValueError
+        render: Función que recibe el resultado y lo muestra; se ejecuta siempre,
+            también cuando el resultado sale del memo. Obligatoria con memo=True
+        debounce_ms: Si se indica, las cascadas no rerunnean el fragmento hasta que
+            pasan debounce_ms sin cambios nuevos (p. ej. mientras se arrastra un slider)
+        throttle_ms: Si se indica, las cascadas rerunnean el fragmento como mucho una
+            vez cada throttle_ms; los cambios intermedios se agrupan en un rerun final
+        priority: En un batch de reruns, los fragmentos de mayor prioridad se
+            ejecutan antes (siempre después de los fragmentos de los que dependen)
+        lazy_when_hidden: Si True, dentro de un expander colapsado o una tab
+            inactiva (con on_change='rerun') el fragmento no se ejecuta: queda
+            dirty y se ejecuta cuando vuelve a ser visible
+
+    Ejemplo:
+        @reactlit_fragment(dependencies=['region'], memo=True, render=show_sales)
+        def sales_by_region():
+            return run_heavy_query(st.session_state.region)
     """
     dep_list = set(dependencies or [])
     dep_names = set(dependents or [])
+    if debounce_ms and throttle_ms:
+        raise ValueError("debounce_ms and throttle_ms are mutually exclusive")
+    if memo and render is None:
+        # En un memo hit la función no se ejecuta: sin render no se pintaría nada
+        raise ValueError("memo=True requires a render function")
+    if memo_size < 1:
+        raise ValueError(f"memo_size must be at least 1, got {memo_size}")
+    for option, value in (('debounce_ms', debounce_ms), ('throttle_ms', throttle_ms)):
+        if value is not None and value < 0:
+            raise ValueError(f"{option} must be non-negative, got {value}")
 
     def decorator(func: Callable) -> Callable:
         fragment_name = func.__name__
+        call_plan = _CallPlan(func)
+        bind_params = watch_params or memo
 
         metadata = FragmentMetadata(
             name=fragment_name,
             func=func,
             dependencies=dep_list,
             dependents=dep_names,
+            debounce_ms=debounce_ms,
+            throttle_ms=throttle_ms,
+            priority=priority,
+            lazy_when_hidden=lazy_when_hidden,
         )
-        _GLOBAL_REGISTRY[fragment_name] = metadata
-        _GLOBAL_GRAPH.add_fragment(metadata)
+        _register_fragment(metadata)
+        ordinal = _fragment_ordinal(fragment_name)
 
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             ctx = get_script_run_ctx()
             graph_state = _get_session_graph()
-            frag_state = _get_or_init_fragment_state(fragment_name)
+            states = _get_fragment_states()
+            states.ensure(ordinal)
             fragment_scoped_run = _is_fragment_scoped_run(ctx)
+            # Esta ejecución atiende cualquier rerun pendiente del fragmento
+            deferred = _pop_deferred_rerun(graph_state, fragment_name)
+            graph_state['pending_cascade'].pop(fragment_name, None)
+            graph_state['last_run'][fragment_name] = time.monotonic()
+            source_changed = fragment_name in graph_state['source_changed']
+            graph_state['source_changed'].discard(fragment_name)
+            if fragment_scoped_run:
+                _prune_in_flight(ctx)
+                if graph_state['in_flight'].pop(fragment_name, None) is None and deferred is None:
+                    # Rerun no disparado por el framework (interacción del usuario): nueva cascada
+                    graph_state['cascade_id'] += 1
+            else:
+                # En un rerun completo se ejecutan todos los fragmentos: no hay batch pendiente
+                graph_state['in_flight'].clear()
 
             watched_keys = _all_dependency_keys() if fragment_scoped_run else set()
             before_state = _snapshot_session_state(watched_keys) if watched_keys else {}
@@ -550,11 +1625,11 @@ def reactlit_fragment(
 
             # ── VERIFICACIÓN 2: ciclos complejos ────────────────────────────
             if prevent_cycles:
-                has_cycles, cycle_frags = _detect_complex_cycles(_GLOBAL_GRAPH)
+                has_cycles, cycle_frags = _detect_complex_cycles(get_app_graph().graph)
                 if has_cycles and not graph_state['cycle_detected']:
                     graph_state['cycle_detected'] = True
                     graph_state['cycle_fragments'] = cycle_frags
-                    _log(f"[CYCLE_DETECTED] {cycle_frags}")
+                    _trace("CYCLE_DETECTED", fragment_name, f"{cycle_frags}")
 
                     if fragment_name in cycle_frags:
                         if _trigger_global_rerun():
@@ -567,35 +1642,72 @@ def reactlit_fragment(
                         # Si _trigger_global_rerun devolvió False, ya mostró el error crítico
                         return None
 
+            # Actualiza tracking del delta path
+            runtime = _get_fragment_runtime(fragment_name)
+            runtime.delta_path = _get_fragment_delta_path()
+            _record_fragment_id(fragment_name, _get_current_fragment_id())
+
+            # ── VERIFICACIÓN 3: visibilidad ─────────────────────────────────
+            if lazy_when_hidden:
+                runtime.hidden = _is_in_hidden_container()
+                if runtime.hidden:
+                    states.set_dirty(ordinal)
+                    if source_changed:
+                        # La cascada de la fuente se propaga cuando vuelva a ser visible
+                        graph_state['source_changed'].add(fragment_name)
+                    _trace("HIDDEN", fragment_name, "skipped while hidden")
+                    # Ya salió de in_flight al entrar: el resto del batch sigue su curso
+                    if fragment_scoped_run:
+                        _fire_next_in_queue()
+                    return None
+
             # ── EJECUCIÓN ────────────────────────────────────────────────────
             # Marcar como en ejecución para evitar disparos duplicados
             graph_state['executing'].add(fragment_name)
 
-            # Actualiza tracking del delta path
-            metadata.delta_path = _get_fragment_delta_path()
-            metadata.fragment_id = _get_current_fragment_id()
-
-            # Detecta cambios en parámetros de entrada
-            sig = inspect.signature(func)
-            bound = sig.bind_partial(*args, **kwargs)
-            bound.apply_defaults()
-            current_params = dict(bound.arguments)
-
-            has_param_changes, changed_params = _detect_param_changes(fragment_name, current_params)
-
-            frag_state['params'] = current_params
-            frag_state['last_rendered_params'] = current_params.copy()
-            frag_state['is_dirty'] = False
-
-            if has_param_changes and watch_params:
-                _log(f"[CHANGE] {fragment_name}: {changed_params}")
+            # Detecta cambios en parámetros de entrada (solo si se observan o memoizan)
+            current_params = call_plan.bind(args, kwargs) if bind_params else {}
+
+            if watch_params:
+                has_param_changes, changed_params = _detect_param_changes(fragment_name, current_params)
+                # Cada ejecución crea un dict nuevo: no hace falta copiarlo
+                states.params[ordinal] = current_params
+                states.last_rendered_params[ordinal] = current_params
+                if has_param_changes:
+                    _trace("CHANGE", fragment_name, f"{changed_params}")
+
+            states.set_dirty(ordinal, False)
+
+            # Ejecuta la función del fragmento (o reutiliza el resultado memoizado)
+            memo_key = _memo_key(current_params, dep_list) if memo else None
+            frag_state = states.view(ordinal) if memo_key else None
+            memo_hit, result = _memo_lookup(frag_state, memo_key) if memo_key else (False, None)
+            if memo_hit:
+                _trace("MEMO_HIT", fragment_name)
+                record_run(fragment_name, fragment_scoped_run, None, memo_hit=True)
+            else:
+                started = time.perf_counter()
+                runtime.run_seq = next(_RUN_SEQ)
+                try:
+                    result = func(*args, **kwargs)
+                    if memo_key:
+                        _memo_store(frag_state, memo_key, result, memo_size)
+                except Exception as e:
+                    st.error(f"Error en fragmento **{fragment_name}**: {e}")
+                    result = None
+                duration_ms = (time.perf_counter() - started) * 1000
+                record_run(fragment_name, fragment_scoped_run, duration_ms)
+                _trace(
+                    "EXEC", fragment_name,
+                    "fragment-scoped" if fragment_scoped_run else "full-script",
+                    duration_ms=duration_ms,
+                )
 
-            # Ejecuta la función del fragmento
-            try:
-                result = func(*args, **kwargs)
-            except Exception as e:
-                st.error(f"Error en fragmento **{fragment_name}**: {e}")
-                result = None
+            if render is not None:
+                try:
+                    render(result)
+                except Exception as e:
+                    st.error(f"Error en render de **{fragment_name}**: {e}")
 
             # Termina ejecución
             graph_state['executing'].discard(fragment_name)
@@ -604,11 +1716,17 @@ def reactlit_fragment(
             if fragment_scoped_run:
                 after_state = _snapshot_session_state(watched_keys) if watched_keys else {}
                 changed_state_keys = _changed_keys_from_snapshots(before_state, after_state)
-                if changed_state_keys:
-                    _log(f"[STATE_CHANGED] {fragment_name}: {sorted(changed_state_keys)}")
-                    _enqueue_fragments_for_state_changes(fragment_name, changed_state_keys)
+                if changed_state_keys or source_changed:
+                    enqueued = 0
+                    if changed_state_keys:
+                        _trace("STATE_CHANGED", fragment_name, f"{sorted(changed_state_keys)}")
+                        enqueued += _enqueue_fragments_for_state_changes(fragment_name, changed_state_keys)
                     # Mantener también la cascada por arista de fragmentos declaradas
-                    _enqueue_dependents(fragment_name, _GLOBAL_GRAPH, reason="state changed")
+                    enqueued += _enqueue_dependents(
+                        fragment_name, get_app_graph().graph,
+                        reason="state changed" if changed_state_keys else "source changed",
+                    )
+                    record_fan_out(fragment_name, enqueued)
 
             # -- EFECTO DOMINÓ: dispara el siguiente fragmento pendiente ──────
             if fragment_scoped_run:
@@ -630,7 +1748,21 @@ def register_dependency(fragment: str, depends_on: str) -> None:
     Registra que `fragment` depende de `depends_on`.
     Crea un edge en el grafo: depends_on → fragment.
     """
-    _GLOBAL_GRAPH.add_dependency(fragment, depends_on)
+    fragments = _latest_app_graph().graph.fragments
+    if fragment not in fragments or depends_on not in fragments:
+        return
+    if fragment in fragments[depends_on].dependents:
+        return
+
+    def mutate(draft: CompiledAppGraph) -> bool:
+        if fragment in draft.graph.fragments[depends_on].dependents:
+            return False
+        draft.own_fragment(fragment)
+        draft.own_fragment(depends_on)
+        draft.graph.add_dependency(fragment, depends_on)
+        return True
+
+    _update_app_graph(mutate)
 
 
 def register_dependencies(fragment: str, dependencies: list[str]) -> None:
@@ -644,20 +1776,25 @@ def register_dependencies(fragment: str, dependencies: list[str]) -> None:
 # =============================================================================
 
 def get_fragment_metadata(fragment_name: str) -> Optional[FragmentMetadata]:
-    return _GLOBAL_REGISTRY.get(fragment_name)
+    return get_app_graph().registry.get(fragment_name)
+
+
+def get_fragment_runtime(fragment_name: str) -> Optional[FragmentRuntime]:
+    """fragment_id y delta_path del fragmento en la sesión actual"""
+    return _get_session_graph()['runtime'].get(fragment_name)
 
 
 def get_all_fragments() -> dict[str, FragmentMetadata]:
-    return _GLOBAL_REGISTRY.copy()
+    return get_app_graph().registry.copy()
 
 
 def get_dependency_chain(fragment_name: str) -> list[str]:
     """Retorna la cadena BFS de dependientes de un fragmento"""
-    return _GLOBAL_GRAPH.get_dependents_chain(fragment_name)
+    return get_app_graph().graph.get_dependents_chain(fragment_name)
 
 
 def has_dependency_cycle(fragment_name: str) -> bool:
-    return _GLOBAL_GRAPH.has_cycle(fragment_name)
+    return get_app_graph().graph.has_cycle(fragment_name)
 
 
 # =============================================================================
@@ -670,22 +1807,32 @@ def debug_dependency_graph() -> None:
         graph_state = _get_session_graph()
 
         st.write("**Fragmentos registrados:**")
-        for name, meta in _GLOBAL_REGISTRY.items():
-            has_cycle = _GLOBAL_GRAPH.has_cycle(name)
+        app = get_app_graph()
+        analysis = app.graph.analysis()
+        for name, meta in app.registry.items():
+            has_cycle = name in analysis.cyclic
             cols = st.columns([2, 2, 2, 1])
-            cols[0].write(f"**{name}**")
+            cols[0].write(f"**{name}** · L{analysis.levels.get(name, 0)}")
             cols[1].write(f"deps: {meta.dependencies or '—'}")
             cols[2].write(f"dependents: {meta.dependents or '—'}")
             cols[3].write("⚠️ cycle" if has_cycle else "✅")
 
+        st.write("**Dirty:**", _get_fragment_states().dirty_fragments() or "—")
         st.write("**Cola de reruns:**", graph_state['rerun_queue'] or "vacía")
         st.write("**Ejecutando:**", graph_state['executing'] or "—")
+        st.write("**Batch en vuelo:**", list(graph_state['in_flight']) or "—")
+        st.write("**Diferidos:**", {
+            name: f"cascada #{cascade_id}"
+            for name, cascade_id in graph_state['deferred'].items()
+        } or "—")
         st.write("**Global reruns:**", graph_state['global_rerun_count'])
         st.write("**Ciclo detectado:**", graph_state['cycle_detected'])
 
-        st.write("**Logs recientes:**")
-        for log in st.session_state.get('_reactive_framework_log', [])[-20:]:
-            st.text(log)
+        st.write("**Métricas por fragmento:**")
+        render_metrics_panel()
+
+        st.write("**Timeline de cascadas:**")
+        render_trace_timeline(get_tracer())
 
 
 def reset_reactive_state() -> None:
@@ -693,8 +1840,10 @@ def reset_reactive_state() -> None:
     Limpia TODO el estado reactivo incluyendo el flag de global rerun.
     Usar para testing o para reset manual por el usuario.
     """
+    if '_reactive_graph_state' in st.session_state:
+        _cancel_deferred_reruns(st.session_state._reactive_graph_state)
     for key in list(st.session_state.keys()):
-        if key.startswith(('_reactive_', '_fragment_state_')):
+        if key.startswith('_reactive_'):
             del st.session_state[key]
 
 
@@ -710,6 +1859,21 @@ def set_fragment_dirty(fragment_name: str, dirty: bool = True) -> None:
     _get_or_init_fragment_state(fragment_name)['is_dirty'] = dirty
 
 
+def set_cascade_batch_mode(mode: str = 'cascade') -> None:
+    """
+    Define cómo se disparan las cascadas en la sesión actual.
+    Solo afecta a las aristas declaradas; las cascadas por state keys siempre
+    se disparan un nivel por rerun.
+
+    Args:
+        mode: 'cascade' envía todo el dirty set en un único rerun;
+              'level' envía un rerun por cada nivel topológico.
+    """
+    if mode not in ('cascade', 'level'):
+        raise ValueError(f"Invalid batch mode: {mode!r} (expected 'cascade' or 'level')")
+    _get_session_graph()['batch_mode'] = mode
+
+
 def enqueue_fragment_rerun(fragment_name: str, reason: str = "") -> None:
     """Encola manualmente un fragmento para rerun y dispara el dominó"""
     _queue_fragment_rerun(fragment_name, reason)
@@ -718,5 +1882,5 @@ def enqueue_fragment_rerun(fragment_name: str, reason: str = "") -> None:
 
 def manually_trigger_rerun_cascade(root_fragment: str) -> None:
     """Encola todos los dependientes de root_fragment y dispara el dominó"""
-    _enqueue_dependents(root_fragment, _GLOBAL_GRAPH, reason="manual cascade")
+    _enqueue_dependents(root_fragment, get_app_graph().graph, reason="manual cascade")
     _fire_next_in_queue()
@@ -0,0 +1,232 @@
+"""
+Reactive Resources
+==================
+
+Carga de datos fuera del hilo del script para fragmentos reactivos.
+
+Un fragmento declara un loader (función bloqueante o corutina) con
+use_resource. El framework lo ejecuta en un ThreadPoolExecutor acotado y,
+mientras está pendiente, el fragmento muestra un placeholder (por defecto
+un st_skeleton). Cuando el resultado llega se pide el rerun del fragmento,
+que esta vez encuentra el valor listo.
+
+Como cada fragmento lanza su loader y termina sin esperar, los fragmentos
+independientes de una página cargan en paralelo.
+
+Uso:
+    from streamlit_plugins.framework.reactlit import reactlit_fragment, use_resource
+
+    @reactlit_fragment(dependencies=['region'])
+    def sales_chart():
+        sales = use_resource('sales', load_sales, st.session_state.region)
+        if sales.ready:
+            st.line_chart(sales.value)
+"""
+
+import asyncio
+import inspect
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Union
+
+import streamlit as st
+
+from .reactlit import _get_current_fragment_id, _structural_hash, _trace, _UnhashableValue
+from .session_bridge import SessionHandle
+
+
+class Resource:
+    """Estado de un recurso en la sesión"""
+    __slots__ = ('key', 'status', 'value', 'error', 'duration_ms', 'future', 'notified')
+
+    def __init__(self, key: str):
+        self.key = key
+        self.status = 'pending'        # 'pending' | 'ready' | 'error'
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.duration_ms: Optional[float] = None
+        self.future: Optional[Future] = None
+        self.notified = False          # Si ya se registró en el tracer que está listo
+
+    @property
+    def pending(self) -> bool:
+        return self.status == 'pending'
+
+    @property
+    def ready(self) -> bool:
+        return self.status == 'ready'
+
+    def __repr__(self) -> str:
+        return f"Resource(status={self.status!r}, key={self.key!r})"
+
+
+# =============================================================================
+# ⚙️ EXECUTOR
+# =============================================================================
+
+_RESOURCES_CONFIG = {
+    'max_workers': 8,
+}
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def configure_resources(max_workers: int = 8) -> None:
+    """
+    Fija el tamaño del pool compartido por todas las sesiones.
+    Los loaders ya lanzados terminan en el pool anterior.
+    """
+    global _EXECUTOR
+
+    if max_workers <= 0:
+        raise ValueError(f"max_workers must be positive, got {max_workers}")
+    with _EXECUTOR_LOCK:
+        _RESOURCES_CONFIG['max_workers'] = max_workers
+        if _EXECUTOR is not None:
+            _EXECUTOR.shutdown(wait=False)
+            _EXECUTOR = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=_RESOURCES_CONFIG['max_workers'],
+                thread_name_prefix="reactlit-resource",
+            )
+        return _EXECUTOR
+
+
+def _run_loader(loader: Callable, args: tuple, kwargs: dict) -> tuple[Any, float]:
+    """Ejecuta el loader (bloqueante o corutina) y mide su duración"""
+    started = time.perf_counter()
+    if inspect.iscoroutinefunction(loader):
+        value = asyncio.run(loader(*args, **kwargs))
+    else:
+        value = loader(*args, **kwargs)
+    return value, (time.perf_counter() - started) * 1000
+
+
+def _is_current(name: str, resource: Resource, handle: Optional[SessionHandle]) -> bool:
+    """
+    True si resource sigue siendo el recurso name de la sesión. Se busca al
+    terminar la carga: si cambiaron los argumentos (o se reseteó la sesión)
+    session_state guarda otro Resource y este resultado ya no se muestra.
+    """
+    session_state = handle.session_state if handle is not None else None
+    if session_state is None:
+        return True  # Sin sesión no hay rerun que ahorrar
+    try:
+        return session_state['_reactive_resources'].get(name) is resource
+    except KeyError:
+        return False
+
+
+def _on_loaded(
+    name: str,
+    resource: Resource,
+    future: Future,
+    handle: Optional[SessionHandle],
+    fragment_id: Optional[str],
+) -> None:
+    """Callback del pool: guarda el resultado y pide el rerun del fragmento"""
+    if future.cancelled() or not _is_current(name, resource, handle):
+        return  # Recurso sustituido por una carga más nueva
+
+    error = future.exception()
+    if error is None:
+        resource.value, resource.duration_ms = future.result()
+        resource.status = 'ready'
+    else:
+        resource.error = error
+        resource.status = 'error'
+
+    if handle is not None and fragment_id is not None:
+        handle.request_fragment_rerun([fragment_id])
+
+
+# =============================================================================
+# 📦 USE RESOURCE
+# =============================================================================
+
+def _session_resources() -> dict[str, Resource]:
+    if '_reactive_resources' not in st.session_state:
+        st.session_state._reactive_resources = {}
+    return st.session_state._reactive_resources
+
+
+def _default_placeholder() -> None:
+    try:
+        from streamlit_plugins.components.skeleton import st_skeleton
+    except ImportError:
+        st.caption("Cargando…")
+        return
+    st_skeleton(height=160)
+
+
+def use_resource(
+    name: str,
+    loader: Callable,
+    *args,
+    placeholder: Union[Callable[[], None], bool, None] = True,
+    **kwargs,
+) -> Resource:
+    """
+    Obtiene un recurso de la sesión, lanzando su carga en background si hace falta.
+
+    El recurso se identifica por name y se recarga cuando cambian los
+    argumentos (hash estructural). Mientras está pendiente se muestra el
+    placeholder y, al terminar, se rerunnea el fragmento que lo pidió.
+    Fuera de un fragmento el valor aparece en el siguiente rerun.
+
+    Args:
+        name: Identificador del recurso dentro de la sesión
+        loader: Función bloqueante o corutina que obtiene los datos
+        *args, **kwargs: Argumentos del loader (forman parte de la clave)
+        placeholder: True para el skeleton por defecto, False/None para no
+            mostrar nada, o una función que pinta el placeholder
+    """
+    try:
+        key = _structural_hash((args, kwargs))
+    except _UnhashableValue as e:
+        raise TypeError(f"Arguments of resource {name!r} are not hashable: {e}") from e
+
+    resources = _session_resources()
+    resource = resources.get(name)
+
+    if resource is None or resource.key != key:
+        if resource is not None and resource.future is not None:
+            resource.future.cancel()
+
+        resource = Resource(key)
+        resources[name] = resource
+        future = _get_executor().submit(_run_loader, loader, args, kwargs)
+        resource.future = future
+        handle = SessionHandle.capture()
+        fragment_id = _get_current_fragment_id()
+        future.add_done_callback(lambda f: _on_loaded(name, resource, f, handle, fragment_id))
+        _trace("RESOURCE_LOAD", detail=name)
+
+    if resource.pending:
+        if placeholder is True:
+            _default_placeholder()
+        elif callable(placeholder):
+            placeholder()
+    elif not resource.notified:
+        resource.notified = True
+        if resource.ready:
+            _trace("RESOURCE_READY", detail=name, duration_ms=resource.duration_ms)
+        else:
+            _trace("RESOURCE_ERROR", detail=f"{name}: {resource.error}")
+
+    return resource
+
+
+def invalidate_resource(name: str) -> None:
+    """Descarta el valor del recurso para que se recargue en el próximo uso"""
+    resource = _session_resources().pop(name, None)
+    if resource is not None and resource.future is not None:
+        resource.future.cancel()
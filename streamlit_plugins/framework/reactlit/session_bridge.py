@@ -0,0 +1,129 @@
+"""
+Session Bridge
+==============
+
+Permite pedir reruns de fragmentos de una sesión desde hilos que no son el
+del script (timers de debounce, loaders en background, fuentes compartidas).
+
+Se captura un SessionHandle en el hilo del script y, más tarde, desde
+cualquier hilo se solicita el rerun:
+1. Si el ScriptRunner de la sesión sigue vivo, mediante su ScriptRequests
+   (el mismo mecanismo que _trigger_fragment_rerun; es thread-safe).
+2. Si ya terminó, mediante la AppSession en su event loop, que crea un
+   ScriptRunner nuevo con el mismo RerunData fragment-scoped.
+
+NO usa API pública. Es intencional.
+"""
+
+import logging
+from typing import Any, Optional
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx, RerunData
+
+logger = logging.getLogger(__name__)
+
+
+class SessionHandle:
+    """Referencia a una sesión para solicitar reruns de fragmentos desde otros hilos"""
+    __slots__ = ('session_id', 'script_requests', 'page_script_hash', 'query_string', 'context_info', 'session_state')
+
+    def __init__(
+        self,
+        session_id: str,
+        script_requests: Any,
+        page_script_hash: str,
+        query_string: str = "",
+        context_info: Any = None,
+        session_state: Any = None,
+    ):
+        self.session_id = session_id
+        self.script_requests = script_requests
+        self.page_script_hash = page_script_hash
+        self.query_string = query_string
+        self.context_info = context_info
+        self.session_state = session_state  # SafeSessionState: thread-safe, vive lo que la sesión
+
+    @classmethod
+    def capture(cls, ctx: Any = None) -> Optional["SessionHandle"]:
+        """Captura la sesión actual. Debe llamarse desde el hilo del script."""
+        ctx = ctx if ctx is not None else get_script_run_ctx()
+        if ctx is None:
+            return None
+        return cls(
+            session_id=getattr(ctx, 'session_id', None),
+            script_requests=ctx.script_requests,
+            page_script_hash=ctx.page_script_hash,
+            query_string=ctx.query_string,
+            context_info=getattr(ctx, 'context_info', None),
+            session_state=getattr(ctx, 'session_state', None),
+        )
+
+    def request_fragment_rerun(self, fragment_ids: list[str]) -> bool:
+        """
+        Solicita un rerun fragment-scoped con los fragment_ids indicados.
+        Retorna True si la petición se entregó a la sesión.
+        """
+        if not fragment_ids:
+            return False
+
+        rerun_data = RerunData(
+            query_string=self.query_string,
+            page_script_hash=self.page_script_hash,
+            fragment_id_queue=list(fragment_ids),
+            is_fragment_scoped_rerun=True,
+            context_info=self.context_info,
+        )
+
+        # 1) ScriptRunner en marcha: se fusiona con la petición pendiente
+        if self.script_requests is not None and self.script_requests.request_rerun(rerun_data):
+            return True
+
+        # 2) ScriptRunner parado: se delega en la AppSession
+        session = _get_app_session(self.session_id)
+        if session is None:
+            return False
+
+        try:
+            session._call_soon_on_event_loop(lambda: _rerun_on_event_loop(session, rerun_data))
+        except Exception:
+            logger.exception("Could not schedule fragment rerun for session %s", self.session_id)
+            return False
+        return True
+
+
+def _get_app_session(session_id: str) -> Any:
+    """AppSession activa para session_id, o None si no existe"""
+    if session_id is None:
+        return None
+    try:
+        from streamlit.runtime import Runtime
+    except ImportError:
+        return None
+
+    if not Runtime.exists():
+        return None
+
+    session_mgr = getattr(Runtime.instance(), '_session_mgr', None)
+    if session_mgr is None:
+        return None
+
+    session_info = session_mgr.get_active_session_info(session_id)
+    return session_info.session if session_info is not None else None
+
+
+def _rerun_on_event_loop(session: Any, rerun_data: RerunData) -> None:
+    """Réplica de AppSession.request_rerun para un RerunData fragment-scoped"""
+    fragment_storage = getattr(session, '_fragment_storage', None)
+    if fragment_storage is not None:
+        fragment_ids = [
+            fragment_id for fragment_id in rerun_data.fragment_id_queue
+            if fragment_storage.contains(fragment_id)
+        ]
+        if not fragment_ids:
+            return
+        rerun_data.fragment_id_queue = fragment_ids
+
+    scriptrunner = getattr(session, '_scriptrunner', None)
+    if scriptrunner is not None and scriptrunner.request_rerun(rerun_data):
+        return
+    session._create_scriptrunner(rerun_data)
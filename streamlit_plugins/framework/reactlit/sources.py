@@ -0,0 +1,342 @@
+"""
+Reactive Sources
+================
+
+Fuentes de datos compartidas entre sesiones con notificación push.
+
+Un ReactiveSource vive a nivel de proceso. Un único productor en background
+(o cualquier hilo que llame a publish) actualiza su valor, y la fuente
+avisa a todas las sesiones suscritas: marca dirty sus fragmentos y les pide
+un rerun fragment-scoped. Un solo fetch sirve a N sesiones y los cambios
+llegan al publicarse, sin esperar al siguiente ciclo de polling.
+
+Para sistemas externos sin push, PollingSource hace polling adaptativo:
+compara el hash del payload con el anterior y solo publica si cambió, y
+ajusta el intervalo al ritmo de cambios observado (se espacia mientras no
+cambia nada y se acorta cuando los cambios son frecuentes).
+
+Uso:
+    from streamlit_plugins.framework.reactlit import reactive_source
+
+    prices = reactive_source('prices', producer=fetch_prices, interval_s=2.0)
+
+    @reactlit_fragment()
+    def ticker():
+        st.dataframe(prices.get())
+
+    status = polling_source('status', fetch_status, min_interval_s=1, max_interval_s=60)
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Optional
+
+from .reactlit import (
+    _flag_source_change,
+    _get_current_fragment_id,
+    _get_session_graph,
+    _structural_hash,
+    _trace,
+    _UnhashableValue,
+)
+from .session_bridge import SessionHandle
+
+logger = logging.getLogger(__name__)
+
+
+class _Subscription:
+    """
+    Fragmento de una sesión suscrito a una fuente.
+    No guarda vistas del estado de la sesión: se buscan en cada publish a
+    través del handle, porque un reset de la sesión las sustituye.
+    """
+    __slots__ = ('handle', 'fragment_id', 'fragment_name', 'run_seq', 'seen_version')
+
+    def __init__(
+        self,
+        handle: SessionHandle,
+        fragment_id: str,
+        fragment_name: Optional[str],
+        run_seq: Optional[int],
+        seen_version: int,
+    ):
+        self.handle = handle
+        self.fragment_id = fragment_id
+        self.fragment_name = fragment_name
+        self.run_seq = run_seq  # Ejecución del fragmento que llamó a get()
+        self.seen_version = seen_version
+
+
+class ReactiveSource:
+    """Valor compartido por el proceso que notifica a las sesiones suscritas"""
+
+    def __init__(
+        self,
+        name: str,
+        producer: Optional[Callable[[], Any]] = None,
+        interval_s: float = 1.0,
+        initial: Any = None,
+    ):
+        self.name = name
+        self.producer = producer
+        self.interval_s = interval_s
+        self._value = initial
+        self._version = 0
+        self._lock = threading.Lock()
+        self._subscriptions: dict[tuple[Optional[str], str], _Subscription] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, subscribe: bool = True) -> Any:
+        """
+        Valor actual. Llamado dentro de un fragmento reactivo, suscribe ese
+        fragmento de la sesión actual para que se rerunnee en cada publish.
+        """
+        with self._lock:
+            value, version = self._value, self._version
+        if subscribe:
+            self._subscribe_current_fragment(version)
+        return value
+
+    def _subscribe_current_fragment(self, version: int) -> None:
+        fragment_id = _get_current_fragment_id()
+        handle = SessionHandle.capture()
+        if fragment_id is None or handle is None:
+            return
+
+        graph_state = _get_session_graph()
+        fragment_name = graph_state['fragment_names'].get(fragment_id)
+        runtime = graph_state['runtime'].get(fragment_name) if fragment_name else None
+        run_seq = runtime.run_seq if runtime is not None else None
+        subscription = _Subscription(handle, fragment_id, fragment_name, run_seq, version)
+        with self._lock:
+            self._subscriptions[(handle.session_id, fragment_id)] = subscription
+        _trace("SOURCE", fragment_name, f"{self.name} v{version}")
+
+    def unsubscribe_session(self, session_id: Optional[str]) -> None:
+        with self._lock:
+            for key in [key for key in self._subscriptions if key[0] == session_id]:
+                del self._subscriptions[key]
+
+    def _drop(self, subscription: _Subscription) -> None:
+        key = (subscription.handle.session_id, subscription.fragment_id)
+        with self._lock:
+            # Solo si no se ha renovado entretanto con un get() más reciente
+            if self._subscriptions.get(key) is subscription:
+                del self._subscriptions[key]
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscriptions)
+
+    def publish(self, value: Any) -> int:
+        """
+        Publica un valor nuevo y pide un rerun a cada sesión suscrita
+        (un único rerun por sesión con todos sus fragmentos).
+        Retorna el número de sesiones notificadas.
+        """
+        with self._lock:
+            self._value = value
+            self._version += 1
+            version = self._version
+            by_session: dict[Optional[str], list[_Subscription]] = {}
+            for subscription in self._subscriptions.values():
+                if subscription.seen_version < version:
+                    by_session.setdefault(subscription.handle.session_id, []).append(subscription)
+
+        notified = 0
+        for session_id, subscriptions in by_session.items():
+            live: list[_Subscription] = []
+            for subscription in subscriptions:
+                subscription.seen_version = version
+                # El rerun del fragmento propagará la cascada a sus dependientes
+                if subscription.fragment_name is not None and not _flag_source_change(
+                    subscription.handle.session_state, subscription.fragment_name, subscription.run_seq
+                ):
+                    # Su última ejecución ya no leyó la fuente
+                    self._drop(subscription)
+                    continue
+                live.append(subscription)
+            if not live:
+                continue
+            fragment_ids = [subscription.fragment_id for subscription in live]
+            if live[0].handle.request_fragment_rerun(fragment_ids):
+                notified += 1
+            else:
+                # La sesión ya no existe: se descartan sus suscripciones
+                self.unsubscribe_session(session_id)
+        return notified
+
+    # -- Productor en background ------------------------------------------------
+
+    def start(self) -> None:
+        """Arranca el hilo productor (idempotente)"""
+        if self.producer is None:
+            raise ValueError(f"Source {self.name!r} has no producer")
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run_producer,
+                name=f"reactlit-source-{self.name}",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run_producer(self) -> None:
+        while not self._stop.is_set():
+            delay_s = self.interval_s
+            try:
+                delay_s = self._poll_once()
+            except Exception:
+                logger.exception("Producer of reactive source %r failed", self.name)
+            self._stop.wait(delay_s)
+
+    def _poll_once(self) -> float:
+        """Una iteración del productor. Retorna la espera hasta la siguiente."""
+        self.publish(self.producer())
+        return self.interval_s
+
+
+class PollingSource(ReactiveSource):
+    """
+    Fuente que hace polling de un sistema externo con intervalo adaptativo.
+
+    Cada poll calcula el hash estructural del payload y solo publica (marca
+    dirty y rerunnea suscriptores y su cascada) si cambió. Sin cambios, el
+    intervalo se multiplica por backoff hasta max_interval_s; con cambios se
+    multiplica por tighten hasta min_interval_s.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        producer: Callable[[], Any],
+        min_interval_s: float = 1.0,
+        max_interval_s: float = 60.0,
+        backoff: float = 2.0,
+        tighten: float = 0.5,
+        initial: Any = None,
+    ):
+        if not 0 < min_interval_s <= max_interval_s:
+            raise ValueError(
+                f"Expected 0 < min_interval_s <= max_interval_s, got {min_interval_s} and {max_interval_s}"
+            )
+        if backoff < 1 or not 0 < tighten <= 1:
+            raise ValueError(f"Expected backoff >= 1 and 0 < tighten <= 1, got {backoff} and {tighten}")
+        super().__init__(name, producer=producer, interval_s=min_interval_s, initial=initial)
+        self.min_interval_s = min_interval_s
+        self.max_interval_s = max_interval_s
+        self.backoff = backoff
+        self.tighten = tighten
+        self.polls = 0
+        self.changes = 0
+        self._payload_hash: Optional[str] = None
+
+    def _payload_key(self, value: Any) -> Optional[str]:
+        try:
+            return _structural_hash(value)
+        except _UnhashableValue:
+            return None  # No comparable: cada poll cuenta como cambio
+
+    def _poll_once(self) -> float:
+        value = self.producer()
+        payload_hash = self._payload_key(value)
+        self.polls += 1
+
+        if payload_hash is not None and payload_hash == self._payload_hash:
+            self.interval_s = min(self.max_interval_s, self.interval_s * self.backoff)
+        else:
+            self._payload_hash = payload_hash
+            self.changes += 1
+            self.interval_s = max(self.min_interval_s, self.interval_s * self.tighten)
+            self.publish(value)
+        return self.interval_s
+
+    @property
+    def change_rate(self) -> float:
+        """Fracción de polls que trajeron datos nuevos"""
+        return self.changes / self.polls if self.polls else 0.0
+
+
+# =============================================================================
+# ⚙️ REGISTRO
+# =============================================================================
+
+_SOURCES: dict[str, ReactiveSource] = {}
+_SOURCES_LOCK = threading.Lock()
+
+
+def reactive_source(
+    name: str,
+    producer: Optional[Callable[[], Any]] = None,
+    interval_s: float = 1.0,
+    initial: Any = None,
+) -> ReactiveSource:
+    """
+    Obtiene o crea la fuente compartida name. Es seguro llamarla en cada
+    rerun: la fuente y su productor se crean una sola vez por proceso.
+    """
+    return _get_or_create_source(
+        name,
+        lambda: ReactiveSource(name, producer=producer, interval_s=interval_s, initial=initial),
+    )
+
+
+def polling_source(
+    name: str,
+    producer: Callable[[], Any],
+    min_interval_s: float = 1.0,
+    max_interval_s: float = 60.0,
+    backoff: float = 2.0,
+    tighten: float = 0.5,
+    initial: Any = None,
+) -> PollingSource:
+    """
+    Obtiene o crea la fuente de polling adaptativo name. Los polls que
+    devuelven el mismo payload no disparan reruns ni cascadas.
+    """
+    return _get_or_create_source(
+        name,
+        lambda: PollingSource(
+            name,
+            producer,
+            min_interval_s=min_interval_s,
+            max_interval_s=max_interval_s,
+            backoff=backoff,
+            tighten=tighten,
+            initial=initial,
+        ),
+    )
+
+
+def _get_or_create_source(name: str, factory: Callable[[], ReactiveSource]) -> Any:
+    with _SOURCES_LOCK:
+        source = _SOURCES.get(name)
+        if source is None:
+            source = factory()
+            _SOURCES[name] = source
+    if source.producer is not None:
+        source.start()
+    return source
+
+
+def get_source(name: str) -> Optional[ReactiveSource]:
+    return _SOURCES.get(name)
+
+
+def stop_all_sources() -> None:
+    """Detiene los productores y olvida las fuentes registradas"""
+    with _SOURCES_LOCK:
+        for source in _SOURCES.values():
+            source.stop()
+        _SOURCES.clear()
@@ -16,6 +16,7 @@ from streamlit_plugins.framework.reactlit import (
     has_dependency_cycle,
     reset_reactive_state,
     get_fragment_state,
+    set_fragment_dirty,
     enqueue_fragment_rerun,
     DependencyGraph,
     FragmentMetadata,
@@ -105,6 +106,87 @@ def test_cycle_detection_with_cycle():
     assert graph.has_cycle("a")
 
 
+def test_graph_analysis_sccs_and_cache():
+    """Test que el análisis SCC se cachea por generación y detecta ciclos"""
+    graph = DependencyGraph()
+
+    # A → B → C → B (ciclo B-C), C → D
+    for name in ["a", "b", "c", "d"]:
+        graph.add_fragment(FragmentMetadata(name=name, func=lambda: None))
+
+    graph.add_dependency("b", "a")
+    graph.add_dependency("c", "b")
+    graph.add_dependency("b", "c")
+    graph.add_dependency("d", "c")
+
+    analysis = graph.analysis()
+    assert analysis.cyclic == {"b", "c"}
+    assert frozenset({"b", "c"}) in analysis.components
+    assert analysis.levels == {"a": 0, "b": 1, "c": 1, "d": 2}
+    assert not graph.has_cycle("a")
+    assert graph.has_cycle("c")
+
+    # Sin mutaciones el análisis se reutiliza
+    assert graph.analysis() is analysis
+    graph.add_dependency("d", "c")  # Arista ya existente
+    assert graph.analysis() is analysis
+
+    graph.add_fragment(FragmentMetadata(name="e", func=lambda: None))
+    assert graph.analysis() is not analysis
+
+
+def test_graph_tracks_cycles_incrementally():
+    """Test que la detección incremental de ciclos coincide con el análisis completo"""
+    import random
+
+    rng = random.Random(7)
+    for _ in range(50):
+        graph = DependencyGraph()
+        names = [f"n{i}" for i in range(8)]
+        for _ in range(12):
+            name = rng.choice(names)
+            if rng.random() < 0.5:
+                dependents = set(rng.sample(names, rng.randint(0, 2)))
+                graph.add_fragment(FragmentMetadata(name=name, func=lambda: None, dependents=dependents))
+            else:
+                graph.add_dependency(name, rng.choice(names))
+            assert graph.get_cycle_fragments() == graph._analyze().cyclic
+
+
+def test_order_by_level():
+    """Test que el dirty set se ordena por nivel topológico"""
+    graph = DependencyGraph()
+
+    # Diamante: A → B, A → C, B → D, C → D
+    for name in ["a", "b", "c", "d"]:
+        graph.add_fragment(FragmentMetadata(name=name, func=lambda: None))
+
+    graph.add_dependency("b", "a")
+    graph.add_dependency("c", "a")
+    graph.add_dependency("d", "b")
+    graph.add_dependency("d", "c")
+
+    levels = graph.get_levels()
+    assert levels == {"a": 0, "b": 1, "c": 1, "d": 2}
+    assert graph.order_by_level(["d", "c", "a", "b"]) == ["a", "c", "b", "d"]
+
+
+def test_schedule_by_priority_respects_dependencies():
+    """Test que la prioridad adelanta fragmentos sin romper el orden de dependencias"""
+    graph = DependencyGraph()
+
+    # slow → table, kpi independiente
+    for name in ["slow", "table", "kpi"]:
+        graph.add_fragment(FragmentMetadata(name=name, func=lambda: None))
+    graph.add_dependency("table", "slow")
+
+    assert graph.schedule(["table", "slow", "kpi"], {"kpi": 10}) == ["kpi", "slow", "table"]
+    # Aunque table tenga más prioridad, no puede ir antes que slow
+    assert graph.schedule(["table", "slow", "kpi"], {"table": 10}) == ["slow", "table", "kpi"]
+    # Sin prioridades distintas se mantiene el orden por nivel
+    assert graph.schedule(["table", "kpi", "slow"], {}) == graph.order_by_level(["table", "kpi", "slow"])
+
+
 # =============================================================================
 # 🧪 TEST: Fragment Metadata
 # =============================================================================
@@ -125,7 +207,9 @@ def test_fragment_metadata_initialization():
     assert meta.func == dummy
     assert "dep1" in meta.dependencies
     assert "dep3" in meta.dependents
-    assert meta.is_dirty is False
+    # El estado de cada sesión (dirty, fragment_id, delta_path) no vive en la declaración
+    assert not hasattr(meta, "is_dirty")
+    assert not hasattr(meta, "fragment_id")
 
 
 # =============================================================================
@@ -191,6 +275,245 @@ def test_param_change_detection():
     assert 'b' in changed2
 
 
+def test_state_key_subscribers_index(monkeypatch):
+    """Test que el índice invertido encola solo los suscriptores de las keys cambiadas"""
+    from streamlit_plugins.framework.reactlit import reactlit
+
+    monkeypatch.setattr(reactlit, "_APP", reactlit.CompiledAppGraph())
+    reset_reactive_state()
+
+    for name, deps in (("by_region", {"region"}), ("by_date", {"date"}), ("by_both", {"region", "date"})):
+        reactlit._register_fragment(FragmentMetadata(name=name, func=lambda: None, dependencies=deps))
+
+    assert reactlit._all_dependency_keys() == {"region", "date"}
+    assert reactlit.get_app_graph().key_subscribers["region"] == {"by_region", "by_both"}
+
+    reactlit._enqueue_fragments_for_state_changes("by_region", {"region"})
+    assert reactlit._get_session_graph()['rerun_queue'] == ["by_both"]
+
+    # Re-decorar con otras dependencias retira las suscripciones previas
+    reactlit._register_fragment(FragmentMetadata(name="by_both", func=lambda: None, dependencies={"date"}))
+    assert reactlit.get_app_graph().key_subscribers["region"] == {"by_region"}
+
+
+def test_app_graph_is_copy_on_write(monkeypatch):
+    """Test que re-decorar con la misma declaración no publica una versión nueva"""
+    from streamlit_plugins.framework.reactlit import reactlit
+
+    monkeypatch.setattr(reactlit, "_APP", reactlit.CompiledAppGraph())
+
+    reactlit._register_fragment(FragmentMetadata(name="a", func=lambda: None, dependencies={"k"}))
+    reactlit._register_fragment(FragmentMetadata(name="b", func=lambda: None))
+    reactlit.register_dependency("b", "a")
+    published = reactlit.get_app_graph()
+
+    # Rerun del script: mismas declaraciones y aristas
+    reactlit._register_fragment(FragmentMetadata(name="a", func=lambda: None, dependencies={"k"}))
+    reactlit.register_dependency("b", "a")
+    assert reactlit.get_app_graph() is published
+
+    # Un cambio publica una versión nueva sin tocar la anterior
+    reactlit._register_fragment(FragmentMetadata(name="c", func=lambda: None))
+    reactlit.register_dependency("c", "b")
+    assert reactlit.get_app_graph().version > published.version
+    assert "c" not in published.graph.fragments["b"].dependents
+    assert reactlit.get_app_graph().graph.get_dependents_chain("a") == ["b", "c"]
+
+
+def test_app_graph_registration_is_linear(monkeypatch):
+    """Test que declarar n fragmentos y aristas seguidos compila el grafo una sola vez"""
+    from streamlit_plugins.framework.reactlit import reactlit
+
+    monkeypatch.setattr(reactlit, "_APP", reactlit.CompiledAppGraph())
+    calls = {"clone": 0, "compile": 0, "replace": 0}
+
+    def counting(name, original):
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return original(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(reactlit.CompiledAppGraph, "clone", counting("clone", reactlit.CompiledAppGraph.clone))
+    monkeypatch.setattr(reactlit.CompiledAppGraph, "compile", counting("compile", reactlit.CompiledAppGraph.compile))
+    monkeypatch.setattr(reactlit, "replace", counting("replace", reactlit.replace))
+
+    size = 200
+    for i in range(size):
+        reactlit._register_fragment(FragmentMetadata(name=f"lin_{i}", func=lambda: None, dependencies={f"k{i}"}))
+    for i in range(1, size):
+        reactlit.register_dependency(f"lin_{i}", f"lin_{i - 1}")
+
+    # Nada se compila hasta la primera lectura, y cada metadato se copia una vez
+    assert calls == {"clone": 1, "compile": 0, "replace": size}
+    app = reactlit.get_app_graph()
+    assert calls == {"clone": 1, "compile": 1, "replace": size}
+    assert app.version == 1
+    assert len(app.key_subscribers) == size
+    assert app.graph.get_levels()[f"lin_{size - 1}"] == size - 1
+
+    # Una arista nueva sobre la versión publicada solo copia sus dos extremos
+    reactlit._register_fragment(FragmentMetadata(name="lin_extra", func=lambda: None))
+    reactlit.register_dependency("lin_extra", "lin_0")
+    assert calls["replace"] == size + 2
+    assert "lin_extra" not in app.graph.fragments["lin_0"].dependents
+    assert "lin_extra" in reactlit.get_app_graph().graph.get_dependents_chain("lin_0")
+
+
+def test_observable_state_detects_in_place_mutation():
+    """Test que mutate_state detecta mutaciones in-place por revisión"""
+    from streamlit_plugins.framework.reactlit.reactlit import (
+        _snapshot_session_state,
+        _changed_keys_from_snapshots,
+        mutate_state,
+        set_state,
+        get_state_revision,
+    )
+
+    reset_reactive_state()
+    set_state('items', [1, 2])
+    revision = get_state_revision('items')
+
+    before = _snapshot_session_state({'items'})
+    with mutate_state('items') as items:
+        items.append(3)
+    after = _snapshot_session_state({'items'})
+
+    assert get_state_revision('items') > revision
+    assert _changed_keys_from_snapshots(before, after) == {'items'}
+    assert _changed_keys_from_snapshots(after, _snapshot_session_state({'items'})) == set()
+
+
+def test_plain_write_after_observable_write_is_detected():
+    """Test que una escritura directa tras set_state sigue detectándose como cambio"""
+    from streamlit_plugins.framework.reactlit.reactlit import (
+        _snapshot_session_state,
+        _changed_keys_from_snapshots,
+        set_state,
+        get_state_revision,
+    )
+
+    reset_reactive_state()
+    set_state('threshold', 10)
+
+    before = _snapshot_session_state({'threshold'})
+    st.session_state['threshold'] = 20
+    after = _snapshot_session_state({'threshold'})
+
+    assert _changed_keys_from_snapshots(before, after) == {'threshold'}
+    assert get_state_revision('threshold') == 0
+    # Ya sin revisión, el diff vuelve a ser por valor
+    st.session_state['threshold'] = 30
+    assert _changed_keys_from_snapshots(after, _snapshot_session_state({'threshold'})) == {'threshold'}
+
+    # Una nueva escritura con la API vuelve a usar la revisión
+    set_state('threshold', 40)
+    current = _snapshot_session_state({'threshold'})
+    assert get_state_revision('threshold') > 0
+    assert _changed_keys_from_snapshots(current, _snapshot_session_state({'threshold'})) == set()
+
+
+def test_snapshot_diff_with_ambiguous_values():
+    """Test que comparar valores con igualdad ambigua no lanza excepción"""
+    import numpy as np
+    from streamlit_plugins.framework.reactlit.reactlit import _changed_keys_from_snapshots
+
+    array = np.arange(3)
+    assert _changed_keys_from_snapshots({'arr': array}, {'arr': array}) == set()
+    assert _changed_keys_from_snapshots({'arr': array}, {'arr': np.arange(3)}) == {'arr'}
+
+
+def test_structural_hash_and_memo_lru():
+    """Test hash estructural de DataFrames/ndarrays y LRU de memo"""
+    import numpy as np
+    import pandas as pd
+    from streamlit_plugins.framework.reactlit.reactlit import (
+        _structural_hash,
+        _memo_lookup,
+        _memo_store,
+    )
+
+    df = pd.DataFrame({'a': [1, 2], 'b': ['x', 'y']})
+    assert _structural_hash({'df': df}) == _structural_hash({'df': df.copy()})
+    assert _structural_hash({'df': df}) != _structural_hash({'df': df.assign(a=[1, 3])})
+    assert _structural_hash(np.arange(4)) == _structural_hash(np.arange(4))
+    assert _structural_hash(np.arange(4)) != _structural_hash(np.arange(4).astype(float))
+
+    frag_state = {}
+    _memo_store(frag_state, 'k1', 1, max_size=2)
+    _memo_store(frag_state, 'k2', 2, max_size=2)
+    assert _memo_lookup(frag_state, 'k1') == (True, 1)
+    _memo_store(frag_state, 'k3', 3, max_size=2)
+
+    # k2 era el menos usado recientemente
+    assert _memo_lookup(frag_state, 'k2') == (False, None)
+    assert _memo_lookup(frag_state, 'k1') == (True, 1)
+
+
+def test_memo_fragment_miss_then_hit():
+    """Test que el wrapper calcula en el primer render y reutiliza el memo después"""
+    def app():
+        import streamlit as st
+        from streamlit_plugins.framework.reactlit import reactlit_fragment
+
+        st.session_state.setdefault('calls', 0)
+        st.session_state.setdefault('rendered', [])
+
+        def show(total):
+            st.session_state.rendered.append(total)
+
+        @reactlit_fragment(dependencies=['region'], memo=True, render=show)
+        def sales(factor):
+            st.session_state.calls += 1
+            return factor * len(st.session_state.region)
+
+        st.session_state.setdefault('region', 'EU')
+        st.button("rerun")
+        sales(10)
+
+    at = AppTest.from_function(app).run()
+    assert not at.exception
+    assert at.session_state.calls == 1 and at.session_state.rendered == [20]
+
+    # Mismos parámetros y dependencias: memo hit, render sí se ejecuta
+    at.button[0].click().run()
+    assert at.session_state.calls == 1 and at.session_state.rendered == [20, 20]
+
+    # Cambia la dependencia: memo miss
+    at.session_state.region = 'LATAM'
+    at.run()
+    assert at.session_state.calls == 2 and at.session_state.rendered == [20, 20, 50]
+
+    with pytest.raises(ValueError):
+        reactlit_fragment(memo=True)
+    # Con memo_size < 1 el LRU se vaciaría al guardar: nunca habría un hit
+    for memo_size in (0, -1):
+        with pytest.raises(ValueError):
+            reactlit_fragment(memo=True, render=print, memo_size=memo_size)
+
+
+def test_call_plan_matches_inspect_binding():
+    """Test que el plan de llamada precompilado equivale a bind_partial + apply_defaults"""
+    import inspect
+    from streamlit_plugins.framework.reactlit.reactlit import _CallPlan
+
+    def simple(a, b=2, *, c=3):
+        pass
+
+    def variadic(a, *args, flag=False, **kwargs):
+        pass
+
+    cases = [
+        (simple, (1,), {}),
+        (simple, (1, 5), {'c': 7}),
+        (simple, (), {'a': 1}),
+        (variadic, (1, 2, 3), {'flag': True, 'x': 9}),
+    ]
+    for func, args, kwargs in cases:
+        bound = inspect.signature(func).bind_partial(*args, **kwargs)
+        bound.apply_defaults()
+        assert _CallPlan(func).bind(args, kwargs) == dict(bound.arguments)
+
+
 # =============================================================================
 # 🧪 TEST: Session State Management
 # =============================================================================
@@ -209,6 +532,28 @@ def test_fragment_state_initialization():
     assert 'last_rendered_params' in state
 
 
+def test_fragment_state_table_dirty_bitmap_and_reset():
+    """Test que el estado de todos los fragmentos vive en una sola key con bitmap de dirty"""
+    from streamlit_plugins.framework.reactlit import reactlit
+
+    reset_reactive_state()
+
+    set_fragment_dirty("frag_a", True)
+    set_fragment_dirty("frag_b", True)
+    set_fragment_dirty("frag_a", False)
+    reactlit._get_or_init_fragment_state("frag_c")['last_rendered_params'] = {'x': 1}
+
+    states = reactlit._get_fragment_states()
+    ordinal_b = reactlit._fragment_ordinal("frag_b")
+    assert states.dirty_ordinals() == [ordinal_b]
+    assert get_fragment_state("frag_c") == {'params': {}, 'is_dirty': False, 'last_rendered_params': {'x': 1}}
+    assert not [key for key in st.session_state.keys() if key.startswith('_fragment_state_')]
+
+    reactlit._reset_reactive_session_state()
+    assert '_reactive_fragment_states' not in st.session_state
+    assert get_fragment_state("frag_b")['is_dirty'] is False
+
+
 def test_session_graph_state():
     """Test que se gestiona estado del grafo en sesión"""
     from streamlit_plugins.framework.reactlit.reactlit import (
@@ -256,6 +601,546 @@ def test_set_fragment_dirty():
     assert state['is_dirty'] is True
 
 
+class _FakeScriptRequests:
+    def __init__(self):
+        self.requests = []
+
+    def request_rerun(self, rerun_data):
+        self.requests.append(rerun_data)
+
+
+class _FakeFragmentStorage:
+    def __init__(self, fragments):
+        self._fragments = fragments
+
+
+class _FakeCtx:
+    """Contexto mínimo para simular el fragment_storage de una sesión"""
+    def __init__(self, fragments):
+        self.fragment_storage = _FakeFragmentStorage(fragments)
+        self.script_requests = _FakeScriptRequests()
+        self.query_string = ""
+        self.page_script_hash = "hash"
+        self.cached_message_hashes = set()
+        self.context_info = None
+
+
+def test_fire_queue_batches_cascade(monkeypatch):
+    """Test que la cascada completa se envía en un único rerun ordenado por nivel"""
+    from streamlit_plugins.framework.reactlit import reactlit
+
+    reset_reactive_state()
+
+    def frag_root():
+        pass
+
+    def frag_mid():
+        pass
+
+    def frag_leaf():
+        pass
+
+    monkeypatch.setattr(reactlit, "_APP", reactlit.CompiledAppGraph())
+    for func in (frag_root, frag_mid, frag_leaf):
+        reactlit._register_fragment(FragmentMetadata(name=func.__name__, func=func))
+    reactlit.register_dependency("frag_mid", "frag_root")
+    reactlit.register_dependency("frag_leaf", "frag_mid")
+
+    ctx = _FakeCtx({"id_leaf": frag_leaf, "id_mid": frag_mid, "id_root": frag_root})
+    monkeypatch.setattr(reactlit, "get_script_run_ctx", lambda: ctx)
+
+    graph_state = reactlit._get_session_graph()
+    graph_state['rerun_queue'].extend(["frag_leaf", "frag_root", "frag_mid"])
+    reactlit._fire_next_in_queue()
+
+    assert len(ctx.script_requests.requests) == 1
+    assert ctx.script_requests.requests[0].fragment_id_queue == ["id_root", "id_mid", "id_leaf"]
+    assert graph_state['rerun_queue'] == []
+    assert list(graph_state['in_flight']) == ["frag_root", "frag_mid", "frag_leaf"]
+
+    # Con un batch en vuelo no se dispara otro rerun
+    graph_state['rerun_queue'].append("frag_root")
+    reactlit._fire_next_in_queue()
+    assert len(ctx.script_requests.requests) == 1
+
+
+def test_resolve_fragment_ids_uses_session_index(monkeypatch):
+    """Test que el índice nombre → fragment_id evita el scan del storage"""
+    from streamlit_plugins.framework.reactlit import reactlit
+
+    reset_reactive_state()
+
+    def frag_indexed():
+        pass
+
+    def frag_unseen():
+        pass
+
+    ctx = _FakeCtx({"id_anon": lambda: None, "id_unseen": frag_unseen})
+    reactlit._record_fragment_id("frag_indexed", "id_anon")
+
+    scanned = []
+    original = reactlit._candidate_fragment_names
+
+    def tracking_candidates(wrapper):
+        scanned.append(wrapper)
+        return original(wrapper)
+
+    monkeypatch.setattr(reactlit, "_candidate_fragment_names", tracking_candidates)
+
+    resolved = reactlit._resolve_fragment_ids(ctx, ["frag_indexed"])
+    assert resolved == {"frag_indexed": "id_anon"}
+    assert scanned == []
+
+    # Un fragmento nunca visto cae al scan y queda indexado
+    resolved = reactlit._resolve_fragment_ids(ctx, ["frag_unseen"])
+    assert resolved == {"frag_unseen": "id_unseen"}
+    assert reactlit.get_fragment_runtime("frag_unseen").fragment_id == "id_unseen"
+
+
+def test_fragment_id_indexed_from_script_run_context():
+    """Test que el fragment_id real de Streamlit se indexa al ejecutar el fragmento"""
+    def app():
+        import streamlit as st
+        from streamlit_plugins.framework.reactlit import reactlit, reactlit_fragment
+
+        @reactlit_fragment()
+        def panel():
+            st.session_state.seen_id = reactlit._get_current_fragment_id()
+
+        panel()
+        st.session_state.indexed_id = reactlit.get_fragment_runtime("panel").fragment_id
+        st.session_state.indexed_name = reactlit._get_session_graph()['fragment_names'].get(
+            st.session_state.indexed_id
+        )
+
+    at = AppTest.from_function(app).run()
+    assert not at.exception
+    assert at.session_state.seen_id
+    assert at.session_state.indexed_id == at.session_state.seen_id
+    assert at.session_state.indexed_name == "panel"
+
+
+class _ManualTimer:
+    """Timer que solo vence cuando el test llama a fire()"""
+    created = []
+
+    def __init__(self, delay_s, function, args=()):
+        self.delay_s = delay_s
+        self.function = function
+        self.args = args
+        self.daemon = False
+        self.started = False
+        self.cancelled = False
+        _ManualTimer.created.append(self)
+
+    def start(self):
+        self.started = True
+
+    def cancel(self):
+        self.cancelled = True
+
+    def fire(self):
+        if self.started and not self.cancelled:
+            self.function(*self.args)
+
+
+def test_debounce_defers_and_coalesces_cascades(monkeypatch):
+    """Test que una cascada más nueva cancela el rerun diferido de la anterior"""
+    from streamlit_plugins.framework.reactlit import reactlit
+
+    reset_reactive_state()
+    _ManualTimer.created = []
+    monkeypatch.setattr(reactlit._DeferredRerun, "timer_factory", _ManualTimer)
+    monkeypatch.setattr(reactlit.time, "monotonic", lambda: 100.0)
+
+    def frag_chart():
+        pass
+
+    monkeypatch.setattr(reactlit, "_APP", reactlit.CompiledAppGraph())
+    reactlit._register_fragment(FragmentMetadata(name="frag_chart", func=frag_chart, debounce_ms=30))
+
+    ctx = _FakeCtx({"id_chart": frag_chart})
+    monkeypatch.setattr(reactlit, "get_script_run_ctx", lambda: ctx)
+
+    graph_state = reactlit._get_session_graph()
+    reactlit.enqueue_fragment_rerun("frag_chart")
+    # La sesión solo guarda la cascada; el timer vive en el registro del proceso
+    assert graph_state['deferred'] == {"frag_chart": 0}
+    first = reactlit._DEFERRED_RERUNS[(None, "frag_chart")]
+    assert ctx.script_requests.requests == []
+    assert first.due == pytest.approx(100.03)
+
+    # Mismo valor de cascada: ya está pendiente, no se reprograma
+    reactlit.enqueue_fragment_rerun("frag_chart")
+    assert reactlit._DEFERRED_RERUNS[(None, "frag_chart")] is first
+
+    # Nueva cascada (p. ej. el slider siguió moviéndose): se cancela el timer anterior
+    graph_state['cascade_id'] += 1
+    reactlit.enqueue_fragment_rerun("frag_chart")
+    second = reactlit._DEFERRED_RERUNS[(None, "frag_chart")]
+    assert first.cancelled and second is not first
+    assert second.cascade_id == graph_state['deferred']["frag_chart"] == graph_state['cascade_id']
+
+    first_timer, second_timer = _ManualTimer.created
+    assert first_timer.delay_s == second_timer.delay_s == pytest.approx(0.03)
+    first_timer.fire()
+    assert ctx.script_requests.requests == []
+    second_timer.fire()
+    assert [r.fragment_id_queue for r in ctx.script_requests.requests] == [["id_chart"]]
+    assert (None, "frag_chart") not in reactlit._DEFERRED_RERUNS
+
+
+def test_session_state_is_serializable_with_both_decorators(monkeypatch):
+    """Test que las dos variantes del decorador comparten la tabla y el estado reactivo se puede picklear"""
+    import pickle
+
+    from streamlit_plugins.framework.reactlit import fragment_states, reactive, reactlit
+
+    _ManualTimer.created = []
+    monkeypatch.setattr(reactive._DeferredRerun, "timer_factory", _ManualTimer)
+    monkeypatch.setattr(reactive, "_DEFERRED_RERUNS", {})
+
+    def app():
+        import streamlit as st
+        from streamlit_plugins.framework.reactlit.reactive import enqueue_fragment_rerun, reactive_fragment
+        from streamlit_plugins.framework.reactlit.reactlit import reactlit_fragment
+
+        @reactlit_fragment(dependencies=['region'])
+        def serial_table():
+            st.session_state.table_params = st.session_state.region
+
+        @reactive_fragment(dependencies=['region'], debounce_ms=50)
+        def serial_chart():
+            st.session_state.chart_runs = st.session_state.get('chart_runs', 0) + 1
+
+        st.session_state.setdefault('region', 'EU')
+        serial_table()
+        serial_chart()
+        enqueue_fragment_rerun("serial_chart")
+
+    at = AppTest.from_function(app).run()
+    assert not at.exception
+    assert reactive._fragment_ordinal is reactlit._fragment_ordinal
+    assert isinstance(at.session_state['_reactive_fragment_states'], fragment_states._FragmentStateTable)
+
+    graph_state = at.session_state['_reactive_graph_state']
+    assert graph_state['deferred'] == {"serial_chart": graph_state['cascade_id']}
+    # El timer está en el registro del proceso, indexado por la sesión
+    ((session_id, name),) = reactive._DEFERRED_RERUNS
+    assert session_id is not None and name == "serial_chart"
+    assert len(_ManualTimer.created) == 1
+
+    # Ni locks ni timers en session_state (runner.enforceSerializableSessionState)
+    for key in ('_reactive_graph_state', '_reactive_fragment_states'):
+        pickle.dumps(at.session_state[key])
+
+
+def test_throttle_delay():
+    """Test que throttle solo difiere dentro de la ventana desde la última ejecución"""
+    from streamlit_plugins.framework.reactlit import reactlit
+
+    meta = FragmentMetadata(name="frag_t", func=lambda: None, throttle_ms=100)
+    graph_state = {'last_run': {}}
+    assert reactlit._rerun_delay_ms(meta, graph_state, now=10.0) == 0
+
+    graph_state['last_run']["frag_t"] = 10.0
+    assert reactlit._rerun_delay_ms(meta, graph_state, now=10.04) == pytest.approx(60)
+    assert reactlit._rerun_delay_ms(meta, graph_state, now=10.2) == 0
+
+    with pytest.raises(ValueError):
+        reactlit_fragment(debounce_ms=10, throttle_ms=10)
+
+
+def test_lazy_when_hidden_fragment_is_not_fired(monkeypatch):
+    """Test que un fragmento lazy oculto se queda dirty en lugar de rerunnearse"""
+    from streamlit_plugins.framework.reactlit import reactlit
+
+    reset_reactive_state()
+
+    def frag_visible():
+        pass
+
+    def frag_hidden():
+        pass
+
+    monkeypatch.setattr(reactlit, "_APP", reactlit.CompiledAppGraph())
+    reactlit._register_fragment(FragmentMetadata(name="frag_visible", func=frag_visible, lazy_when_hidden=True))
+    reactlit._register_fragment(FragmentMetadata(name="frag_hidden", func=frag_hidden, lazy_when_hidden=True))
+
+    ctx = _FakeCtx({"id_visible": frag_visible, "id_hidden": frag_hidden})
+    monkeypatch.setattr(reactlit, "get_script_run_ctx", lambda: ctx)
+
+    reactlit._get_fragment_runtime("frag_hidden").hidden = True
+    graph_state = reactlit._get_session_graph()
+    graph_state['rerun_queue'].extend(["frag_hidden", "frag_visible"])
+    reactlit._fire_next_in_queue()
+
+    assert [r.fragment_id_queue for r in ctx.script_requests.requests] == [["id_visible"]]
+    assert graph_state['rerun_queue'] == []
+    assert "frag_hidden" not in graph_state['in_flight']
+
+
+def test_hidden_fragment_run_fires_pending_queue(monkeypatch):
+    """Test que un fragmento oculto drenado en un batch no bloquea el resto de la cola"""
+    from streamlit_plugins.framework.reactlit import reactlit
+
+    reset_reactive_state()
+    monkeypatch.setattr(reactlit, "_APP", reactlit.CompiledAppGraph())
+    # En modo bare st.fragment no ejecuta el cuerpo: se llama al wrapper directamente
+    monkeypatch.setattr(st, "fragment", lambda func: func)
+
+    @reactlit_fragment(lazy_when_hidden=True)
+    def frag_details():
+        raise AssertionError("no debe ejecutarse mientras está oculto")
+
+    def frag_summary():
+        pass
+
+    reactlit._register_fragment(FragmentMetadata(name="frag_summary", func=frag_summary))
+
+    ctx = _FakeCtx({"id_summary": frag_summary})
+    ctx.fragment_ids_this_run = ["id_details"]
+    monkeypatch.setattr(reactlit, "get_script_run_ctx", lambda: ctx)
+    monkeypatch.setattr(reactlit, "_is_in_hidden_container", lambda: True)
+
+    graph_state = reactlit._get_session_graph()
+    graph_state['in_flight'] = {"frag_details": "id_details"}
+    graph_state['source_changed'].add("frag_details")
+    graph_state['rerun_queue'].append("frag_summary")
+
+    frag_details()
+
+    assert graph_state['in_flight'] == {"frag_summary": "id_summary"}
+    assert [r.fragment_id_queue for r in ctx.script_requests.requests] == [["id_summary"]]
+    assert get_fragment_state("frag_details")['is_dirty'] is True
+    assert graph_state['source_changed'] == {"frag_details"}
+
+
+def test_resource_loads_in_background_and_reruns_fragment(monkeypatch):
+    """Test que el loader corre en el pool y al terminar pide el rerun del fragmento"""
+    import threading
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    from streamlit_plugins.framework.reactlit import resources
+
+    class _RecordingHandle:
+        def __init__(self):
+            self.reruns = []
+            self.done = threading.Event()
+
+        def request_fragment_rerun(self, fragment_ids):
+            self.reruns.append(fragment_ids)
+            self.done.set()
+            return True
+
+    handle = _RecordingHandle()
+
+    def capture(ctx=None):
+        # Como SessionHandle.capture: el callback busca el recurso en el session_state de la sesión
+        handle.session_state = get_script_run_ctx().session_state
+        return handle
+
+    monkeypatch.setattr(resources.SessionHandle, "capture", staticmethod(capture))
+
+    gates = {region: threading.Event() for region in ("EU", "US", "APAC")}
+    calls = []
+
+    def load_sales(region):
+        calls.append(region)
+        gates[region].wait(timeout=5)
+        return f"sales:{region}"
+
+    def app(load_sales):
+        import streamlit as st
+        from streamlit_plugins.framework.reactlit import reactlit, reactlit_fragment, use_resource
+
+        st.session_state.setdefault('region', 'EU')
+        st.session_state.setdefault('placeholders', 0)
+        st.session_state.setdefault('shown', [])
+
+        def count_placeholder():
+            st.session_state.placeholders += 1
+
+        @reactlit_fragment()
+        def sales_panel():
+            res = use_resource("sales", load_sales, st.session_state.region, placeholder=count_placeholder)
+            st.session_state.resource = res
+            if res.ready:
+                st.session_state.shown.append(res.value)
+
+        sales_panel()
+        st.session_state.panel_id = reactlit.get_fragment_runtime("sales_panel").fragment_id
+
+    at = AppTest.from_function(app, args=(load_sales,)).run()
+    assert not at.exception
+    assert at.session_state.resource.pending and at.session_state.placeholders == 1
+
+    gates["EU"].set()
+    assert handle.done.wait(timeout=5)
+    # El rerun se pide para el fragmento real que llamó a use_resource
+    assert handle.reruns == [[at.session_state.panel_id]]
+
+    # El rerun encuentra el valor listo sin volver a cargar
+    at.run()
+    res = at.session_state.resource
+    assert res.ready and res.value == "sales:EU"
+    assert calls == ["EU"] and at.session_state.placeholders == 1
+
+    # Los argumentos cambian dos veces mientras la carga de US sigue en curso
+    at.session_state.region = 'US'
+    at.run()
+    stale = at.session_state.resource
+    at.session_state.region = 'APAC'
+    at.run()
+    assert at.session_state.resource is not stale and at.session_state.resource.pending
+
+    # La carga obsoleta termina sin pedir rerun ni rellenar su Resource
+    stale_done = threading.Event()
+    gates["US"].set()
+    stale.future.add_done_callback(lambda f: stale_done.set())
+    assert stale_done.wait(timeout=5)
+    assert handle.reruns == [[at.session_state.panel_id]]
+    assert stale.pending
+
+    handle.done.clear()
+    gates["APAC"].set()
+    assert handle.done.wait(timeout=5)
+    assert handle.reruns == [[at.session_state.panel_id]] * 2
+    at.run()
+    assert at.session_state.resource.value == "sales:APAC"
+    assert calls == ["EU", "US", "APAC"]
+    assert "sales:US" not in at.session_state.shown
+
+
+def _source_app(source):
+    """App con un fragmento ticker que lee la fuente mientras 'read' es True"""
+    import streamlit as st
+    from streamlit_plugins.framework.reactlit import reactlit, reactlit_fragment
+
+    st.session_state.setdefault('read', True)
+
+    @reactlit_fragment()
+    def ticker():
+        if st.session_state.read:
+            st.session_state.price = source.get()
+
+    st.button("rerun")
+    ticker()
+    st.session_state.ticker_id = reactlit.get_fragment_runtime("ticker").fragment_id
+    if st.session_state.pop('reset', False):
+        reactlit._reset_reactive_session_state()
+
+
+def _record_fragment_reruns(monkeypatch):
+    """Sustituye el envío del rerun (la sesión de AppTest ya no corre) y lo registra"""
+    from streamlit_plugins.framework.reactlit import sources
+
+    reruns = []
+
+    def request_fragment_rerun(handle, fragment_ids):
+        reruns.append(list(fragment_ids))
+        return True
+
+    monkeypatch.setattr(sources.SessionHandle, "request_fragment_rerun", request_fragment_rerun)
+    return reruns
+
+
+def test_reactive_source_notifies_subscribed_fragment(monkeypatch):
+    """Test que un publish marca dirty el fragmento suscrito, deja su cascada y pide su rerun"""
+    from streamlit_plugins.framework.reactlit import reactlit, sources
+
+    reruns = _record_fragment_reruns(monkeypatch)
+    source = sources.ReactiveSource("prices", initial=[1])
+
+    at = AppTest.from_function(_source_app, args=(source,)).run()
+    assert not at.exception
+    assert at.session_state.price == [1]
+    assert source.subscriber_count == 1
+
+    assert source.publish([2]) == 1
+    assert reruns == [[at.session_state.ticker_id]]
+    graph_state = at.session_state['_reactive_graph_state']
+    states = at.session_state['_reactive_fragment_states']
+    assert graph_state['source_changed'] == {"ticker"}
+    assert states.is_dirty(reactlit._fragment_ordinal("ticker"))
+
+    # Lectura sin suscripción
+    assert source.get(subscribe=False) == [2]
+
+    # La sesión cerrada se da de baja
+    monkeypatch.setattr(sources.SessionHandle, "request_fragment_rerun", lambda handle, ids: False)
+    assert source.publish([3]) == 0
+    assert source.subscriber_count == 0
+
+
+def test_reactive_source_uses_session_state_after_reset(monkeypatch):
+    """Test que tras un reset de la sesión el publish marca el estado nuevo, no el antiguo"""
+    from streamlit_plugins.framework.reactlit import sources
+
+    reruns = _record_fragment_reruns(monkeypatch)
+    source = sources.ReactiveSource("feed", initial=0)
+
+    at = AppTest.from_function(_source_app, args=(source,)).run()
+    old_graph_state = at.session_state['_reactive_graph_state']
+
+    # El reset ocurre después de que el fragmento se suscribiera en ese run
+    at.session_state.reset = True
+    at.button[0].click().run()
+    assert not at.exception
+    assert source.subscriber_count == 1
+
+    source.publish(1)
+    assert len(reruns) == 1
+    graph_state = at.session_state['_reactive_graph_state']
+    assert graph_state is not old_graph_state
+    assert graph_state['source_changed'] == {"ticker"}
+    assert old_graph_state['source_changed'] == set()
+
+
+def test_reactive_source_drops_fragment_that_stopped_reading(monkeypatch):
+    """Test que un fragmento que ya no llama a get() deja de recibir reruns"""
+    from streamlit_plugins.framework.reactlit import sources
+
+    reruns = _record_fragment_reruns(monkeypatch)
+    source = sources.ReactiveSource("alerts", initial=0)
+
+    at = AppTest.from_function(_source_app, args=(source,)).run()
+    assert source.subscriber_count == 1
+
+    at.session_state.read = False
+    at.button[0].click().run()
+    assert not at.exception
+
+    assert source.publish(1) == 0
+    assert reruns == []
+    assert source.subscriber_count == 0
+    assert "ticker" not in at.session_state['_reactive_graph_state']['source_changed']
+
+
+def test_polling_source_adapts_interval_and_skips_unchanged(monkeypatch):
+    """Test que un poll sin cambios no publica y espacia el intervalo dentro de los límites"""
+    from streamlit_plugins.framework.reactlit import reactlit, sources
+
+    reset_reactive_state()
+
+    payloads = iter([{'status': 'ok'}, {'status': 'ok'}, {'status': 'ok'}, {'status': 'ok'}, {'status': 'down'}])
+    source = sources.PollingSource("status", lambda: next(payloads), min_interval_s=1, max_interval_s=3)
+
+    published = []
+    monkeypatch.setattr(source, "publish", lambda value: published.append(value) or 0)
+
+    assert source._poll_once() == 1          # Primer payload: cambio
+    assert source._poll_once() == 2          # Sin cambios: backoff
+    assert source._poll_once() == 3
+    assert source._poll_once() == 3          # Acotado por max_interval_s
+    assert source._poll_once() == 1.5        # Cambio: se acorta
+    assert published == [{'status': 'ok'}, {'status': 'down'}]
+    assert source.change_rate == pytest.approx(2 / 5)
+
+    with pytest.raises(ValueError):
+        sources.PollingSource("bad", lambda: None, min_interval_s=5, max_interval_s=1)
+
+
 # =============================================================================
 # 🧪 TEST: Integration
 # =============================================================================
@@ -279,6 +1164,183 @@ def test_fragment_workflow():
     # (En tests reales con AppTest)
 
 
+# =============================================================================
+# 🧪 TEST: Tracing
+# =============================================================================
+
+def test_tracer_ring_buffer_and_export():
+    """Test que el tracer tiene capacidad fija y exporta spans"""
+    from streamlit_plugins.framework.reactlit.tracing import ReactiveTracer
+
+    tracer = ReactiveTracer(capacity=3)
+    for idx in range(5):
+        tracer.record("EXEC", fragment=f"frag_{idx}", cascade_id=1, duration_ms=2.0)
+
+    assert len(tracer.events) == 3
+    assert [e.fragment for e in tracer.events] == ["frag_2", "frag_3", "frag_4"]
+    assert list(tracer.cascades()) == [1]
+
+    spans = tracer.to_otel_spans()
+    assert spans[0]["traceId"] == f"{1:032x}"
+    assert spans[0]["endTimeUnixNano"] - spans[0]["startTimeUnixNano"] == 2_000_000
+    assert spans[0]["attributes"]["reactlit.fragment"] == "frag_2"
+
+
+def test_tracing_disabled_records_nothing():
+    """Test que con el tracing desactivado no se registran eventos"""
+    from streamlit_plugins.framework.reactlit import configure_tracing, get_tracer
+    from streamlit_plugins.framework.reactlit.reactlit import _trace
+
+    reset_reactive_state()
+    configure_tracing(enabled=False)
+    try:
+        _trace("QUEUE", "frag")
+        assert len(get_tracer().events) == 0
+    finally:
+        configure_tracing(enabled=True)
+
+    _trace("QUEUE", "frag")
+    assert get_tracer().events[-1].fragment == "frag"
+
+
+# =============================================================================
+# 🧪 TEST: Metrics
+# =============================================================================
+
+def test_fragment_metrics_session_and_process():
+    """Test contadores por sesión y agregados de proceso"""
+    from streamlit_plugins.framework.reactlit import configure_metrics, get_fragment_metrics
+    from streamlit_plugins.framework.reactlit.metrics import (
+        record_fan_out,
+        record_run,
+        reset_process_metrics,
+    )
+
+    reset_reactive_state()
+    reset_process_metrics()
+    configure_metrics(process_wide=True)
+    try:
+        record_run("kpi", fragment_scoped=True, duration_ms=3.0)
+        record_run("kpi", fragment_scoped=False, duration_ms=40.0)
+        record_run("kpi", fragment_scoped=True, duration_ms=None, memo_hit=True)
+        record_fan_out("kpi", 4)
+    finally:
+        configure_metrics(process_wide=False)
+
+    metrics = get_fragment_metrics()["kpi"]
+    assert metrics['runs'] == 3
+    assert metrics['fragment_scoped_runs'] == 2
+    assert metrics['full_script_runs'] == 1
+    assert metrics['memo_hits'] == 1
+    assert metrics['mean_ms'] == pytest.approx(21.5)
+    assert metrics['max_ms'] == 40.0
+    assert metrics['histogram'][5] == 1 and metrics['histogram'][50] == 1
+    assert metrics['max_fan_out'] == 4
+
+    assert get_fragment_metrics(scope='process')["kpi"]['runs'] == 3
+
+
+# =============================================================================
+# 🧪 TEST: Benchmarks
+# =============================================================================
+
+def test_cascade_benchmark_diamond():
+    """Test que el harness de AppTest mide una cascada diamante completa"""
+    from streamlit_plugins.framework.reactlit.benchmarks import cascades
+
+    assert cascades.build_edges('diamond', 4) == {0: [], 1: [0], 2: [0], 3: [1, 2]}
+
+    case = cascades.run_case('diamond', 4, cascades=1)
+    (cascade,) = case['cascades']
+    # Rerun completo del click + f0 + {f1, f2} en un batch + f3
+    assert cascade['script_runs'] == 4
+    assert cascade['fragment_runs'] == 4
+    assert cascade['peak_session_state_bytes'] > 0
+    assert case['edges'] == 4
+
+
+def test_graph_export_report_and_dot(tmp_path):
+    """Test que el exportador estático recoge el grafo de un script y calcula el camino crítico"""
+    from streamlit_plugins.framework.reactlit import reactlit
+    from streamlit_plugins.framework.reactlit.graph_export import (
+        build_graph_report,
+        graph_report_to_dot,
+        load_app_graph,
+    )
+
+    app_file = tmp_path / "app.py"
+    app_file.write_text(
+        "from streamlit_plugins.framework.reactlit import reactlit_fragment, register_dependency\n"
+        "@reactlit_fragment(dependencies=['region'])\n"
+        "def filters(): pass\n"
+        "@reactlit_fragment()\n"
+        "def chart(): pass\n"
+        "@reactlit_fragment()\n"
+        "def table(): pass\n"
+        "@reactlit_fragment()\n"
+        "def summary(): pass\n"
+        "register_dependency('chart', 'filters')\n"
+        "register_dependency('table', 'filters')\n"
+        "register_dependency('summary', 'chart')\n"
+        "register_dependency('summary', 'table')\n"
+        "raise RuntimeError('needs a session')\n"
+    )
+
+    published = reactlit.get_app_graph()
+    app = load_app_graph(str(app_file))
+    assert reactlit.get_app_graph() is published  # No toca el grafo del proceso
+
+    report = build_graph_report(app, timings={"filters": 5, "chart": 40, "table": 10, "summary": 1})
+    assert report['max_cascade_depth'] == 2
+    assert report['fragments']["summary"]['depends_on'] == ["chart", "table"]
+    assert report['state_keys'] == {"region": ["filters"]}
+    assert report['critical_path'] == ["filters", "chart", "summary"]
+    assert report['critical_path_ms'] == 46
+    assert report['hot_spots'][0]['fragment'] == "filters"
+    assert report['sccs'] == []
+
+    dot = graph_report_to_dot(report)
+    assert '"filters" -> "chart" [color="#e03131", penwidth=2];' in dot
+    assert '"filters" -> "table";' in dot
+
+
+def test_graph_export_warns_about_already_imported_modules(tmp_path, monkeypatch):
+    """Test que el exportador avisa de los fragmentos de módulos que runpy no vuelve a importar"""
+    import importlib
+    import sys
+    from streamlit_plugins.framework.reactlit import graph_export, reactlit
+
+    monkeypatch.setattr(reactlit, "_APP", reactlit.CompiledAppGraph())
+    monkeypatch.setattr(st, "fragment", lambda func: func)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    (tmp_path / "export_panels.py").write_text(
+        "from streamlit_plugins.framework.reactlit import reactlit_fragment\n"
+        "@reactlit_fragment()\n"
+        "def export_panel(): pass\n"
+    )
+    app_file = tmp_path / "app.py"
+    app_file.write_text(
+        "import export_panels\n"
+        "from streamlit_plugins.framework.reactlit import reactlit_fragment\n"
+        "@reactlit_fragment()\n"
+        "def export_main(): pass\n"
+    )
+    importlib.invalidate_caches()
+    warnings = []
+    monkeypatch.setattr(graph_export.logger, "warning", lambda msg, *args: warnings.append(msg % args))
+
+    # La app ya se ejecutó en este proceso: export_panels está en sys.modules
+    importlib.import_module("export_panels")
+    try:
+        app = graph_export.load_app_graph(str(app_file))
+    finally:
+        del sys.modules["export_panels"]
+
+    assert set(app.registry) == {"export_main"}
+    assert len(warnings) == 1 and "['export_panel']" in warnings[0]
+    assert "export_panel" in reactlit.get_app_graph().registry
+
+
 # =============================================================================
 # 🧪 TEST: Advanced Patterns
 # =============================================================================
@@ -304,6 +1366,111 @@ def test_reactive_store():
     assert store.get('value') == 42
 
 
+def test_store_selectors_memoize_by_read_keys():
+    """Test que un selector solo se recalcula si cambian las keys que lee"""
+    from streamlit_plugins.framework.reactlit.advanced_patterns import (
+        ReactiveStore,
+        Action,
+        create_selector,
+    )
+
+    reset_reactive_state()
+    store = ReactiveStore()
+    store.define_action('SET', lambda state, payload: {**state, **payload})
+    store.dispatch(Action('SET', {'items': [1, 2, 3], 'theme': 'dark'}))
+
+    calls = []
+
+    def total(state):
+        calls.append(1)
+        return sum(state.get('items', []))
+
+    selector = create_selector(total)
+    notified = []
+    store.subscribe_selector(selector, notified.append, state_key='items_total')
+    assert store.select(selector) == 6 and len(calls) == 1
+    assert st.session_state.items_total == 6
+
+    # Cambiar una key que el selector no lee no recalcula ni notifica
+    store.dispatch(Action('SET', {'theme': 'light'}))
+    assert store.select(selector) == 6 and len(calls) == 1
+    assert notified == []
+
+    # Nueva lista con el mismo total: recalcula pero el valor derivado no cambia
+    store.dispatch(Action('SET', {'items': [3, 3]}))
+    assert len(calls) == 2 and notified == []
+
+    store.dispatch(Action('SET', {'items': [10]}))
+    assert notified == [10] and st.session_state.items_total == 10
+
+
+def test_persistent_map_structural_sharing():
+    """Test que PersistentMap se comporta como un dict y conserva identidad sin cambios"""
+    import random
+    from streamlit_plugins.framework.reactlit.persistent import PersistentMap
+
+    class _Colliding:
+        def __init__(self, value):
+            self.value = value
+
+        def __hash__(self):
+            return 7
+
+        def __eq__(self, other):
+            return isinstance(other, _Colliding) and other.value == self.value
+
+    rng = random.Random(0)
+    reference = {}
+    state = PersistentMap()
+    for step in range(3000):
+        key = rng.choice([rng.randrange(500), f"k{rng.randrange(500)}", _Colliding(rng.randrange(5))])
+        if rng.random() < 0.3:
+            reference.pop(key, None)
+            state = state.delete(key)
+        else:
+            reference[key] = step
+            state = state.set(key, step)
+    assert len(state) == len(reference)
+    assert dict(state.items()) == reference
+
+    snapshot = state
+    key = next(iter(reference))
+    assert state.set(key, reference[key]) is snapshot
+    assert state.delete("missing") is snapshot
+    assert state.replace_with({**state}) is snapshot
+    assert state.set(key, -1) is not snapshot and snapshot[key] == reference[key]
+
+
+def test_store_batch_notifies_once_and_rolls_back():
+    """Test que un batch notifica una vez y revierte el estado si falla"""
+    from streamlit_plugins.framework.reactlit.advanced_patterns import (
+        ReactiveStore,
+        Action,
+    )
+
+    store = ReactiveStore()
+    store.define_action('INC', lambda state, amount: state.set('n', state.get('n', 0) + amount))
+    store.define_action('NOOP', lambda state, _: {**state})
+    calls = []
+    store.subscribe('INC', lambda: calls.append('inc'))
+
+    with store.batch():
+        for _ in range(5):
+            store.dispatch(Action('INC', 1))
+        assert calls == []
+    assert calls == ['inc'] and store.get('n') == 5
+
+    before = store.state
+    store.dispatch(Action('NOOP'))
+    assert store.state is before and calls == ['inc']
+
+    with pytest.raises(RuntimeError):
+        with store.batch():
+            store.dispatch(Action('INC', 10))
+            raise RuntimeError("abort")
+    assert store.state is before and calls == ['inc']
+
+
 def test_reactive_form():
     """Test ReactiveForm basic functionality"""
     from streamlit_plugins.framework.reactlit.advanced_patterns import (
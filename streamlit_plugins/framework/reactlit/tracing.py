@@ -0,0 +1,185 @@
+"""
+Reactive Tracing
+================
+
+Tracer de eventos del framework reactivo con capacidad fija (ring buffer).
+
+Cada evento es estructurado (timestamp, tipo, fragmento, cascada, duración)
+en lugar de un string, de modo que se puede:
+- Renderizar como timeline de cascadas en debug_dependency_graph
+- Exportar a JSON o a spans estilo OpenTelemetry
+
+El buffer vive en session_state (una instancia por sesión) y nunca crece
+por encima de su capacidad. Con el tracing desactivado, registrar un
+evento cuesta una comprobación de flag.
+
+Uso:
+    from streamlit_plugins.framework.reactlit import configure_tracing, get_tracer
+
+    configure_tracing(enabled=True, capacity=1000)
+    spans = get_tracer().to_otel_spans()
+"""
+
+import json
+import time
+from collections import deque
+from typing import Any, NamedTuple, Optional
+
+import streamlit as st
+
+
+class TraceEvent(NamedTuple):
+    """Evento del framework reactivo"""
+    seq: int                       # Secuencia monótona dentro de la sesión
+    timestamp: float               # time.time() al registrar el evento
+    event: str                     # ENQUEUE, FIRE, EXEC, CHANGE, CYCLE_DETECTED...
+    fragment: Optional[str]        # Fragmento afectado (si aplica)
+    cascade_id: Optional[int]      # Cascada a la que pertenece el evento
+    duration_ms: Optional[float]   # Duración (solo eventos medidos, p. ej. EXEC)
+    detail: str                    # Texto libre con contexto adicional
+
+    def format(self) -> str:
+        """Representación de una línea, compatible con el antiguo log de texto"""
+        parts = [f"[{self.event}]"]
+        if self.fragment:
+            parts.append(self.fragment)
+        if self.detail:
+            parts.append(self.detail)
+        if self.duration_ms is not None:
+            parts.append(f"({self.duration_ms:.1f} ms)")
+        return " ".join(parts)
+
+
+class ReactiveTracer:
+    """Ring buffer de TraceEvent con exportadores"""
+    __slots__ = ('events', '_seq')
+
+    def __init__(self, capacity: int = 500):
+        self.events: deque[TraceEvent] = deque(maxlen=capacity)
+        self._seq = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.events.maxlen
+
+    def record(
+        self,
+        event: str,
+        fragment: Optional[str] = None,
+        cascade_id: Optional[int] = None,
+        duration_ms: Optional[float] = None,
+        detail: str = "",
+    ) -> None:
+        self._seq += 1
+        self.events.append(
+            TraceEvent(self._seq, time.time(), event, fragment, cascade_id, duration_ms, detail)
+        )
+
+    def clear(self) -> None:
+        self.events.clear()
+
+    def cascades(self) -> dict[Optional[int], list[TraceEvent]]:
+        """Agrupa los eventos del buffer por cascade_id, en orden de llegada"""
+        grouped: dict[Optional[int], list[TraceEvent]] = {}
+        for trace_event in self.events:
+            grouped.setdefault(trace_event.cascade_id, []).append(trace_event)
+        return grouped
+
+    def to_dicts(self) -> list[dict[str, Any]]:
+        return [trace_event._asdict() for trace_event in self.events]
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dicts(), **kwargs)
+
+    def to_otel_spans(self, service_name: str = "reactlit") -> list[dict[str, Any]]:
+        """
+        Exporta los eventos como spans estilo OpenTelemetry (formato OTLP/JSON).
+        Cada cascada es una traza; cada evento es un span dentro de ella.
+        Los eventos sin duración se exportan como spans instantáneos.
+        """
+        spans = []
+        for trace_event in self.events:
+            end_ns = int(trace_event.timestamp * 1e9)
+            duration_ns = int((trace_event.duration_ms or 0.0) * 1e6)
+            attributes = {
+                "service.name": service_name,
+                "reactlit.event": trace_event.event,
+            }
+            if trace_event.fragment:
+                attributes["reactlit.fragment"] = trace_event.fragment
+            if trace_event.detail:
+                attributes["reactlit.detail"] = trace_event.detail
+
+            spans.append({
+                "traceId": f"{trace_event.cascade_id or 0:032x}",
+                "spanId": f"{trace_event.seq:016x}",
+                "name": f"{trace_event.event} {trace_event.fragment or ''}".strip(),
+                "startTimeUnixNano": end_ns - duration_ns,
+                "endTimeUnixNano": end_ns,
+                "attributes": attributes,
+            })
+        return spans
+
+
+# =============================================================================
+# ⚙️ CONFIGURACIÓN
+# =============================================================================
+
+_TRACING_CONFIG = {
+    'enabled': True,
+    'capacity': 500,
+}
+
+
+def configure_tracing(enabled: bool = True, capacity: int = 500) -> None:
+    """
+    Activa/desactiva el tracing y fija la capacidad del ring buffer.
+    La configuración es global al proceso; el buffer es por sesión.
+    """
+    if capacity <= 0:
+        raise ValueError(f"Tracing capacity must be positive, got {capacity}")
+    _TRACING_CONFIG['enabled'] = enabled
+    _TRACING_CONFIG['capacity'] = capacity
+
+
+def is_tracing_enabled() -> bool:
+    return _TRACING_CONFIG['enabled']
+
+
+def get_tracer() -> ReactiveTracer:
+    """Obtiene o crea el tracer de la sesión (redimensionándolo si cambió la capacidad)"""
+    tracer = st.session_state.get('_reactive_trace')
+    capacity = _TRACING_CONFIG['capacity']
+    if tracer is None:
+        tracer = ReactiveTracer(capacity)
+        st.session_state._reactive_trace = tracer
+    elif tracer.capacity != capacity:
+        resized = ReactiveTracer(capacity)
+        resized.events.extend(tracer.events)
+        resized._seq = tracer._seq
+        tracer = resized
+        st.session_state._reactive_trace = tracer
+    return tracer
+
+
+# =============================================================================
+# 📊 TIMELINE
+# =============================================================================
+
+def render_trace_timeline(tracer: ReactiveTracer, max_cascades: int = 5) -> None:
+    """Muestra las últimas cascadas del buffer como timeline relativo a su inicio"""
+    cascades = list(tracer.cascades().items())[-max_cascades:]
+    if not cascades:
+        st.caption("Sin eventos registrados")
+        return
+
+    for cascade_id, trace_events in reversed(cascades):
+        start = trace_events[0].timestamp
+        end = max(e.timestamp for e in trace_events)
+        label = f"Cascada #{cascade_id}" if cascade_id is not None else "Sin cascada"
+        st.markdown(f"**{label}** · {len(trace_events)} eventos · {(end - start) * 1000:.1f} ms")
+        lines = [
+            f"+{(e.timestamp - start) * 1000:8.1f} ms  {e.format()}"
+            for e in trace_events
+        ]
+        st.text("\n".join(lines))